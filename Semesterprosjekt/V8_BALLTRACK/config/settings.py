@@ -11,6 +11,7 @@
 PCA9685_I2C_ADDR = 0x40        # Standard adresse
 PCA9685_I2C_BUS = 1            # /dev/i2c-1
 PCA9685_FREQ_HZ = 50           # Servo-frekvens
+PWM_MIN_CHANGE_TICKS = 0       # deadband: endringer < dette skrives ikke (0 = kun like verdier hoppes over)
 
 # Servo pulsgrenser (kan kalibreres senere)
 SERVO_MIN_US = 710
@@ -26,6 +27,15 @@ ADC_I2C_BUS = 1
 ADC_I2C_ADDR = 0x48      # ADS1115 standardadresse (kan være 0x48–0x4B)
 ADC_CHANNEL = 0          # 0..3 (AIN0..AIN3) single-ended
 ADC_RESOLUTION = 32767    # 16-bit single-ended positiv range
+ADC_DATA_RATE = 860      # SPS: 8, 16, 32, 64, 128, 250, 475, 860
+ADC_CONTINUOUS = True    # continuous-conversion: read_raw() leser kun siste sample
+ADC_CHIP = "auto"        # "auto" (detekteres ved oppstart), "ADS1115" eller "ADS1015"
+
+# ===========================
+# HARDWARE – oppstart / probing
+# ===========================
+HW_PROBE_TIMEOUT_S = 0.5                            # hard timeout for probing av alle enheter
+HW_PROFILE_PATH = "~/.cache/balltrack/hw_profile.json"  # cachet hardware-profil (--reprobe ignorerer)
 
 
 SOFTPOT_RAW_MIN = 1130
@@ -53,17 +63,88 @@ PID_TI_DISABLED = 999999.0
 PID_TD_DISABLED = 0.0
 
 
+# Relé-autotuning (controller/autotune.py)
+AUTOTUNE_AMPLITUDE = 0.2       # relé: u = ±d rundt bias
+AUTOTUNE_HYSTERESIS = 0.01     # relé skifter når |e| > dette (demper støy)
+AUTOTUNE_RULE = "zn"           # "zn" (Ziegler–Nichols) eller "tl" (Tyreus–Luyben)
+AUTOTUNE_TERMS = "PID"         # "PID", "PI" (eller "P" for zn)
+AUTOTUNE_SKIP_CYCLES = 1       # første svingning(er) er innsvingning
+AUTOTUNE_MAX_CYCLES = 8        # maks antall svingninger
+AUTOTUNE_TOLERANCE = 0.05      # konvergert: a og Pu endres < 5 % mellom svingninger
+AUTOTUNE_TIMEOUT_S = 45.0      # hard grense for hele eksperimentet
+AUTOTUNE_MAX_DEV = 0.35        # avbryt hvis ballen kommer så langt fra setpunktet
+
+
 # ===========================
 # CONTROLLER – generelle
 # ===========================
 DEFAULT_SETPOINT = 0.5         # midt på banen (0..1)
 USE_NORMALIZED_UNITS = True
 
+# Kontrolltråd (controller/control_runtime.py)
+CONTROL_TS = PID_TS            # periode for kontrolltråden (kan settes til 0.005–0.01 på Pi)
+CONTROL_MAX_DT = 0.2           # dt clampes til dette ved hakk/overruns
+CLI_PRINT_HZ = 5               # --cli: statusutskrift (uavhengig av kontrollraten)
+CONTROL_CMD_QUEUE_LEN = 32     # GUI → kontrolltråd: maks antall ulike ventende kommandoer
+
+# Latency-instrumentering av kontrollsyklusen (controller/latency.py)
+CONTROL_INSTRUMENT = False     # True: mål adc/pid/map/pwm/period/jitter (p50/p99/maks)
+CONTROL_INSTRUMENT_WINDOW = 1000   # antall sykluser i rullerende vindu
+
+
+# ===========================
+# SIMULATOR – plant-modell (controller/plant.py)
+# ===========================
+SIM_PLANT = "ballbeam"         # "ballbeam" (fysisk modell) eller "simple" (pos += u·k·dt)
+PLANT_DT = 0.005               # fast RK4-steg (s)
+PLANT_BEAM_LENGTH_M = 0.40     # aktiv lengde på softpot / bane
+PLANT_BEAM_MAX_ANGLE_DEG = 8.0 # banevinkel ved SERVO_MIN_US / SERVO_MAX_US
+PLANT_BEAM_OFFSET_DEG = 0.0    # banen er ikke helt vater ved midtpuls
+PLANT_SERVO_TAU_S = 0.04       # servo: første ordens etterslep
+PLANT_SERVO_SLEW_DEG_S = 60.0  # servo: maks vinkelhastighet på banen
+PLANT_BALL_INERTIA = 0.4       # J/(m·r²): 0.4 = massiv kule, 0.667 = hul kule
+PLANT_DAMPING = 0.3            # rullefriksjon (1/s)
+PLANT_END_RESTITUTION = 0.3    # sprett ved endestopp (0 = stopper helt)
+PLANT_ADC_NOISE_LSB = 4.0      # ADC-støy (standardavvik, rå-enheter)
+PLANT_ADC_LSB = 1              # kvantisering: 1 = ADS1115, 16 = ADS1015
+PLANT_SEED = None              # fast seed → reproduserbar støy
+
+# --sim (controller/sim.py): virtuell klokke, ingen hardware/GUI
+SIM_DURATION_S = 60.0          # simulert tid
+SIM_SPEED = 0.0                # 0 = så fort som mulig, ellers N × sanntid
+SIM_PROFILE = "0:0.5,5:0.3,20:0.7,35:0.5"   # setpunktprofil t:sp (eller sti til CSV)
+SIM_OUT = "sim_trajectory.csv" # trajektorie skrives hit til slutt
+
+# Gain-sweep (tools/gain_sweep.py): sprangrespons i batch-simulatoren
+SWEEP_DURATION_S = 20.0        # simulert tid per kandidat
+SWEEP_STEP = (0.3, 0.7)        # ballen starter i ro på [0], setpunkt [1]
+SWEEP_SETTLE_BAND = 0.02       # innsvingt: |e| < dette · sprangstørrelse
+SWEEP_CHUNK = 2000             # kandidater per batch/prosess
+SWEEP_SEED = 1                 # ADC-støy: fast seed, felles for alle kandidater
+SWEEP_CACHE_PATH = "~/.cache/balltrack/gain_sweep.sqlite"
+SWEEP_RANGES = {               # søkeområde per parameter (min, max)
+    "Kp": (0.2, 5.0), "Ki": (0.0, 1.0), "Kd": (0.0, 3.0),
+    "K": (0.2, 5.0), "Ti": (0.5, 20.0), "Td": (0.0, 1.0),
+}
+
 
 # ===========================
 # GUI OPPDATERING
 # ===========================
 GUI_UPDATE_MS = 20             # 20 ms → 50 Hz GUI oppdatering
+GUI_TAG_DEADBAND = 0.001       # float-tags: mindre endring enn dette sendes ikke til widgets
+
+# Plot (gui/widgets/monitoring/plot_widget.py)
+PLOT_MAX_WINDOW_S = 60         # største valgbare tidsvindu
+PLOT_MAX_SAMPLE_HZ = 200       # høyeste samplerate inn i plottet (dimensjonerer ringbufferet)
+PLOT_BLIT = True               # blitting: kun kurvene tegnes per frame (bakgrunn caches)
+PLOT_FPS = 20                  # plottets egen frame-rate (uavhengig av kontrollraten)
+PLOT_SAMPLE_QUEUE = 4096       # maks antall samples som venter mellom to frames
+PLOT_DECIMATE = True           # min/maks per piksel når vinduet har flere samples enn piksler
+PLOT_AUTOSCALE_MARGIN = 0.10   # luft over/under data når y-aksen skaleres (andel av spenn)
+PLOT_AUTOSCALE_SHRINK = 2.5    # krymp y-aksen først når den er så mange ganger større enn data
+PLOT_BACKEND = "mpl"           # "mpl" = matplotlib (PlotWidget), "tk" = lett Canvas-plott (Pi-LCD)
+PLOT_TK_FPS = 30               # frame-rate for Canvas-plottet
 
 
 # ===========================
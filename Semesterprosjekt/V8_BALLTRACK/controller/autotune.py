@@ -0,0 +1,262 @@
+# controller/autotune.py
+# -----------------------------------------------------------
+# Relé-autotuning (Åström–Hägglund) i kontrollsløyfa
+# -----------------------------------------------------------
+# Formål:
+#  - Idriftsetting av riggen uten å taste inn tall: PID-utgangen
+#    erstattes midlertidig av et relé rundt setpunktet.
+#       e > +hyst  → u = bias + d
+#       e < -hyst  → u = bias - d
+#  - Sløyfa går da i en grensesykel. Amplitude a og periode Pu måles
+#    fortløpende, én svingning om gangen (ingen lagret historikk).
+#  - Kritisk forsterkning (describing function, relé med hysterese):
+#       Ku = 4d / (π · sqrt(a² - hyst²))
+#  - Ziegler–Nichols eller Tyreus–Luyben gir K, Ti, Td.
+#
+# Avgrenset tid:
+#  - De første AUTOTUNE_SKIP_CYCLES svingningene (innsvingning) brukes
+#    ikke. Ferdig når to påfølgende svingninger er like innenfor
+#    AUTOTUNE_TOLERANCE, eller etter AUTOTUNE_MAX_CYCLES svingninger.
+#  - Avbrytes ved timeout (AUTOTUNE_TIMEOUT_S) eller hvis ballen
+#    kommer lenger enn AUTOTUNE_MAX_DEV fra setpunktet.
+#
+# Bruk (fra controllerens update, i stedet for pid.update):
+#     tuner = RelayAutotuner(setpoint=0.5)
+#     u = tuner.update(pos, dt)
+#     if tuner.done:  apply_gains(pid.cfg, *tuner.result["gains"]) ...
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+import math
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.controller.pid import PIDConfig, PIDType
+
+
+# ---------------------------------------------------------
+# Innstillingsregler: (Ku, Pu) → (K, Ti, Td), ideell form
+# ---------------------------------------------------------
+# Ti = inf betyr ingen I-del, Td = 0 ingen D-del
+TUNING_RULES = {
+    # Ziegler–Nichols (svingemetoden)
+    ("zn", "P"):   (0.50, math.inf, 0.0),
+    ("zn", "PI"):  (0.45, 1 / 1.2, 0.0),
+    ("zn", "PID"): (0.60, 1 / 2.0, 1 / 8.0),
+    # Tyreus–Luyben (mer robust, mindre oversving)
+    ("tl", "PI"):  (1 / 3.2, 2.2, 0.0),
+    ("tl", "PID"): (1 / 2.2, 2.2, 1 / 6.3),
+}
+
+
+def tuning_rule(Ku: float, Pu: float, rule: str = "zn", terms: str = "PID") -> Tuple[float, float, float]:
+    """Returnerer (K, Ti, Td) i ideell form (Ti = inf: ingen I-del)."""
+    key = (rule.lower(), terms.upper())
+    if key not in TUNING_RULES:
+        raise ValueError(f"Ukjent regel {key}. Gyldig: {sorted(TUNING_RULES)}")
+    k, ti, td = TUNING_RULES[key]
+    return k * Ku, ti * Pu, td * Pu
+
+
+def apply_gains(cfg: PIDConfig, K: float, Ti: float, Td: float) -> None:
+    """
+    Skriver (K, Ti, Td) inn i PIDConfig for alle tre former:
+      parallel: Kp = K, Ki = K/Ti, Kd = K·Td
+      ideal:    K, Ti, Td
+      series:   Kp, Ti, Td   (i pid.py er serieformen skrevet med
+                             samme koeffisienter som ideell form)
+    Dermed gjelder resultatet uansett valgt PIDType, og get_pid()
+    (Kp, Ki, Kd) viser de samme gainene.
+    """
+    no_i = math.isinf(Ti) or Ti <= 0.0
+    cfg.K = cfg.Kp = K
+    cfg.Ti = settings.PID_TI_DISABLED if no_i else Ti
+    cfg.Td = Td
+    cfg.Ki = 0.0 if no_i else K / Ti
+    cfg.Kd = K * Td
+
+
+def form_gains(pid_type: PIDType, K: float, Ti: float, Td: float) -> Dict[str, float]:
+    """Gainene uttrykt i parametrene til valgt PID-form (for visning/logg)."""
+    no_i = math.isinf(Ti) or Ti <= 0.0
+    if pid_type == PIDType.PARALLEL:
+        return {"Kp": K, "Ki": 0.0 if no_i else K / Ti, "Kd": K * Td}
+    if pid_type == PIDType.IDEAL:
+        return {"K": K, "Ti": Ti, "Td": Td}
+    return {"Kp": K, "Ti": Ti, "Td": Td}
+
+
+# ---------------------------------------------------------
+# Relé-autotuner
+# ---------------------------------------------------------
+class RelayAutotuner:
+    """
+    Relé-eksperiment som kjøres én kontrollsyklus om gangen.
+
+    state: "running" → "done" (result satt) eller "failed" (message satt)
+    """
+
+    def __init__(
+        self,
+        setpoint: float,
+        amplitude: float = settings.AUTOTUNE_AMPLITUDE,
+        hysteresis: float = settings.AUTOTUNE_HYSTERESIS,
+        bias: float = 0.0,
+        rule: str = settings.AUTOTUNE_RULE,
+        terms: str = settings.AUTOTUNE_TERMS,
+        pid_type: PIDType = PIDType.PARALLEL,
+        skip_cycles: int = settings.AUTOTUNE_SKIP_CYCLES,
+        max_cycles: int = settings.AUTOTUNE_MAX_CYCLES,
+        tolerance: float = settings.AUTOTUNE_TOLERANCE,
+        timeout_s: float = settings.AUTOTUNE_TIMEOUT_S,
+        max_dev: float = settings.AUTOTUNE_MAX_DEV,
+    ):
+        if amplitude <= 0.0:
+            raise ValueError(f"Ugyldig relé-amplitude {amplitude}. Må være > 0")
+        # Sjekk regelen med en gang, ikke etter et minutt med svingninger
+        tuning_rule(1.0, 1.0, rule, terms)
+
+        self.setpoint = float(setpoint)
+        self.d = float(amplitude)
+        self.hyst = max(0.0, float(hysteresis))
+        self.bias = float(bias)
+        self.rule = rule
+        self.terms = terms
+        self.pid_type = pid_type
+        self.skip_cycles = max(0, int(skip_cycles))
+        self.max_cycles = max(self.skip_cycles + 2, int(max_cycles))
+        self.tolerance = float(tolerance)
+        self.timeout_s = float(timeout_s)
+        self.max_dev = float(max_dev)
+
+        self.state = "running"
+        self.message = ""
+        self.result: Optional[Dict[str, Any]] = None
+
+        self.t = 0.0
+        self.cycles = 0                 # fullførte svingninger
+        self._high = True               # relé starter mot +d
+        self._t_switch: Optional[float] = None   # siste skift til +d
+        self._pmax = -math.inf
+        self._pmin = math.inf
+        self._last: Optional[Tuple[float, float]] = None   # (a, Pu) forrige svingning
+        self.amplitude = 0.0
+        self.period = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.state != "running"
+
+    # ---------------------------------------------------------
+    def update(self, pos: float, dt: float) -> float:
+        """Ett kontrollsteg. Returnerer pådraget u (relé-utgang)."""
+        if self.done:
+            return self.bias
+
+        self.t += dt
+        e = self.setpoint - pos
+
+        if abs(e) > self.max_dev:
+            return self._fail(f"avvik {abs(e):.3f} > {self.max_dev:.3f} – avbrutt")
+        if self.t > self.timeout_s:
+            return self._fail(f"timeout etter {self.timeout_s:.0f} s ({self.cycles} svingninger)")
+
+        if pos > self._pmax:
+            self._pmax = pos
+        if pos < self._pmin:
+            self._pmin = pos
+
+        # Relé med hysterese
+        if self._high and e < -self.hyst:
+            self._high = False
+        elif not self._high and e > self.hyst:
+            self._high = True
+            self._on_rising_switch()
+            if self.done:
+                return self.bias
+
+        return self.bias + (self.d if self._high else -self.d)
+
+    def _on_rising_switch(self) -> None:
+        # Én hel svingning = tiden mellom to skift til +d
+        if self._t_switch is None:
+            self._t_switch = self.t
+            self._reset_extrema()
+            return
+
+        period = self.t - self._t_switch
+        amplitude = 0.5 * (self._pmax - self._pmin)
+        self._t_switch = self.t
+        self._reset_extrema()
+        self.cycles += 1
+
+        if self.cycles <= self.skip_cycles:
+            return
+
+        self.amplitude, self.period = amplitude, period
+        prev = self._last
+        self._last = (amplitude, period)
+
+        converged = prev is not None and (
+            abs(amplitude - prev[0]) <= self.tolerance * amplitude
+            and abs(period - prev[1]) <= self.tolerance * period
+        )
+        if converged:
+            self._finish(0.5 * (amplitude + prev[0]), 0.5 * (period + prev[1]), converged=True)
+        elif self.cycles >= self.max_cycles:
+            self._finish(amplitude, period, converged=False)
+
+    def _reset_extrema(self) -> None:
+        self._pmax = -math.inf
+        self._pmin = math.inf
+
+    def _finish(self, a: float, Pu: float, converged: bool) -> None:
+        if a <= self.hyst:
+            self._fail(f"amplitude {a:.4f} ≤ hysterese {self.hyst:.4f} – øk relé-amplituden")
+            return
+
+        Ku = 4.0 * self.d / (math.pi * math.sqrt(a * a - self.hyst * self.hyst))
+        K, Ti, Td = tuning_rule(Ku, Pu, self.rule, self.terms)
+
+        self.state = "done"
+        self.result = {
+            "Ku": Ku,
+            "Pu": Pu,
+            "amplitude": a,
+            "cycles": self.cycles,
+            "converged": converged,
+            "rule": self.rule,
+            "terms": self.terms,
+            "pid_type": self.pid_type.value,
+            "gains": (K, Ti, Td),
+            "form_gains": form_gains(self.pid_type, K, Ti, Td),
+            "duration_s": self.t,
+        }
+        self.message = (
+            f"Ku={Ku:.3f}, Pu={Pu:.2f} s etter {self.cycles} svingninger"
+            + ("" if converged else " (ikke konvergert)")
+        )
+
+    def _fail(self, message: str) -> float:
+        self.state = "failed"
+        self.message = message
+        return self.bias
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "cycles": self.cycles,
+            "max_cycles": self.max_cycles,
+            "t": self.t,
+            "amplitude": self.amplitude,
+            "period": self.period,
+            "message": self.message,
+            "result": self.result,
+        }
+
+    def label(self) -> str:
+        """Kort tekst for GUI-tag (f.eks. 'running 3/8')."""
+        if self.state == "running":
+            return f"running {self.cycles}/{self.max_cycles}"
+        return self.state
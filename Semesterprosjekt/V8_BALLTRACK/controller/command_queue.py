@@ -0,0 +1,147 @@
+# controller/command_queue.py
+# -----------------------------------------------------------
+# CommandQueue – skrivekommandoer fra GUI til kontrollsløyfa
+# -----------------------------------------------------------
+# Formål:
+#  - GUI-tråden skal ikke kalle controlleren direkte (set_servo_manual
+#    er en I2C-skriving). Kommandoer legges i en kø, og kontrolltråden
+#    utfører dem i starten av hver syklus (apply()).
+#  - Coalescing: flere skrivinger til samme nøkkel (f.eks. slider som
+#    dras) slås sammen til siste verdi. Maks én skriving per nøkkel
+#    per syklus → forutsigbar last på aktuator/buss.
+#  - Begrenset størrelse: er køen full, avvises nye nøkler (de som
+#    allerede ligger i køen kan fortsatt oppdateres).
+#
+# Rekkefølge: en nøkkel som skrives på nytt flyttes bakerst, slik at
+# kommandoene utføres i rekkefølgen av siste skriving.
+#
+# Barrierer (start/stop): put_barrier() deler køen i to. Kommandoer
+# lagt inn før barrieren utføres før den, og slås aldri sammen med
+# skrivinger etter den – en slider-verdi fra før Stop kan dermed ikke
+# utføres etter Stop. `drop` forkaster ventende nøkler (f.eks. servo-
+# skrivinger som Stop uansett skal overstyre), så de aldri når riggen.
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+import threading
+
+from V8_BALLTRACK.config import settings
+
+
+Command = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+class CommandQueue:
+    """
+    Trådsikker kø med coalescing per nøkkel.
+
+    Bruk:
+        q = CommandQueue()
+        q.put("setpoint", ctrl.set_setpoint, 0.4)   # GUI-tråd
+        q.put_barrier("stop", ctrl.stop)            # GUI-tråd, ordnet
+        q.apply()                                   # kontrolltråd, før update(dt)
+    """
+
+    def __init__(self, maxlen: int = settings.CONTROL_CMD_QUEUE_LEN):
+        if maxlen <= 0:
+            raise ValueError(f"Ugyldig kølengde {maxlen}. Må være > 0")
+
+        self.maxlen = int(maxlen)
+        # Nøkkel i køen: (generasjon, key). Generasjonen økes ved hver
+        # barriere, så coalescing skjer kun innenfor samme generasjon.
+        self._pending: "OrderedDict[Tuple[int, Hashable], Command]" = OrderedDict()
+        self._gen = 0
+        self._lock = threading.Lock()
+
+        self.put_count = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.applied = 0
+        self.last_error = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> bool:
+        """Legger inn (eller erstatter) kommandoen for `key`. False hvis køen er full."""
+        with self._lock:
+            self.put_count += 1
+            k = (self._gen, key)
+            if k in self._pending:
+                self.coalesced += 1
+                self._pending.move_to_end(k)
+            elif len(self._pending) >= self.maxlen:
+                self.rejected += 1
+                return False
+            self._pending[k] = (fn, args)
+            return True
+
+    def put_barrier(self, key: Hashable, fn: Callable[..., Any], *args: Any,
+                    drop: Iterable[Hashable] = ()) -> bool:
+        """
+        Legger inn en barriere-kommando (start/stop). Avvises aldri, selv
+        om køen er full. Ventende kommandoer med nøkkel i `drop` forkastes.
+        """
+        drop = frozenset(drop)
+        with self._lock:
+            self.put_count += 1
+            if drop:
+                for k in [k for k in self._pending if k[1] in drop]:
+                    del self._pending[k]
+                    self.dropped += 1
+
+            # Samme barriere to ganger på rad (dobbeltklikk) → én kommando
+            last = next(reversed(self._pending), None)
+            if last is not None and last == (self._gen - 1, key):
+                self.coalesced += 1
+                self._pending[last] = (fn, args)
+                return True
+
+            self._pending[(self._gen, key)] = (fn, args)
+            self._gen += 1
+            return True
+
+    def drain(self) -> List[Command]:
+        """Henter (og fjerner) alle ventende kommandoer, eldste først."""
+        with self._lock:
+            if not self._pending:
+                return []
+            out = list(self._pending.values())
+            self._pending.clear()
+        return out
+
+    def apply(self) -> int:
+        """
+        Utfører alle ventende kommandoer. Kalles fra kontrolltråden
+        (med controller-låsen holdt). Returnerer antall utførte.
+        """
+        n = 0
+        for fn, args in self.drain():
+            try:
+                fn(*args)
+            except Exception as e:
+                # Én feil (f.eks. I2C-glitch) skal ikke stoppe resten
+                if str(e) != self.last_error:
+                    print("[CommandQueue] Feil i kommando:", e)
+                self.last_error = str(e)
+            n += 1
+        self.applied += n
+        return n
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "put": self.put_count,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "applied": self.applied,
+        }
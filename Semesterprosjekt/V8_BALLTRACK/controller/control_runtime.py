@@ -0,0 +1,248 @@
+# controller/control_runtime.py
+# -----------------------------------------------------------
+# ControlRuntime – egen sanntidstråd for reguleringssløyfa
+# -----------------------------------------------------------
+# Formål:
+#  - Kjøre controller.update(dt) med fast periode, uavhengig av
+#    Tkinter sin event-loop (root.after) og matplotlib-tegning.
+#  - Planlegge mot absolutte deadlines (time.monotonic()), slik at
+#    perioden ikke "sklir" selv om ett steg tar litt lengre tid.
+#  - Telle overskredne deadlines (overruns) for feilsøking.
+#
+# GUI skal kun LESE status (snapshots) og sende kommandoer.
+# Selve reguleringen går alltid her.
+#
+# Etter hvert steg legges et kompakt sample i `samples` (deque).
+# Plottet henter alle nye samples i batch (drain_samples()) i sin
+# egen frame-rate, slik at ingen kontrollsamples går tapt.
+#
+# Skrivekommandoer fra GUI (start/stop, setpoint, manuell servo, PID) legges i
+# `commands` (CommandQueue) og utføres i starten av hver syklus.
+# Dermed skjer all I2C-tilgang fra kontrolltråden.
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import threading
+import time
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.controller.command_queue import CommandQueue
+
+
+# (t, sp, pv, u_tot, u_P, u_I, u_D) – samme rekkefølge som plot-bufferet
+Sample = Tuple[float, float, float, float, float, float, float]
+
+
+def status_to_sample(status: Mapping[str, Any]) -> Sample:
+    """Plukker plott-feltene ut av et status-snapshot."""
+    return (
+        status.get("t", 0.0),
+        status.get("setpoint", 0.0),
+        status.get("pos", 0.0),
+        status.get("u", 0.0),
+        status.get("P", 0.0),
+        status.get("I", 0.0),
+        status.get("D", 0.0),
+    )
+
+
+class DeadlineScheduler:
+    """
+    Enkel periodisk scheduler basert på absolutte deadlines.
+
+    I stedet for "gjør jobb → sleep(dt)" (som gir periode = dt + jobbtid)
+    regner vi ut neste deadline som forrige deadline + periode.
+
+    Bruk:
+        sched = DeadlineScheduler(0.01)
+        while ...:
+            dt = sched.wait_next()
+            ctrl.update(dt)
+    """
+
+    # Ligger vi mer enn dette antall perioder bak, hopper vi frem
+    # i stedet for å prøve å "ta igjen" med mange korte perioder.
+    RESYNC_PERIODS = 5
+
+    def __init__(self, period_s: float, max_dt: float = settings.CONTROL_MAX_DT):
+        if period_s <= 0.0:
+            raise ValueError(f"Ugyldig periode {period_s}. Må være > 0")
+
+        self.period_s = float(period_s)
+        self.max_dt = float(max_dt)
+
+        self.cycles = 0
+        self.overruns = 0
+        self.resyncs = 0
+        self.last_dt = 0.0
+        self.max_seen_dt = 0.0
+
+        self._next_deadline: Optional[float] = None
+        self._last_t: Optional[float] = None
+
+    def reset(self) -> None:
+        self._next_deadline = None
+        self._last_t = None
+
+    def wait_next(self, stop_event: Optional[threading.Event] = None) -> float:
+        """
+        Venter til neste deadline og returnerer målt dt siden forrige kall.
+        Første kall returnerer nominell periode uten å vente.
+        """
+        now = time.monotonic()
+
+        if self._next_deadline is None:
+            self._next_deadline = now + self.period_s
+            self._last_t = now
+            self.cycles += 1
+            self.last_dt = self.period_s
+            return self.period_s
+
+        remaining = self._next_deadline - now
+        if remaining > 0.0:
+            if stop_event is not None:
+                stop_event.wait(remaining)
+            else:
+                time.sleep(remaining)
+        else:
+            # Forrige steg brukte mer enn én periode
+            self.overruns += 1
+
+        now = time.monotonic()
+        dt = now - self._last_t
+        self._last_t = now
+
+        self._next_deadline += self.period_s
+        if now - self._next_deadline > self.RESYNC_PERIODS * self.period_s:
+            self._next_deadline = now + self.period_s
+            self.resyncs += 1
+
+        self.cycles += 1
+        self.last_dt = dt
+        if dt > self.max_seen_dt:
+            self.max_seen_dt = dt
+
+        # clamp dt for stabil oppførsel (samme grense som GUI brukte før)
+        return max(0.0, min(self.max_dt, dt))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "period_s": self.period_s,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "resyncs": self.resyncs,
+            "last_dt": self.last_dt,
+            "max_dt": self.max_seen_dt,
+        }
+
+
+class ControlRuntime:
+    """
+    Kjører controller.update(dt) i en egen bakgrunnstråd.
+
+    - lock: serialiserer kall mot controlleren (GUI-kommandoer vs. kontrollsteg)
+    - commands: kø med skrivekommandoer, utføres før hvert kontrollsteg
+    - start()/stop(): starter/stopper tråden (ikke reguleringen!)
+    - get_stats(): periode, antall sykluser og overruns
+    """
+
+    def __init__(self, controller, period_s: float = settings.CONTROL_TS,
+                 sample_queue_len: int = settings.PLOT_SAMPLE_QUEUE):
+        self.controller = controller
+        self.lock = threading.RLock()
+
+        # Samples til plott (deque.append/popleft er trådsikre).
+        # maxlen: hvis GUI henger, kastes de eldste.
+        self.samples = deque(maxlen=sample_queue_len)
+
+        # Kommandoer fra GUI (coalesced per nøkkel)
+        self.commands = CommandQueue()
+
+        self._sched = DeadlineScheduler(period_s)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def period_s(self) -> float:
+        return self._sched.period_s
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------------------------------------------------------
+    # Start/stopp av tråden
+    # ---------------------------------------------------------
+    def start(self) -> None:
+        if self.is_running():
+            return
+
+        self._stop_event.clear()
+        self._sched.reset()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="BalltrackControl",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+        # Kommandoer lagt inn etter siste syklus (f.eks. Stop rett før
+        # vinduet lukkes) skal ikke gå tapt
+        with self.lock:
+            self.commands.apply()
+
+    # ---------------------------------------------------------
+    # Selve sløyfa
+    # ---------------------------------------------------------
+    def _run(self) -> None:
+        step = getattr(self.controller, "update", None)
+        if step is None:
+            print("[ControlRuntime] controller mangler update() – tråd avsluttes")
+            return
+        get_status = getattr(self.controller, "get_status", None)
+        samples = self.samples
+        commands = self.commands
+
+        while not self._stop_event.is_set():
+            dt = self._sched.wait_next(self._stop_event)
+            if self._stop_event.is_set():
+                break
+
+            try:
+                with self.lock:
+                    commands.apply()
+                    step(dt)
+                if get_status is not None:
+                    samples.append(status_to_sample(get_status()))
+            except Exception as e:
+                # Ikke drep tråden på én feil (f.eks. I2C-glitch), men husk den
+                if str(e) != self.last_error:
+                    print("[ControlRuntime] Feil i kontrollsteg:", e)
+                self.last_error = str(e)
+
+    def drain_samples(self) -> List[Sample]:
+        """Henter (og fjerner) alle samples produsert siden forrige kall."""
+        out = []
+        samples = self.samples
+        try:
+            while True:
+                out.append(samples.popleft())
+        except IndexError:
+            pass
+        return out
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._sched.get_stats()
+        stats["running"] = self.is_running()
+        stats["last_error"] = self.last_error
+        stats["commands"] = self.commands.get_stats()
+        return stats
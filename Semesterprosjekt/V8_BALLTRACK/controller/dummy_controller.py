@@ -14,14 +14,22 @@
 #  - manuell servo (ON/OFF + slider)
 #  - status-verdier som oppdateres over tid (pos, u, pulse_us, raw)
 #  - event-logg (ringbuffer) slik at du kan vise i LogWidget
+#  - valgfri plant (f.eks. BallBeamPlant fra controller/plant.py):
+#    da drives ballen av servo-pulsen i stedet for pos += u·k·dt
+#  - relé-autotuning (start_autotune) som på PositionControllerV8
 # -----------------------------------------------------------
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional
 import time
 
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.controller.autotune import RelayAutotuner, form_gains
+from V8_BALLTRACK.controller.pid import PIDType
+
 
 def _clamp(x: float, lo: float, hi: float) -> float:
     if x < lo:
@@ -58,6 +66,7 @@ class DummyController:
         u_max: float = 1.0,
         gui_tag_name: str = "SIM",
         events_max: int = 40,
+        plant=None,
     ) -> None:
         # "Hardware-lik" konfigurering
         self.adc_resolution = int(adc_resolution)
@@ -65,6 +74,7 @@ class DummyController:
         self.servo_max_us = int(servo_max_us)
         self.u_min = float(u_min)
         self.u_max = float(u_max)
+        self.plant = plant
 
         # Tilstand
         self.setpoint: float = float(default_setpoint)
@@ -84,6 +94,11 @@ class DummyController:
         self._i_acc: float = 0.0
         self._prev_e: Optional[float] = None
 
+        # Relé-autotuning (kun parallell form her)
+        self._autotune: Optional[RelayAutotuner] = None
+        self.autotune_result: Optional[Dict[str, Any]] = None
+        self._autotune_label: str = "idle"
+
         # For feilsøking / logging
         self._tag = str(gui_tag_name)
         self._events: List[str] = []
@@ -92,7 +107,12 @@ class DummyController:
         self._t0 = time.monotonic()
         self._last_tick = time.monotonic()
 
+        # Status-snapshot (samme kontrakt som PositionControllerV8)
+        self.cycle: int = 0
+        self._status: Mapping[str, Any] = MappingProxyType({})
+
         self._log("INIT: DummyController opprettet")
+        self._publish_status()
 
     # -------------------------
     # Intern logging / events
@@ -120,6 +140,7 @@ class DummyController:
         self._log("START pressed → enabled=True")
 
     def stop_regulation(self) -> None:
+        self.cancel_autotune()
         self._enabled = False
         self.u = 0.0
         self._i_acc = 0.0
@@ -170,6 +191,8 @@ class DummyController:
     # API: Manuell servo
     # -------------------------
     def enable_manual_servo(self, flag: bool) -> None:
+        if flag:
+            self.cancel_autotune()
         self._manual_mode = bool(flag)
         self._log(f"Manual servo {'ON' if self._manual_mode else 'OFF'}")
 
@@ -187,6 +210,56 @@ class DummyController:
             return 0.5
         return (self.pulse_us - self.servo_min_us) / (self.servo_max_us - self.servo_min_us)
 
+    # -------------------------
+    # API: Relé-autotuning
+    # -------------------------
+    def start_autotune(self, rule: Optional[str] = None, terms: Optional[str] = None,
+                       pid_type=None) -> None:
+        # DummyController har kun parallell PID (kp/ki/kd)
+        self._autotune = RelayAutotuner(
+            self.setpoint,
+            rule=rule or settings.AUTOTUNE_RULE,
+            terms=terms or settings.AUTOTUNE_TERMS,
+            pid_type=PIDType.PARALLEL,
+            bias=0.0,
+        )
+        self._autotune_label = self._autotune.label()
+        # Resultat fra forrige kjøring gjelder ikke lenger
+        self.autotune_result = None
+        self._manual_mode = False
+        self._enabled = True
+        self._log(f"AUTOTUNE start → regel={self._autotune.rule}, ledd={self._autotune.terms}")
+
+    def cancel_autotune(self) -> None:
+        if self._autotune is None:
+            return
+        self._autotune = None
+        self._autotune_label = "cancelled"
+        self._log("AUTOTUNE avbrutt")
+
+    def get_autotune_status(self) -> Dict[str, Any]:
+        if self._autotune is not None:
+            return self._autotune.status()
+        return self.autotune_result or {"state": self._autotune_label}
+
+    def _autotune_step(self, dt: float) -> None:
+        tuner = self._autotune
+        self.u = _clamp(tuner.update(self.pos, dt), self.u_min, self.u_max)
+        self._autotune_label = tuner.label()
+        if not tuner.done:
+            return
+
+        self._autotune = None
+        self.autotune_result = tuner.status()
+        if tuner.state == "done":
+            g = form_gains(PIDType.PARALLEL, *tuner.result["gains"])
+            self.pid.kp, self.pid.ki, self.pid.kd = g["Kp"], g["Ki"], g["Kd"]
+            self._i_acc = 0.0
+            self._prev_e = None
+            self._log(f"AUTOTUNE ferdig → {tuner.message}, Kp={g['Kp']:.3f}, Ki={g['Ki']:.3f}, Kd={g['Kd']:.3f}")
+        else:
+            self._log(f"AUTOTUNE feilet → {tuner.message}")
+
     # -------------------------
     # "Kontrollsyklus" (GUI/CLI kan kalle denne periodisk)
     # -------------------------
@@ -209,7 +282,15 @@ class DummyController:
             self.u = 0.0  # i manual viser vi gjerne u=0
         else:
             # 2) Auto: hvis enabled, kjør en enkel PID-lignende beregning
-            if self._enabled:
+            if self._enabled and self._autotune is not None:
+                # Relé i stedet for PID
+                self._autotune_step(dt)
+                u_norm = (self.u + 1.0) / 2.0
+                self.pulse_us = int(self.servo_min_us + u_norm * (self.servo_max_us - self.servo_min_us))
+                if self.plant is None:
+                    self.pos = _clamp(self.pos + self.u * 0.30 * dt, 0.0, 1.0)
+
+            elif self._enabled:
                 e = self.setpoint - self.pos
 
                 # P
@@ -249,14 +330,31 @@ class DummyController:
                 self.u = 0.0
                 self.pulse_us = int((self.servo_min_us + self.servo_max_us) / 2)
 
-        # Oppdater raw fra pos
-        self.raw = int(_clamp(self.pos, 0.0, 1.0) * self.adc_resolution)
+        # Plant: servo-pulsen driver ballen, posisjon leses som fra softpot
+        if self.plant is not None:
+            self._step_plant(dt)
+        else:
+            # Oppdater raw fra pos
+            self.raw = int(_clamp(self.pos, 0.0, 1.0) * self.adc_resolution)
 
         # Hvis tick blir kalt, kan vi logge "heartbeat" sjeldent (valgfritt)
         # Unngå spam; logg bare hvis dt ble tvunget (f.eks. fra GUI)
         if force_dt and int((time.monotonic() - self._t0) * 10) % 50 == 0:
             self._log(f"TICK dt={dt:.3f} (heartbeat)")
 
+        self.cycle += 1
+        self._publish_status()
+
+    def _step_plant(self, dt: float) -> None:
+        self.plant.set_pulse_us(self.pulse_us)
+        self.plant.advance(dt)
+        self.raw = int(self.plant.read_raw())
+
+        raw_min = settings.SOFTPOT_RAW_MIN
+        raw_max = settings.SOFTPOT_RAW_MAX
+        if raw_max > raw_min:
+            self.pos = _clamp((self.raw - raw_min) / (raw_max - raw_min), 0.0, 1.0)
+
     # Alias: i tilfelle noe i koden forventer update()
     def update(self, dt: float) -> None:
         # Behold for kompatibilitet, men GUI bør bruke tick()
@@ -265,7 +363,11 @@ class DummyController:
     # -------------------------
     # Status til GUI
     # -------------------------
-    def get_status(self) -> Dict[str, Any]:
+    def get_status(self) -> Mapping[str, Any]:
+        # O(1): siste snapshot publisert av tick()
+        return self._status
+
+    def _publish_status(self) -> None:
         # Mode-feltet er ofte synlig i footer; vi legger inn siste handling der.
         run_state = "RUN" if self._enabled else "STOP"
         man_state = "MAN" if self._manual_mode else "AUTO"
@@ -278,15 +380,21 @@ class DummyController:
         I = 0.0 if self._disable_i else (self.pid.ki * self._i_acc)
         D = 0.0  # vi lagrer ikke siste D separat her, men GUI kan fortsatt plotte u
 
-        return {
+        self._status = MappingProxyType({
+            "t": time.monotonic(),
+            "cycle": self.cycle,
             "raw": int(self.raw),
             "pos": float(self.pos),
             "setpoint": float(self.setpoint),
             "u": float(self.u),
             "pulse_us": int(self.pulse_us),
+            "saturated": self.u in (self.u_min, self.u_max),
             "P": float(P),
             "I": float(I),
             "D": float(D),
+            "enabled": self._enabled,
+            "manual": self._manual_mode,
             "mode": mode,
-            "events": list(self._events),  # valgfritt: kan vises i logg-widget
-        }
+            "autotune": self._autotune_label,
+            "events": tuple(self._events),  # valgfritt: kan vises i logg-widget
+        })
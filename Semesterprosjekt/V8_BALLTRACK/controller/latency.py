@@ -0,0 +1,125 @@
+# controller/latency.py
+# -----------------------------------------------------------
+# Latency-instrumentering av kontrollsyklusen
+# -----------------------------------------------------------
+# Måler hvor tiden i én kontrollperiode går:
+#   adc    – lesing av posisjon (I2C + konvertering)
+#   pid    – PID-beregning
+#   map    – u → servo-puls (skalering, metning)
+#   pwm    – skriving til PCA9685
+#   cycle  – hele update()
+#   period – tid mellom to påfølgende update()
+#   jitter – |period - nominell periode|
+#
+# Hver størrelse lagres i en fast ringbuffer (ingen allokering per
+# syklus). Percentiler (p50/p99/maks) regnes ut bare hvert
+# `publish_every`-te syklus, og resultatet caches.
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from array import array
+from time import perf_counter_ns
+from typing import Dict
+
+
+class RollingStats:
+    """Siste `size` målinger (ns) i en ringbuffer."""
+
+    def __init__(self, size: int = 1000):
+        self.size = int(size)
+        self._buf = array("q", [0]) * self.size
+        self._i = 0
+        self._n = 0
+
+    def add(self, value_ns: int) -> None:
+        self._buf[self._i] = value_ns
+        self._i += 1
+        if self._i == self.size:
+            self._i = 0
+        if self._n < self.size:
+            self._n += 1
+
+    def clear(self) -> None:
+        self._i = 0
+        self._n = 0
+
+    def summary(self) -> Dict[str, float]:
+        """p50/p99/maks i mikrosekunder over vinduet."""
+        if self._n == 0:
+            return {"p50": 0.0, "p99": 0.0, "max": 0.0, "n": 0}
+
+        vals = sorted(self._buf[: self._n])
+        n = len(vals)
+        return {
+            "p50": vals[n // 2] / 1000.0,
+            "p99": vals[min(n - 1, (n * 99) // 100)] / 1000.0,
+            "max": vals[-1] / 1000.0,
+            "n": n,
+        }
+
+
+class CycleInstrumentation:
+    """
+    Tidsstempler stegene i én kontrollsyklus med perf_counter_ns.
+
+    Bruk i update():
+        inst.begin()
+        ... ADC ...        inst.mark(inst.adc)
+        ... PID ...        inst.mark(inst.pid)
+        ...
+        inst.end()
+    """
+
+    STAGES = ("adc", "pid", "map", "pwm", "cycle", "period", "jitter")
+
+    def __init__(self, nominal_period_s: float, window: int = 1000, publish_every: int = 50):
+        self.nominal_ns = int(nominal_period_s * 1e9)
+        self.publish_every = max(1, int(publish_every))
+
+        self.adc = RollingStats(window)
+        self.pid = RollingStats(window)
+        self.map = RollingStats(window)
+        self.pwm = RollingStats(window)
+        self.cycle = RollingStats(window)
+        self.period = RollingStats(window)
+        self.jitter = RollingStats(window)
+
+        self._t_prev_begin = 0
+        self._t_begin = 0
+        self._t_last = 0
+        self._count = 0
+
+        # Siste publiserte sammendrag (brukes av get_status())
+        self.latest: Dict[str, Dict[str, float]] = {}
+
+    def begin(self) -> None:
+        t = perf_counter_ns()
+        if self._t_prev_begin:
+            period = t - self._t_prev_begin
+            self.period.add(period)
+            self.jitter.add(abs(period - self.nominal_ns))
+        self._t_prev_begin = t
+        self._t_begin = t
+        self._t_last = t
+
+    def mark(self, stats: RollingStats) -> None:
+        t = perf_counter_ns()
+        stats.add(t - self._t_last)
+        self._t_last = t
+
+    def end(self) -> None:
+        self.cycle.add(perf_counter_ns() - self._t_begin)
+        self._count += 1
+        if self._count % self.publish_every == 0:
+            self.latest = self.summary()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: getattr(self, name).summary() for name in self.STAGES}
+
+    def reset(self) -> None:
+        for name in self.STAGES:
+            getattr(self, name).clear()
+        self._t_prev_begin = 0
+        self._count = 0
+        self.latest = {}
@@ -0,0 +1,234 @@
+# controller/plant.py
+# -----------------------------------------------------------
+# BallBeamPlant – fysisk modell av ball på bane (simulering)
+# -----------------------------------------------------------
+# Formål:
+#  - Gi simulatoren (emulator / DummyController) en plant som ligner
+#    riggen, slik at PID-parametre tunet i simulering kan brukes på
+#    ekte hardware.
+#  - Erstatter den enkle integratoren (pos += u * 0.30 * dt).
+#
+# Modell (tilstander: p [m], v [m/s], theta [rad]):
+#  - Ball som ruller på bane (Lagrange, ball-and-beam):
+#       p'' = (g · sin(theta + offset) + p · theta'²) / (1 + J/(m r²)) - c·v
+#    p = 0 er midt på banen, positiv p mot pos = 1.
+#  - Servo: puls → ønsket banevinkel (lineært over SERVO_MIN/MAX_US),
+#    første ordens etterslep (tau) med maks vinkelhastighet (slew).
+#    Puls 0 (servo av): banen står i ro.
+#  - Endestopp: ballen stopper ved banens ender og spretter litt tilbake
+#    (restitusjon).
+#  - Sensor: softpot mappes til SOFTPOT_RAW_MIN..MAX, med gaussisk
+#    ADC-støy og kvantisering (1 LSB for ADS1115, 16 for ADS1015).
+#
+# Integrasjon:
+#  - Fast steg RK4 (PLANT_DT), uavhengig av hvor ofte advance() kalles.
+#    Rest-tid tas med til neste kall, så tiden "sklir" ikke.
+#  - Endestopp håndteres etter hvert RK4-steg (ikke glatt).
+#  - Skrevet med rene floats (ingen lister/NumPy per steg), slik at
+#    ett simulert sekund tar under 1 ms.
+#
+# Plant-kontrakt (samme som SimplePlant i hardware/emulator.py):
+#     set_pulse_us(us)   – servo-puls fra PCA9685
+#     advance(dt)        – simuler dt sekunder frem
+#     read_raw()         – ADC-råverdi for softpot
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Optional
+import math
+import random
+
+from V8_BALLTRACK.config import settings
+
+
+G = 9.81
+
+
+class BallBeamPlant:
+    """
+    Ball-og-bane med servo-dynamikk, endestopp og ADC-modell.
+
+    Parametre hentes fra settings (PLANT_*), men kan overstyres,
+    f.eks. for å teste robusthet mot en annen ball eller servo.
+    """
+
+    def __init__(
+        self,
+        pos: float = 0.5,
+        dt: float = settings.PLANT_DT,
+        beam_length_m: float = settings.PLANT_BEAM_LENGTH_M,
+        max_angle_deg: float = settings.PLANT_BEAM_MAX_ANGLE_DEG,
+        offset_deg: float = settings.PLANT_BEAM_OFFSET_DEG,
+        servo_tau_s: float = settings.PLANT_SERVO_TAU_S,
+        servo_slew_deg_s: float = settings.PLANT_SERVO_SLEW_DEG_S,
+        inertia_ratio: float = settings.PLANT_BALL_INERTIA,
+        damping: float = settings.PLANT_DAMPING,
+        restitution: float = settings.PLANT_END_RESTITUTION,
+        adc_noise_lsb: float = settings.PLANT_ADC_NOISE_LSB,
+        adc_lsb: int = settings.PLANT_ADC_LSB,
+        seed: Optional[int] = settings.PLANT_SEED,
+    ):
+        if dt <= 0.0:
+            raise ValueError(f"Ugyldig steglengde {dt}. Må være > 0")
+        if beam_length_m <= 0.0:
+            raise ValueError(f"Ugyldig banelengde {beam_length_m}. Må være > 0")
+        if servo_tau_s <= 0.0:
+            raise ValueError(f"Ugyldig servo-tau {servo_tau_s}. Må være > 0")
+
+        self.dt = float(dt)
+        self.length = float(beam_length_m)
+        self.max_angle = math.radians(max_angle_deg)
+        self.offset = math.radians(offset_deg)
+        self.tau = float(servo_tau_s)
+        self.slew = math.radians(servo_slew_deg_s)
+        self.inertia_ratio = float(inertia_ratio)
+        self.damping = float(damping)
+        self.restitution = float(restitution)
+        self.adc_noise_lsb = float(adc_noise_lsb)
+        self.adc_lsb = max(1, int(adc_lsb))
+
+        self._rng = random.Random(seed)
+
+        self.pulse_us = (settings.SERVO_MIN_US + settings.SERVO_MAX_US) / 2.0
+        self._theta_cmd = 0.0
+        self._servo_on = True
+
+        self.reset(pos)
+
+    # ---------------------------------------------------------
+    # Tilstand
+    # ---------------------------------------------------------
+    def reset(self, pos: float = 0.5, theta_deg: float = 0.0) -> None:
+        """Ballen i ro på `pos` (0..1), bane på `theta_deg`."""
+        self.p = (min(1.0, max(0.0, pos)) - 0.5) * self.length
+        self.v = 0.0
+        self.theta = math.radians(theta_deg)
+        self.t = 0.0
+        self._t_acc = 0.0
+
+    @property
+    def pos(self) -> float:
+        """Ballposisjon normalisert 0..1 (uten støy/kvantisering)."""
+        return self.p / self.length + 0.5
+
+    # ---------------------------------------------------------
+    # Plant-kontrakt
+    # ---------------------------------------------------------
+    def set_pulse_us(self, pulse_us: float) -> None:
+        self.pulse_us = pulse_us
+        if pulse_us <= 0.0:
+            # pulse 0 = servo av, banen holder vinkelen
+            self._servo_on = False
+            return
+
+        mid = (settings.SERVO_MIN_US + settings.SERVO_MAX_US) / 2.0
+        span = (settings.SERVO_MAX_US - settings.SERVO_MIN_US) / 2.0
+        u = (pulse_us - mid) / span if span > 0 else 0.0
+        u = max(-1.0, min(1.0, u))
+        self._theta_cmd = u * self.max_angle
+        self._servo_on = True
+
+    def advance(self, dt: float) -> None:
+        if dt <= 0.0:
+            return
+        self._t_acc += dt
+        n = int(self._t_acc / self.dt)
+        if n <= 0:
+            return
+        self._t_acc -= n * self.dt
+        self._integrate(n)
+
+    def read_raw(self) -> int:
+        raw_min = settings.SOFTPOT_RAW_MIN
+        raw_max = settings.SOFTPOT_RAW_MAX
+        value = raw_min + self.pos * (raw_max - raw_min)
+
+        if self.adc_noise_lsb > 0.0:
+            value += self._rng.gauss(0.0, self.adc_noise_lsb)
+
+        q = self.adc_lsb
+        raw = int(round(value / q)) * q
+        return max(0, min(settings.ADC_RESOLUTION, raw))
+
+    # ---------------------------------------------------------
+    # RK4 (fast steg)
+    # ---------------------------------------------------------
+    def _integrate(self, n: int) -> None:
+        h = self.dt
+        h2 = 0.5 * h
+        h6 = h / 6.0
+
+        # Lokale variabler: unngår attributtoppslag i den indre løkka
+        sin = math.sin
+        kb = G / (1.0 + self.inertia_ratio)
+        kc = 1.0 / (1.0 + self.inertia_ratio)
+        c = self.damping
+        off = self.offset
+        cmd = self._theta_cmd
+        inv_tau = 1.0 / self.tau
+        slew = self.slew if self._servo_on else 0.0
+        half = 0.5 * self.length
+        e = self.restitution
+
+        p, v, th = self.p, self.v, self.theta
+
+        for _ in range(n):
+            # Servo: theta' = (cmd - theta)/tau, begrenset til ±slew
+            w1 = (cmd - th) * inv_tau
+            w1 = slew if w1 > slew else (-slew if w1 < -slew else w1)
+            a1 = kb * sin(th + off) + kc * p * w1 * w1 - c * v
+
+            th2 = th + h2 * w1
+            p2 = p + h2 * v
+            v2 = v + h2 * a1
+            w2 = (cmd - th2) * inv_tau
+            w2 = slew if w2 > slew else (-slew if w2 < -slew else w2)
+            a2 = kb * sin(th2 + off) + kc * p2 * w2 * w2 - c * v2
+
+            th3 = th + h2 * w2
+            p3 = p + h2 * v2
+            v3 = v + h2 * a2
+            w3 = (cmd - th3) * inv_tau
+            w3 = slew if w3 > slew else (-slew if w3 < -slew else w3)
+            a3 = kb * sin(th3 + off) + kc * p3 * w3 * w3 - c * v3
+
+            th4 = th + h * w3
+            p4 = p + h * v3
+            v4 = v + h * a3
+            w4 = (cmd - th4) * inv_tau
+            w4 = slew if w4 > slew else (-slew if w4 < -slew else w4)
+            a4 = kb * sin(th4 + off) + kc * p4 * w4 * w4 - c * v4
+
+            p += h6 * (v + 2.0 * (v2 + v3) + v4)
+            v += h6 * (a1 + 2.0 * (a2 + a3) + a4)
+            th += h6 * (w1 + 2.0 * (w2 + w3) + w4)
+
+            # Endestopp
+            if p > half:
+                p = half
+                if v > 0.0:
+                    v = -e * v
+            elif p < -half:
+                p = -half
+                if v < 0.0:
+                    v = -e * v
+
+        self.p, self.v, self.theta = p, v, th
+        self.t += n * h
+
+
+# ---------------------------------------------------------
+# Valg av plant (settings.SIM_PLANT)
+# ---------------------------------------------------------
+def create_plant(kind: str = settings.SIM_PLANT, **kwargs):
+    """
+    "ballbeam": BallBeamPlant (kwargs → konstruktøren)
+    "simple":   SimplePlant fra hardware/emulator.py (pos += u·k·dt)
+    """
+    if kind == "ballbeam":
+        return BallBeamPlant(**kwargs)
+    if kind == "simple":
+        from V8_BALLTRACK.hardware.emulator import SimplePlant
+        return SimplePlant(**kwargs)
+    raise ValueError(f"Ukjent plant '{kind}'. Gyldig: 'ballbeam', 'simple'")
@@ -1,31 +1,73 @@
 # controller/position_controller.py
 
+from types import MappingProxyType
+import math
+import time
+
 from V8_BALLTRACK.config import settings
 from V8_BALLTRACK.controller.pid import PID, PIDConfig, PIDType
+from V8_BALLTRACK.controller.latency import CycleInstrumentation
+from V8_BALLTRACK.controller.autotune import RelayAutotuner, apply_gains
+
+
+# ---------------------------------------------------------
+# Skalering (brukes også av simulatoren, controller/sim.py)
+# ---------------------------------------------------------
+def default_pid_config() -> PIDConfig:
+    """PID-konfig med standardverdier fra settings."""
+    return PIDConfig(
+        pid_type=PIDType.PARALLEL,
+
+        Kp=settings.PID_KP,
+        Ki=settings.PID_KI,
+        Kd=settings.PID_KD,
+
+        K=settings.PID_K,
+        Ti=settings.PID_TI,
+        Td=settings.PID_TD,
+
+        umin=settings.PID_MIN,
+        umax=settings.PID_MAX,
+    )
+
+
+def raw_to_pos(raw) -> float:
+    """ADC-råverdi → posisjon 0..1 (softpot-kalibrering)."""
+    raw_min = settings.SOFTPOT_RAW_MIN
+    raw_max = settings.SOFTPOT_RAW_MAX
+
+    if raw_max <= raw_min:
+        pos = 0.0
+    else:
+        pos = (raw - raw_min) / (raw_max - raw_min)
 
+    return max(0.0, min(1.0, pos))
+
+
+def u_to_pulse(u: float):
+    """Pådrag u (-1..1) → (servo-puls µs som heltall, mettet?)."""
+    mid = (settings.SERVO_MIN_US + settings.SERVO_MAX_US) / 2.0
+    span = (settings.SERVO_MAX_US - settings.SERVO_MIN_US) / 2.0
+    pulse = mid + (u * span)
+
+    pulse = max(settings.SERVO_MIN_US, min(settings.SERVO_MAX_US, pulse))
+
+    # registrer metning (for logging / plotting)
+    saturated = (
+        pulse == settings.SERVO_MIN_US
+        or pulse == settings.SERVO_MAX_US
+    )
+
+    return int(round(pulse)), saturated
 
 
 class PositionControllerV8:
-    def __init__(self, adc, pwm):
+    def __init__(self, adc, pwm, instrument=settings.CONTROL_INSTRUMENT):
         self.adc = adc
         self.pwm = pwm
 
         # PID-konfig
-        cfg = PIDConfig(
-            pid_type=PIDType.PARALLEL,
-
-            Kp=settings.PID_KP,
-            Ki=settings.PID_KI,
-            Kd=settings.PID_KD,
-
-            K=settings.PID_K,
-            Ti=settings.PID_TI,
-            Td=settings.PID_TD,
-
-            umin=settings.PID_MIN,
-            umax=settings.PID_MAX,
-        )
-        self.pid = PID(cfg)
+        self.pid = PID(default_pid_config())
 
         self.setpoint = settings.DEFAULT_SETPOINT
 
@@ -38,9 +80,24 @@ class PositionControllerV8:
         self._enabled = False
         self._manual_mode = False
 
+        # Relé-autotuning: erstatter PID-utgangen mens den kjører
+        self._autotune = None
+        self.autotune_result = None
+        self._autotune_label = "idle"
+
         # GUI leser denne: "HW" eller "DUMMY"
         self.mode = "HW"
 
+        # Latency-måling per steg (None = av, koster da kun én if per steg)
+        self.instrumentation = None
+        self.enable_instrumentation(instrument)
+
+        # Status-snapshot publiseres én gang per kontrollsyklus.
+        # get_status() returnerer bare siste snapshot (ingen I2C-trafikk).
+        self.cycle = 0
+        self._status = MappingProxyType({})
+        self._publish_status()
+
     # ---------------------------------------------------------
     # Les posisjon fra ADC
     # ---------------------------------------------------------
@@ -48,15 +105,7 @@ class PositionControllerV8:
         raw = self.adc.read_raw(settings.ADC_CHANNEL)
         self.last_raw = raw
 
-        raw_min = settings.SOFTPOT_RAW_MIN
-        raw_max = settings.SOFTPOT_RAW_MAX
-
-        if raw_max <= raw_min:
-            pos = 0.0
-        else:
-            pos = (raw - raw_min) / (raw_max - raw_min)
-
-        pos = max(0.0, min(1.0, pos))
+        pos = raw_to_pos(raw)
         self.last_pos = pos
         return pos
 
@@ -64,34 +113,133 @@ class PositionControllerV8:
     # HOVED UPDATE LOOP
     # ---------------------------------------------------------
     def update(self, dt: float):
-        if not self._enabled:
-            return
-        if self._manual_mode:
-            return
+        inst = self.instrumentation
+        if inst is not None:
+            inst.begin()
 
+        # Posisjon leses hver syklus (også i STOP/MAN) slik at GUI alltid
+        # har ferske data – uten å lese ADC selv.
         pos = self.read_position()
+        if inst is not None:
+            inst.mark(inst.adc)
+
+        if self._enabled and not self._manual_mode:
+            if self._autotune is not None:
+                self._autotune_step(pos, dt, inst)
+            else:
+                self._control_step(pos, dt, inst)
+
+        if inst is not None:
+            inst.end()
+
+        self.cycle += 1
+        self._publish_status()
+
+    def _control_step(self, pos: float, dt: float, inst=None):
         e = self.setpoint - pos
 
         u = self.pid.update(e, dt)
         self.last_u = u
+        if inst is not None:
+            inst.mark(inst.pid)
 
+        self._actuate(u, inst)
+
+    def _actuate(self, u: float, inst=None):
         # u → puls
-        mid = (settings.SERVO_MIN_US + settings.SERVO_MAX_US) / 2.0
-        span = (settings.SERVO_MAX_US - settings.SERVO_MIN_US) / 2.0
-        pulse = mid + (u * span)
+        pulse, self.last_servo_saturated = u_to_pulse(u)
 
-        pulse = max(settings.SERVO_MIN_US, min(settings.SERVO_MAX_US, pulse))
-        
-        # registrer metning (for logging / plotting)
-        self.last_servo_saturated = (
-            pulse == settings.SERVO_MIN_US
-            or pulse == settings.SERVO_MAX_US
+        self.last_pulse_us = pulse
+        if inst is not None:
+            inst.mark(inst.map)
+
+        self.pwm.set_servo_us(settings.SERVO_CHANNEL, pulse)
+        if inst is not None:
+            inst.mark(inst.pwm)
+
+    # ---------------------------------------------------------
+    # Relé-autotuning
+    # ---------------------------------------------------------
+    def start_autotune(self, rule=None, terms=None, pid_type=None):
+        """
+        Starter relé-eksperiment rundt nåværende setpunkt. Reguleringen
+        startes (AUTO). Når eksperimentet er ferdig, skrives nye gains
+        inn i PID-konfigen for valgt PIDType.
+        """
+        if pid_type is not None:
+            self.set_pid_type(pid_type)
+
+        self._autotune = RelayAutotuner(
+            self.setpoint,
+            rule=rule or settings.AUTOTUNE_RULE,
+            terms=terms or settings.AUTOTUNE_TERMS,
+            pid_type=self.pid.cfg.pid_type,
         )
+        self._autotune_label = self._autotune.label()
+        # Resultat fra forrige kjøring gjelder ikke lenger
+        self.autotune_result = None
+        self._manual_mode = False
+        self._enabled = True
+        print(f"[PC] Autotune startet: regel={self._autotune.rule}, ledd={self._autotune.terms}, "
+              f"form={self.pid.cfg.pid_type.value}, sp={self.setpoint:.3f}")
 
-        pulse = int(round(pulse))
+    def cancel_autotune(self):
+        if self._autotune is None:
+            return
+        self._autotune = None
+        self._autotune_label = "cancelled"
+        self.pid.reset()
+        print("[PC] Autotune avbrutt")
 
-        self.last_pulse_us = pulse
-        self.pwm.set_servo_us(settings.SERVO_CHANNEL, pulse)
+    def get_autotune_status(self):
+        if self._autotune is not None:
+            return self._autotune.status()
+        return self.autotune_result or {"state": self._autotune_label}
+
+    def _autotune_step(self, pos: float, dt: float, inst=None):
+        tuner = self._autotune
+
+        u = tuner.update(pos, dt)
+        self.last_u = u
+        if inst is not None:
+            inst.mark(inst.pid)
+
+        self._actuate(u, inst)
+        self._autotune_label = tuner.label()
+
+        if tuner.done:
+            self._finish_autotune(tuner)
+
+    def _finish_autotune(self, tuner):
+        self._autotune = None
+        self.autotune_result = tuner.status()
+
+        if tuner.state == "done":
+            apply_gains(self.pid.cfg, *tuner.result["gains"])
+            print(f"[PC] Autotune ferdig: {tuner.message} → {tuner.result['form_gains']}")
+        else:
+            print(f"[PC] Autotune feilet: {tuner.message}")
+
+        # Nye gains: PID starter med tomt integral
+        self.pid.reset()
+
+    # ---------------------------------------------------------
+    # Latency-instrumentering
+    # ---------------------------------------------------------
+    def enable_instrumentation(self, flag: bool):
+        if flag and self.instrumentation is None:
+            self.instrumentation = CycleInstrumentation(
+                settings.CONTROL_TS,
+                window=settings.CONTROL_INSTRUMENT_WINDOW,
+            )
+        elif not flag:
+            self.instrumentation = None
+
+    def get_latency(self):
+        """p50/p99/maks (µs) per steg, eller {} hvis instrumentering er av."""
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.latest
 
     # ---------------------------------------------------------
     # API: start/stop
@@ -100,6 +248,7 @@ class PositionControllerV8:
         self._enabled = True
 
     def stop(self):
+        self.cancel_autotune()
         self._enabled = False
         self.servo_off()
 
@@ -130,16 +279,16 @@ class PositionControllerV8:
     # ---------------------------------------------------------
     # MANUELL SERVO
     # ---------------------------------------------------------
+    # Kalles fra kontrolltråden (CommandQueue) – ingen print i den tidsstyrte løkka
     def enable_manual_servo(self, flag):
-        print("[PC] enable_manual_servo:", flag)
+        if flag:
+            self.cancel_autotune()
         self._manual_mode = flag
         if flag:
             self._enabled = False
 
     def set_servo_manual(self, pos_norm):
-        print("[PC] set_servo_manual called. manual_mode=", self._manual_mode, "pos_norm=", pos_norm)
         if not self._manual_mode:
-            print("[PC] Ignored because manual_mode is False")
             return
 
         # robust clamp av input
@@ -165,15 +314,27 @@ class PositionControllerV8:
     # ---------------------------------------------------------
     # PID API (GUI forventer disse)
     # ---------------------------------------------------------
+    # GUI viser alltid Kp/Ki/Kd. For ideell/serieform er det de
+    # parallell-ekvivalente gainene (u = kp·e + ki·∫e + kd·de/dt),
+    # slik at feltene betyr det samme uansett aktiv form.
     def get_pid(self):
         cfg = self.pid.cfg
-        return cfg.Kp, cfg.Ki, cfg.Kd
+        if cfg.pid_type == PIDType.PARALLEL:
+            return cfg.Kp, cfg.Ki, cfg.Kd
+
+        gain = cfg.K if cfg.pid_type == PIDType.IDEAL else cfg.Kp
+        no_i = cfg.Ti <= 0.0 or cfg.Ti >= settings.PID_TI_DISABLED
+        return gain, 0.0 if no_i else gain / cfg.Ti, gain * cfg.Td
 
     def set_pid(self, kp, ki, kd):
         cfg = self.pid.cfg
-        cfg.Kp = kp
-        cfg.Ki = ki
-        cfg.Kd = kd
+        if cfg.pid_type == PIDType.PARALLEL or kp == 0.0:
+            cfg.Kp = kp
+            cfg.Ki = ki
+            cfg.Kd = kd
+        else:
+            # Ideell/serie: K = kp, Ti = kp/ki, Td = kd/kp (alle former oppdateres)
+            apply_gains(cfg, kp, kp / ki if ki else math.inf, kd / kp)
         self.pid.reset()
 
     def disable_integral(self, flag: bool):
@@ -217,24 +378,34 @@ class PositionControllerV8:
     # ---------------------------------------------------------
     # Status for GUI
     # ---------------------------------------------------------
-    def get_status(self):
-        # Oppdater alltid raw/pos for GUI (uten å kjøre servo)
-        try:
-            self.read_position()
-        except Exception:
-            pass
-
-        return {
+    def _publish_status(self):
+        """
+        Bygger et nytt, uforanderlig status-snapshot og bytter referansen.
+        Kalles fra kontrollsyklusen. Lesere (GUI/CLI) får alltid et
+        komplett snapshot fra én og samme syklus.
+        """
+        self._status = MappingProxyType({
+            "t": time.monotonic(),
+            "cycle": self.cycle,
             "raw": self.last_raw,
             "pos": self.last_pos,
             "setpoint": self.setpoint,
             "u": self.last_u,
             "pulse_us": self.last_pulse_us,
+            "saturated": self.last_servo_saturated,
             "P": self.pid.last_P,
             "I": self.pid.last_I,
             "D": self.pid.last_D,
+            "enabled": self._enabled,
+            "manual": self._manual_mode,
             "mode": self.mode,
-        }
+            "autotune": self._autotune_label,
+            "latency": self.instrumentation.latest if self.instrumentation is not None else {},
+        })
+
+    def get_status(self):
+        # O(1): siste snapshot fra kontrollsyklusen, ingen ADC-lesing her
+        return self._status
 
 
     def get_servo_position(self) -> float:
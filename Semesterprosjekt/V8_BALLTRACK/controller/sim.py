@@ -0,0 +1,178 @@
+# controller/sim.py
+# -----------------------------------------------------------
+# Hodeløs simulering – raskere enn sanntid
+# -----------------------------------------------------------
+# Formål:
+#  - Kjøre den ekte PID-en (controller/pid.py) mot en simulert plant
+#    (controller/plant.py) uten GUI og uten hardware.
+#  - Virtuell klokke: hver syklus er nøyaktig CONTROL_TS simulert tid,
+#    uavhengig av hvor lang tid beregningen tar. Ingen sleep per syklus.
+#  - speed = 0: så fort som mulig (10 min eksperiment på sekunder).
+#    speed = N: N × sanntid (venter kun når simuleringen ligger foran).
+#  - Skriptet setpunktprofil (trinn), f.eks. "0:0.5,10:0.3,20:0.7".
+#  - Trajektorien lagres i minnet og skrives til CSV til slutt.
+#
+# Samme syklus som PositionControllerV8.update():
+#     les ADC → raw_to_pos → PID → u_to_pulse → servo
+# Skaleringen er felles (position_controller.raw_to_pos / u_to_pulse).
+#
+# Bruk:
+#   python -m V8_BALLTRACK.main --sim --duration=600 --profile=0:0.5,10:0.3
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+import csv
+import os
+import time
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.controller.pid import PID
+from V8_BALLTRACK.controller.plant import create_plant
+from V8_BALLTRACK.controller.position_controller import default_pid_config, raw_to_pos, u_to_pulse
+
+
+# Kolonner i trajektorien (samme start som plott-samples: t, sp, pv, u, P, I, D)
+TRAJECTORY_COLUMNS = ("t", "setpoint", "pos", "u", "P", "I", "D", "pulse_us", "raw", "saturated")
+
+
+# ---------------------------------------------------------
+# Setpunktprofil
+# ---------------------------------------------------------
+class SetpointProfile:
+    """
+    Trinnvis setpunkt: (t, sp)-par, sortert på tid.
+    Før første tidspunkt brukes settings.DEFAULT_SETPOINT.
+    """
+
+    def __init__(self, steps: Sequence[Tuple[float, float]]):
+        steps = sorted((float(t), float(sp)) for t, sp in steps)
+        for t, sp in steps:
+            if not 0.0 <= sp <= 1.0:
+                raise ValueError(f"Ugyldig setpunkt {sp} ved t={t}. Må være 0..1")
+        self.times = [t for t, _ in steps]
+        self.values = [sp for _, sp in steps]
+
+    def at(self, t: float) -> float:
+        i = bisect_right(self.times, t)
+        return self.values[i - 1] if i > 0 else settings.DEFAULT_SETPOINT
+
+    @classmethod
+    def parse(cls, spec: str) -> "SetpointProfile":
+        """
+        "t:sp,t:sp,..."  eller sti til CSV-fil med kolonnene t,setpoint
+        (linjer som ikke er tall, f.eks. overskrift, hoppes over).
+        """
+        steps = []
+        if os.path.isfile(spec):
+            with open(spec, "r", encoding="utf-8", newline="") as f:
+                for row in csv.reader(f):
+                    try:
+                        steps.append((float(row[0]), float(row[1])))
+                    except (IndexError, ValueError):
+                        continue
+        else:
+            for part in spec.split(","):
+                part = part.strip()
+                if not part:
+                    continue
+                try:
+                    t, sp = part.split(":")
+                    steps.append((float(t), float(sp)))
+                except ValueError:
+                    raise ValueError(f"Ugyldig profil-ledd '{part}'. Forventet t:sp") from None
+
+        if not steps:
+            raise ValueError(f"Tom setpunktprofil: '{spec}'")
+        return cls(steps)
+
+
+# ---------------------------------------------------------
+# Resultat
+# ---------------------------------------------------------
+@dataclass
+class SimResult:
+    rows: List[tuple] = field(default_factory=list)
+    period_s: float = settings.CONTROL_TS
+    sim_s: float = 0.0
+    wall_s: float = 0.0
+
+    @property
+    def speedup(self) -> float:
+        return self.sim_s / self.wall_s if self.wall_s > 0 else float("inf")
+
+    def iae(self) -> float:
+        """Integral av |e| over hele kjøringen."""
+        return sum(abs(r[1] - r[2]) for r in self.rows) * self.period_s
+
+    def write_csv(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(TRAJECTORY_COLUMNS)
+            w.writerows(self.rows)
+
+
+# ---------------------------------------------------------
+# Simulering
+# ---------------------------------------------------------
+def run_sim(
+    duration_s: float,
+    profile: SetpointProfile,
+    plant=None,
+    pid: Optional[PID] = None,
+    period_s: float = settings.CONTROL_TS,
+    speed: float = 0.0,
+) -> SimResult:
+    """
+    Kjører `duration_s` simulert tid. Returnerer trajektorien.
+
+    plant: objekt med plant-kontrakten (default: create_plant())
+    pid:   PID-instans (default: standardverdier fra settings)
+    speed: 0 = så fort som mulig, ellers faktor mot sanntid
+    """
+    if period_s <= 0.0:
+        raise ValueError(f"Ugyldig periode {period_s}. Må være > 0")
+
+    if plant is None:
+        plant = create_plant()
+    if pid is None:
+        pid = PID(default_pid_config())
+
+    n = int(round(duration_s / period_s))
+    rows: List[tuple] = []
+    append = rows.append
+    sp_at = profile.at
+
+    # Pacing sjekkes ikke hver syklus (billig når speed = 0)
+    pace_every = max(1, int(0.01 * speed / period_s)) if speed > 0 else 0
+
+    wall0 = time.perf_counter()
+    for k in range(n):
+        t = k * period_s
+
+        raw = plant.read_raw()
+        pos = raw_to_pos(raw)
+        sp = sp_at(t)
+
+        u = pid.update(sp - pos, period_s)
+        pulse, saturated = u_to_pulse(u)
+        plant.set_pulse_us(pulse)
+
+        append((t, sp, pos, u, pid.last_P, pid.last_I, pid.last_D, pulse, raw, saturated))
+
+        plant.advance(period_s)
+
+        if pace_every and k % pace_every == 0:
+            ahead = t / speed - (time.perf_counter() - wall0)
+            if ahead > 0.0:
+                time.sleep(ahead)
+
+    return SimResult(
+        rows=rows,
+        period_s=period_s,
+        sim_s=n * period_s,
+        wall_s=time.perf_counter() - wall0,
+    )
@@ -1,19 +1,37 @@
 # app_screen.py
+import importlib
 import tkinter as tk
 import time
 
+from V8_BALLTRACK.config import settings
+
 from V8_BALLTRACK.gui.widgets.control.setpoint_widget import SetpointWidget
 from V8_BALLTRACK.gui.widgets.control.control_widget import ControlWidget
 from V8_BALLTRACK.gui.widgets.control.servo_widget import ServoWidget
 
 from V8_BALLTRACK.gui.widgets.pid.pid_widget import PIDWidget
 
-from V8_BALLTRACK.gui.widgets.monitoring.plot_widget import PlotWidget
 from V8_BALLTRACK.gui.widgets.monitoring.log_widget import LogWidget
 from V8_BALLTRACK.gui.widgets.monitoring.footer_widget import FooterWidget
 from V8_BALLTRACK.gui.widgets.monitoring.balltrack_visual_widget import BalltrackVisualWidget
 
 
+# Plott-backends (importeres først når de velges, slik at "tk"
+# slipper å laste matplotlib)
+PLOT_BACKENDS = {
+    "mpl": ("V8_BALLTRACK.gui.widgets.monitoring.plot_widget", "PlotWidget"),
+    "tk": ("V8_BALLTRACK.gui.widgets.monitoring.canvas_plot_widget", "CanvasPlotWidget"),
+}
+
+
+def load_plot_widget(backend=None):
+    backend = backend or settings.PLOT_BACKEND
+    if backend not in PLOT_BACKENDS:
+        print(f"[App] Ukjent plott-backend '{backend}', bruker 'mpl'")
+        backend = "mpl"
+    module, name = PLOT_BACKENDS[backend]
+    return getattr(importlib.import_module(module), name)
+
 
 class BalltrackApp:
     """
@@ -21,11 +39,13 @@ class BalltrackApp:
     - Plasserer faceplates/widgets
     - Binder dem mot tags (GuiTags) via bind()
     - Oppdaterer visning basert på tags.get_status()
+    - Selve reguleringen kjører i ControlRuntime (egen tråd), ikke her
     """
 
-    def __init__(self, root: tk.Tk, tags):
+    def __init__(self, root: tk.Tk, tags, plot_backend=None):
         self.root = root
         self.tags = tags
+        self.plot_backend = plot_backend
 
         self._last_t = time.monotonic()
 
@@ -91,7 +111,7 @@ class BalltrackApp:
         center = tk.Frame(mid)
         center.grid(row=0, column=1, sticky="nsew", padx=8, pady=6)
 
-        self.plot = PlotWidget(center)
+        self.plot = load_plot_widget(self.plot_backend)(center)
         self.plot.pack(fill="both", expand=True)
 
         # -------------------------------------------------
@@ -107,7 +127,9 @@ class BalltrackApp:
 
 
     def _ui_poll(self):
-        # NYTT: cyclic update av controller via tags
+        # Cyclic update av controller via tags.
+        # Når kontrolltråden (ControlRuntime) kjører, er dette en no-op i
+        # GuiTags, og GUI leser kun status.
         now = time.monotonic()
         dt = now - self._last_t
         self._last_t = now
@@ -118,21 +140,19 @@ class BalltrackApp:
         if hasattr(self.tags, "update"):
             self.tags.update(dt)
 
+        # Plot: henter samples selv (drain_samples) med egen frame-rate
+
+        # GuiTags: widgets abonnerer på sine tags – kun endringer sendes ut
+        if hasattr(self.tags, "dispatch"):
+            self.tags.dispatch()
+            self.root.after(50, self._ui_poll)  # 20 Hz GUI refresh
+            return
+
+        # Uten tag-database (f.eks. MockGuiTags): push hele status
         status = {}
         if hasattr(self.tags, "get_status"):
             status = self.tags.get_status() or {}
 
-        # Plot: gi den feltene den forventer
-        if hasattr(self.plot, "update_plot"):
-            self.plot.update_plot(
-                status.get("setpoint", 0.0),
-                status.get("pos", 0.0),
-                status.get("u", 0.0),
-                status.get("P", 0.0),
-                status.get("I", 0.0),
-                status.get("D", 0.0),
-            )
-
         # Footer: unpack dict
         if hasattr(self.footer, "update_status"):
             self.footer.update_status(
@@ -150,7 +170,7 @@ class BalltrackApp:
         self.root.after(50, self._ui_poll)  # 20 Hz GUI refresh
 
 
-def run_app(tags):
+def run_app(tags, plot_backend=None):
     root = tk.Tk()
-    BalltrackApp(root, tags)
+    BalltrackApp(root, tags, plot_backend)
     root.mainloop()
\ No newline at end of file
@@ -1,91 +1,329 @@
 # gui_tags.py
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.controller.command_queue import CommandQueue
+from V8_BALLTRACK.controller.control_runtime import status_to_sample
+from V8_BALLTRACK.controller.pid import PIDType
+
+
+# ---------------------------------------------------------
+# Tag-database
+# ---------------------------------------------------------
+@dataclass
+class Tag:
+    """
+    Én HMI-tag (som en tag i TIA/WinCC).
+
+    dtype:    float/int/bool/str – verdien konverteres ved oppdatering
+    deadband: (kun float) endring mindre enn dette regnes ikke som endring.
+              Sammenlignes mot sist *publiserte* verdi, så langsom drift
+              slår likevel ut etter hvert.
+    """
+    name: str
+    dtype: type = float
+    deadband: float = 0.0
+    value: Any = None
+
+    def update(self, raw) -> bool:
+        """Setter ny verdi. Returnerer True hvis den regnes som endret."""
+        try:
+            v = self.dtype(raw)
+        except (TypeError, ValueError):
+            return False
+
+        old = self.value
+        if old is None:
+            self.value = v
+            return True
+        if self.dtype is float:
+            if abs(v - old) <= self.deadband:
+                return False
+        elif v == old:
+            return False
+
+        self.value = v
+        return True
+
+
+# (tag, dtype, deadband) – tag-navn = nøkkel i controllerens status-snapshot
+TAG_TABLE: Tuple[Tuple[str, type, float], ...] = (
+    ("raw",       int,   0.0),
+    ("pos",       float, settings.GUI_TAG_DEADBAND),
+    ("setpoint",  float, settings.GUI_TAG_DEADBAND),
+    ("u",         float, settings.GUI_TAG_DEADBAND),
+    ("pulse_us",  int,   0.0),
+    ("saturated", bool,  0.0),
+    ("P",         float, settings.GUI_TAG_DEADBAND),
+    ("I",         float, settings.GUI_TAG_DEADBAND),
+    ("D",         float, settings.GUI_TAG_DEADBAND),
+    ("enabled",   bool,  0.0),
+    ("manual",    bool,  0.0),
+    ("mode",      str,   0.0),
+    ("autotune",  str,   0.0),
+)
+
+# Avledet tag: servo-posisjon 0..1 fra pulse_us (til ServoWidget)
+SERVO_POS_TAG = "servo_pos"
+
+
+@dataclass
+class _Subscription:
+    names: frozenset
+    callback: Callable[[Dict[str, Any]], None]
+    initial: bool = True    # få alle nåverdier ved første dispatch
+
+
+# Skrivinger som styrer aktuatoren direkte. Ligger de i køen når Stop
+# trykkes, forkastes de – ellers kan servoen kjøres etter Stop.
+# start_autotune slår på reléet (enabled=True) og hører også hjemme her.
+_ACTUATOR_CMDS = ("enable_manual_servo", "set_servo_manual", "start_autotune")
+
+# Controller-metoder GuiTags videresender (slås opp én gang ved oppstart)
+_FORWARDED = (
+    "start", "stop",
+    "get_setpoint", "set_setpoint",
+    "get_pid", "set_pid", "get_pid_type", "set_pid_type",
+    "disable_integral", "disable_derivative",
+    "enable_manual_servo", "set_servo_manual", "get_servo_position",
+    "get_status", "update", "enable_instrumentation",
+    "start_autotune", "cancel_autotune", "get_autotune_status",
+)
+
+
 class GuiTags:
     """
     PLC/TIA-tankegang:
     - Dette er HMI-tags/UDT-laget.
     - Eksponerer et stabilt 'tag-API' som widgets binder mot.
     - Videresender til ekte controller, men tåler manglende metoder.
+
+    Hvis en ControlRuntime er gitt, kjører reguleringen i egen tråd.
+    Da låses alle kall mot controlleren med runtime.lock, og update()
+    fra GUI blir en no-op.
+
+    Skrivinger (start/stop, setpoint, PID, manuell servo) går via en
+    CommandQueue: samme tag skrevet flere ganger før neste syklus slås
+    sammen til siste verdi, og utføres av kontrollsløyfa – ikke av
+    GUI-tråden. Start/stop er barrierer: det som er lagt inn før,
+    utføres før (Stop forkaster i tillegg ventende servo-skrivinger).
+
+    Tag-database (push i stedet for polling):
+    - Typede tags (TAG_TABLE) med endringsdeteksjon og deadband.
+    - Widgets abonnerer på de tagene de viser: subscribe(("pos",), cb)
+    - dispatch() kalles én gang per GUI-frame: leser siste snapshot,
+      og kaller hver callback maks én gang – kun med endrede tags.
     """
 
-    def __init__(self, controller):
+    def __init__(self, controller, runtime=None):
         self._c = controller
+        self._runtime = runtime
+        self._lock = runtime.lock if runtime is not None else nullcontext()
+
+        # Capability-oppslag gjøres én gang her, ikke hasattr per kall
+        self._fn = {name: getattr(controller, name, None) for name in _FORWARDED}
+
+        # Skrivekommandoer: runtime sin kø, ellers egen (tømmes i update())
+        self.commands = runtime.commands if runtime is not None else CommandQueue()
+
+        self.tags: Dict[str, Tag] = {
+            name: Tag(name, dtype, deadband) for name, dtype, deadband in TAG_TABLE
+        }
+        self.tags[SERVO_POS_TAG] = Tag(SERVO_POS_TAG, float, settings.GUI_TAG_DEADBAND)
+
+        self._subs: List[_Subscription] = []
+        self._last_snapshot = None
+        self._last_cycle = None     # drain_samples() uten kontrolltråd
+
+    def _call(self, name, *args, default=None):
+        fn = self._fn[name]
+        if fn is None:
+            return default
+        with self._lock:
+            return fn(*args)
+
+    def _submit(self, name, *args):
+        # Nøkkel = metodenavn → coalescing per tag
+        fn = self._fn[name]
+        if fn is None:
+            return False
+        return self.commands.put(name, fn, *args)
+
+    def _submit_barrier(self, name, *args, drop=()):
+        fn = self._fn[name]
+        if fn is None:
+            return False
+        return self.commands.put_barrier(name, fn, *args, drop=drop)
+
+    # -------------------------
+    # Abonnement
+    # -------------------------
+    def subscribe(self, names, callback):
+        """
+        callback(changes: dict tag -> verdi) kalles fra dispatch() når
+        minst én av `names` er endret. Første gang får den alle nåverdier.
+        Returnerer en funksjon som avslutter abonnementet.
+        """
+        unknown = [n for n in names if n not in self.tags]
+        if unknown:
+            raise KeyError(f"Ukjente tags: {unknown}. Gyldig: {sorted(self.tags)}")
+
+        sub = _Subscription(frozenset(names), callback)
+        self._subs.append(sub)
+
+        def unsubscribe():
+            if sub in self._subs:
+                self._subs.remove(sub)
+        return unsubscribe
+
+    def read(self, name):
+        """Siste publiserte verdi for en tag (None før første dispatch)."""
+        return self.tags[name].value
+
+    def dispatch(self):
+        """
+        Oppdaterer tags fra siste status-snapshot og varsler abonnenter.
+        Kalles én gang per GUI-frame. Returnerer settet med endrede tags.
+        """
+        status = self.get_status()
+        changed = set()
+
+        # Samme snapshot-objekt som sist -> ingenting nytt fra kontrollsyklusen
+        if status is not self._last_snapshot:
+            self._last_snapshot = status
+            for name, _, _ in TAG_TABLE:
+                if name in status and self.tags[name].update(status[name]):
+                    changed.add(name)
+
+            if "pulse_us" in changed:
+                span = settings.SERVO_MAX_US - settings.SERVO_MIN_US
+                pos = (self.tags["pulse_us"].value - settings.SERVO_MIN_US) / span if span > 0 else 0.5
+                if self.tags[SERVO_POS_TAG].update(max(0.0, min(1.0, pos))):
+                    changed.add(SERVO_POS_TAG)
+
+        for sub in list(self._subs):
+            if sub.initial:
+                sub.initial = False
+                names = [n for n in sub.names if self.tags[n].value is not None]
+            else:
+                names = sub.names.intersection(changed)
+            if names:
+                sub.callback({n: self.tags[n].value for n in names})
+
+        return changed
 
     # -------------------------
     # Control tags
     # -------------------------
     def start(self):
-        if hasattr(self._c, "start"):
-            return self._c.start()
+        return self._submit_barrier("start")
 
     def stop(self):
-        if hasattr(self._c, "stop"):
-            return self._c.stop()
+        # servo_off() er en I2C-skriving → kontrolltråden, som alt annet
+        return self._submit_barrier("stop", drop=_ACTUATOR_CMDS)
 
     # -------------------------
     # Setpoint tags
     # -------------------------
     def get_setpoint(self):
-        if hasattr(self._c, "get_setpoint"):
-            return self._c.get_setpoint()
-        return 0.0
+        return self._call("get_setpoint", default=0.0)
 
     def set_setpoint(self, sp):
-        if hasattr(self._c, "set_setpoint"):
-            return self._c.set_setpoint(sp)
+        return self._submit("set_setpoint", sp)
 
     # -------------------------
     # PID tags
     # -------------------------
     def get_pid(self):
-        if hasattr(self._c, "get_pid"):
-            return self._c.get_pid()
         # fallback
-        return (0.0, 0.0, 0.0)
+        return self._call("get_pid", default=(0.0, 0.0, 0.0))
 
     def set_pid(self, kp, ki, kd):
-        if hasattr(self._c, "set_pid"):
-            return self._c.set_pid(kp, ki, kd)
+        return self._submit("set_pid", kp, ki, kd)
+
+    def get_pid_type(self):
+        return self._call("get_pid_type", default=PIDType.PARALLEL)
+
+    def set_pid_type(self, pid_type):
+        # Før set_pid i samme syklus (køen utføres i rekkefølge)
+        return self._submit("set_pid_type", pid_type)
 
     def disable_integral(self, flag: bool):
-        if hasattr(self._c, "disable_integral"):
-            return self._c.disable_integral(flag)
+        return self._submit("disable_integral", flag)
 
     def disable_derivative(self, flag: bool):
-        if hasattr(self._c, "disable_derivative"):
-            return self._c.disable_derivative(flag)
+        return self._submit("disable_derivative", flag)
 
     # -------------------------
     # Servo/manual tags
     # -------------------------
     def enable_manual_servo(self, flag: bool):
-        print("[GuiTags] enable_manual_servo:", flag)
-        if hasattr(self._c, "enable_manual_servo"):
-            self._c.enable_manual_servo(flag)
-        else:
-            print("[GuiTags] underliggende controller mangler enable_manual_servo")
+        return self._submit("enable_manual_servo", flag)
 
     def set_servo_manual(self, pos_norm: float):
-        print("[GuiTags] set_servo_manual:", pos_norm)
-        if hasattr(self._c, "set_servo_manual"):
-            self._c.set_servo_manual(pos_norm)
-        else:
-            print("[GuiTags] underliggende controller mangler set_servo_manual")
+        # Slider-events coalesces: maks én I2C-skriving per kontrollsyklus
+        return self._submit("set_servo_manual", pos_norm)
 
     def get_servo_position(self):
-        if hasattr(self._c, "get_servo_position"):
-            return self._c.get_servo_position()
-        return 0.5
+        return self._call("get_servo_position", default=0.5)
+
+
+    # -------------------------
+    # Autotune tags
+    # -------------------------
+    def start_autotune(self, rule=None, terms=None, pid_type=None):
+        # Startes av kontrollsløyfa (kø), som alle andre skrivinger
+        return self._submit("start_autotune", rule, terms, pid_type)
+
+    def cancel_autotune(self):
+        return self._submit("cancel_autotune")
 
+    def get_autotune_status(self):
+        return self._call("get_autotune_status", default={})
 
     # -------------------------
     # Status (for skjerm/plot)
     # -------------------------
     def get_status(self):
-        if hasattr(self._c, "get_status"):
-            return self._c.get_status()
+        # Snapshot fra kontrollsyklusen – trenger ikke lås (O(1), ingen I2C)
+        fn = self._fn["get_status"]
+        if fn is not None:
+            return fn()
         return {}
-    
+
     def update(self, dt: float):
-        if hasattr(self._c, "update"):
-            return self._c.update(dt)
+        # Kontrolltråden eier reguleringen (og køen) når den kjører
+        if self._runtime is not None and self._runtime.is_running():
+            return
+        with self._lock:
+            self.commands.apply()
+        return self._call("update", dt)
+
+    def drain_samples(self):
+        """
+        Alle kontrollsamples siden forrige kall (t, sp, pv, u, P, I, D).
+        Uten kontrolltråd: kun siste snapshot (hvis nytt).
+        """
+        if self._runtime is not None:
+            return self._runtime.drain_samples()
+
+        s = self.get_status()
+        cycle = s.get("cycle")
+        if not s or (cycle is not None and cycle == self._last_cycle):
+            return []
+        self._last_cycle = cycle
+        return [status_to_sample(s)]
 
+    def get_latency(self):
+        # p50/p99/maks per steg i kontrollsyklusen (tom hvis av)
+        return self.get_status().get("latency", {})
+
+    def enable_instrumentation(self, flag: bool):
+        return self._call("enable_instrumentation", flag)
+
+    def get_runtime_stats(self):
+        if self._runtime is not None:
+            return self._runtime.get_stats()
+        return {}
@@ -97,6 +97,16 @@ class ServoWidget(ttk.LabelFrame, BaseWidget):
         # Initial status fra controller
         self._sync_from_controller()
 
+        # GuiTags: servo-posisjon pushes når den endres (AUTO-visning)
+        if hasattr(self.controller, "subscribe"):
+            self.controller.subscribe(("servo_pos",), self._on_tags)
+
+    def _on_tags(self, changes: dict):
+        # I manuell modus styrer operatøren slider/label
+        if self.var_manual.get():
+            return
+        self._show_position(changes["servo_pos"])
+
     # ---------------------------------------------------------
     # Periodisk refresh (kalles fra AppScreen)
     # ---------------------------------------------------------
@@ -123,6 +133,9 @@ class ServoWidget(ttk.LabelFrame, BaseWidget):
         except Exception:
             return
 
+        self._show_position(pos_norm)
+
+    def _show_position(self, pos_norm: float):
         pos_norm = max(0.0, min(1.0, pos_norm))
         pos_percent = pos_norm * 100.0
 
@@ -97,10 +97,16 @@ class BalltrackVisualWidget(ttk.LabelFrame, BaseWidget):
     def bind(self, controller):
         BaseWidget.bind(self, controller)
 
-        if hasattr(self.controller, "get_status"):
+        # GuiTags: få "pos" pushet kun når den endres
+        if hasattr(self.controller, "subscribe"):
+            self.controller.subscribe(("pos",), self._on_tags)
+        elif hasattr(self.controller, "get_status"):
             status = self.controller.get_status()
             self.update_status(status)
 
+    def _on_tags(self, changes: dict):
+        self.set_position(changes["pos"])
+
 
     def update_status(self, status: dict):
         pos = status.get("pos", None)
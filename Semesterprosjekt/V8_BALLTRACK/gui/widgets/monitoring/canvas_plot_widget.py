@@ -0,0 +1,190 @@
+"""
+canvas_plot_widget.py
+---------------------------------------
+Lett plott-widget for Pi-LCD: tegner rett på en tk.Canvas.
+
+Formål:
+    Samme 6 kurver (SP, PV, u_tot, u_P, u_I, u_D) og samme kontroller
+    som PlotWidget, men uten matplotlib/TkAgg. Gir kortere oppstart,
+    mindre minne og lavere CPU på Raspberry Pi.
+
+Tegning:
+    - Én canvas-linje (polyline) per kurve, opprettet én gang.
+      Hver frame oppdateres kun koordinatene (canvas.coords).
+    - Rutenett, akse-tall og legend (tag "overlay") tegnes bare på nytt
+      ved resize, nytt tidsvindu, nye y-grenser eller kurvevalg.
+    - Buffer, desimering (≈ én bøtte per piksel) og autoscale deles
+      med PlotWidget via PlotBase.
+
+Velges ved oppstart:
+    settings.PLOT_BACKEND = "tk"   eller   python -m V8_BALLTRACK.main --plot=tk
+"""
+
+import math
+import tkinter as tk
+
+import numpy as np
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.gui.widgets.monitoring.plot_base import PLOT_CURVES, PlotBase
+from V8_BALLTRACK.gui.widgets.registry import register_widget
+
+
+def _nice_step(span, max_ticks=5):
+    """Tick-avstand 1/2/5 · 10^k slik at det blir maks `max_ticks` ticks."""
+    if span <= 0:
+        return 1.0
+    raw = span / max_ticks
+    mag = 10.0 ** math.floor(math.log10(raw))
+    for m in (1.0, 2.0, 5.0, 10.0):
+        if raw <= m * mag:
+            return m * mag
+    return 10.0 * mag
+
+
+@register_widget("plot_tk", "Preview – CanvasPlotWidget")
+class CanvasPlotWidget(PlotBase):
+    FPS = settings.PLOT_TK_FPS
+
+    # Marger rundt plottområdet (piksler): plass til akse-tall
+    MARGIN_L = 44
+    MARGIN_R = 8
+    MARGIN_T = 8
+    MARGIN_B = 20
+
+    GRID_COLOR = "#e0e0e0"
+    TEXT_COLOR = "#555555"
+    FONT = ("TkDefaultFont", 8)
+
+    def __init__(self, parent):
+        self._ylim = (0.0, 1.0)
+        PlotBase.__init__(self, parent)
+
+    # ---------------------------------------------------------
+    # PLOTTING – TK CANVAS
+    # ---------------------------------------------------------
+    def _build_plot(self):
+        self.canvas = tk.Canvas(self, height=260, bg="white", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True, padx=5, pady=5)
+
+        self._set_geometry(self.canvas.winfo_width(), self.canvas.winfo_height())
+
+        # Én polyline per kurve (tegnes over overlay)
+        self._items = {}
+        for field, _, color, _ in PLOT_CURVES:
+            self._items[field] = self.canvas.create_line(
+                0, 0, 0, 0, fill=color, width=1, tags=("curve",)
+            )
+
+        self.canvas.bind("<Configure>", self._on_resize)
+        self._draw_overlay()
+
+    def _set_geometry(self, width, height):
+        self._w = max(2 * (self.MARGIN_L + self.MARGIN_R), int(width))
+        self._h = max(2 * (self.MARGIN_T + self.MARGIN_B), int(height))
+        self._x0 = self.MARGIN_L
+        self._x1 = self._w - self.MARGIN_R
+        self._y0 = self.MARGIN_T
+        self._y1 = self._h - self.MARGIN_B
+        self._resize_decimator(self._x1 - self._x0)
+
+    def _on_resize(self, event):
+        self._set_geometry(event.width, event.height)
+        self._draw_overlay()
+        self.render_frame()
+
+    # ---------------------------------------------------------
+    # OVERLAY (rutenett, ticks, legend)
+    # ---------------------------------------------------------
+    def _draw_overlay(self):
+        c = self.canvas
+        c.delete("overlay")
+        tags = ("overlay",)
+        x0, x1, y0, y1 = self._x0, self._x1, self._y0, self._y1
+        lo, hi = self._ylim
+
+        # y-ticks + horisontale gridlinjer
+        step = _nice_step(hi - lo)
+        v = math.ceil(lo / step) * step
+        while v <= hi + 1e-9 * step:
+            y = self._y_px(v)
+            c.create_line(x0, y, x1, y, fill=self.GRID_COLOR, tags=tags)
+            c.create_text(x0 - 4, y, text=f"{v:g}", anchor="e",
+                          fill=self.TEXT_COLOR, font=self.FONT, tags=tags)
+            v += step
+
+        # x-ticks (sekunder fra venstre kant av vinduet)
+        step = _nice_step(self.time_window, max_ticks=6)
+        v = 0.0
+        while v <= self.time_window + 1e-9:
+            x = x0 + v * (x1 - x0) / self.time_window
+            c.create_line(x, y0, x, y1, fill=self.GRID_COLOR, tags=tags)
+            c.create_text(x, y1 + 3, text=f"{v:g}", anchor="n",
+                          fill=self.TEXT_COLOR, font=self.FONT, tags=tags)
+            v += step
+
+        c.create_rectangle(x0, y0, x1, y1, outline="#999999", tags=tags)
+
+        # Legend: kun synlige kurver, øverst til høyre
+        x = x1 - 4
+        for field, label, color, _ in reversed(PLOT_CURVES):
+            if field not in self._visible_fields:
+                continue
+            c.create_text(x, y0 + 3, text=label, anchor="ne",
+                          fill=color, font=self.FONT, tags=tags)
+            x -= 7 * len(label) + 8
+
+        c.tag_raise("curve")
+
+    def _y_px(self, v):
+        lo, hi = self._ylim
+        return self._y1 - (v - lo) * (self._y1 - self._y0) / (hi - lo)
+
+    # ---------------------------------------------------------
+    # VIS / SKJUL KURVER
+    # ---------------------------------------------------------
+    def _on_visibility_changed(self):
+        for field, item in self._items.items():
+            state = "normal" if field in self._visible_fields else "hidden"
+            self.canvas.itemconfigure(item, state=state)
+        self._draw_overlay()
+
+    # ---------------------------------------------------------
+    # TEGN
+    # ---------------------------------------------------------
+    def render_frame(self):
+        self._dirty = False
+
+        data, t_min = self._window_data()
+        if data is None or len(data) < 2:
+            return
+
+        if self.var_autoscale.get():
+            ylim = self._autoscale_limits(t_min, self._ylim)
+            if ylim is not None:
+                self._ylim = ylim
+                self._draw_overlay()
+
+        # Data -> piksler (vektorisert), x = t - t0 som i PlotWidget
+        t = data["t"]
+        sx = (self._x1 - self._x0) / self.time_window
+        lo, hi = self._ylim
+        sy = (self._y1 - self._y0) / (hi - lo)
+
+        pts = np.empty(2 * len(t))
+        pts[0::2] = (t - t[0]) * sx + self._x0
+        coords = self.canvas.coords
+        for field in self._visible_fields:
+            pts[1::2] = self._y1 - (data[field] - lo) * sy
+            # Heltall: raskere Tcl-konvertering, klipp for å unngå enorme verdier
+            coords(self._items[field], np.clip(pts, -10000, 10000).astype(np.int32).tolist())
+
+    # ---------------------------------------------------------
+    def _on_window_changed(self):
+        self._resize_decimator(self._x1 - self._x0, force=True)
+        self._draw_overlay()
+        self.render_frame()
+
+    def _on_clear(self):
+        for item in self._items.values():
+            self.canvas.coords(item, 0, 0, 0, 0)
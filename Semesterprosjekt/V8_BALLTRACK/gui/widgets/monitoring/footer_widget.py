@@ -103,8 +103,24 @@ class FooterWidget(ttk.Frame, BaseWidget):
                 lbl_val.config(text=str(value))
 
     # ---------------------------------------------------------
+    # tag i GuiTags -> felt i footer
+    TAG_FIELDS = {
+        "raw": "raw",
+        "pos": "pos",
+        "setpoint": "sp",
+        "u": "u",
+        "pulse_us": "servo_us",
+        "mode": "mode",
+    }
+
     def bind(self, controller):
-        """Forberedt for senere bruk hvis footer skal hente noe direkte fra controller."""
+        """Abonnerer på tagene som vises (GuiTags). Kun endrede felter oppdateres."""
         BaseWidget.bind(self, controller)
 
+        if hasattr(self.controller, "subscribe"):
+            self.controller.subscribe(tuple(self.TAG_FIELDS), self._on_tags)
+
+    def _on_tags(self, changes: dict):
+        self.update_status(**{self.TAG_FIELDS[tag]: value for tag, value in changes.items()})
+
 
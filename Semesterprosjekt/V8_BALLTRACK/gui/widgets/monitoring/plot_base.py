@@ -0,0 +1,292 @@
+"""
+plot_base.py
+---------------------------------------
+Felles grunnlag for plott-widgetene (uten matplotlib).
+
+Formål:
+    Samle det som er likt for alle plott-backends:
+      - kontroller (tidsvindu, autoscale, clear, kurvevalg)
+      - ringbuffer + min/maks-desimering + løpende min/maks
+      - egen render-timer som henter samples i batch (drain_samples)
+
+    Selve tegningen gjøres av subklassene:
+      - PlotWidget       (matplotlib/TkAgg, plot_widget.py)
+      - CanvasPlotWidget (ren tk.Canvas, canvas_plot_widget.py)
+
+Subklasser implementerer (abstrakte, påkrevd):
+    _build_plot()             – lag tegneflate og kurver
+    render_frame()            – tegn siste data
+Valgfrie kroker (tomme som standard):
+    _on_visibility_changed()  – kurver vist/skjult
+    _on_window_changed()      – nytt tidsvindu
+    _on_clear()               – data tømt
+"""
+
+from abc import ABCMeta, abstractmethod
+import tkinter as tk
+from tkinter import ttk
+import time
+
+import numpy as np
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.gui.widgets.base_widget import BaseWidget
+from V8_BALLTRACK.gui.widgets.monitoring.plot_buffer import (
+    PLOT_DTYPE, MinMaxDecimator, SampleRingBuffer, WindowExtrema,
+)
+
+
+# (felt i bufferet, navn i legend/checkbox, farge, synlig fra start)
+PLOT_CURVES = (
+    ("sp",    "Setpoint", "#D32F2F", True),
+    ("pv",    "PV",       "#1976D2", True),
+    ("u_tot", "u_tot",    "#FFC107", True),
+    ("u_p",   "u_P",      "#388E3C", False),
+    ("u_i",   "u_I",      "#FF9800", False),
+    ("u_d",   "u_D",      "#9C27B0", False),
+)
+
+
+class PlotBase(ttk.LabelFrame, BaseWidget, metaclass=ABCMeta):
+    # Frame-rate for render-timeren (subklasser kan overstyre)
+    FPS = settings.PLOT_FPS
+
+    def __init__(self, parent):
+        ttk.LabelFrame.__init__(self, parent, text="Plot")
+        BaseWidget.__init__(self)
+
+        # Dataserier: én strukturert ringbuffer (t + 6 signaler).
+        # Kapasitet dekker største tidsvindu ved høyeste samplerate.
+        self.buffer = SampleRingBuffer(
+            int(settings.PLOT_MAX_WINDOW_S * settings.PLOT_MAX_SAMPLE_HZ * 1.1)
+        )
+
+        self.time_window = 10.0
+
+        # Min/maks-desimering: antall bøtter = plottbredde i piksler
+        self.use_decimation = settings.PLOT_DECIMATE
+        self.decimator = MinMaxDecimator(self.buffer, self.time_window, 800)
+
+        # Løpende min/maks per synlig felt (autoscale)
+        self._extrema = {}
+        self._visible_fields = ()
+
+        # Egen render-timer (startes i bind())
+        self.frame_ms = max(1, int(1000 / self.FPS))
+        self._frame_job = None
+        self._dirty = False
+
+        self._build_ui()
+        self._build_plot()
+
+        # Skjul u_P/u_I/u_D osv. i henhold til checkboxene fra start
+        self._update_curve_visibility()
+
+    # ---------------------------------------------------------
+    # UI-KOMPONENTER
+    # ---------------------------------------------------------
+    def _build_ui(self):
+        frame_top = ttk.Frame(self)
+        frame_top.pack(fill="x", padx=5, pady=5)
+
+        ttk.Label(frame_top, text="Tidsvindu (sek):").pack(side="left")
+        self.cmb_window = ttk.Combobox(
+            frame_top, values=["5", "10", "20", "30", "60"],
+            width=5, state="readonly"
+        )
+        self.cmb_window.set("10")
+        self.cmb_window.pack(side="left", padx=5)
+        self.cmb_window.bind("<<ComboboxSelected>>", self._window_changed)
+
+        self.var_autoscale = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame_top, text="Autoscale",
+                        variable=self.var_autoscale).pack(side="left", padx=10)
+
+        ttk.Button(frame_top, text="Clear", command=self._clear).pack(side="right")
+
+        # ---------------------------
+        # Kurvevalg (checkboxes)
+        # ---------------------------
+        self.frame_curve = ttk.Frame(self)
+        self.frame_curve.pack(fill="x", padx=5, pady=3)
+
+        self._show = {}
+        for field, label, _, visible in PLOT_CURVES:
+            var = tk.BooleanVar(value=visible)
+            self._show[field] = var
+            ttk.Checkbutton(self.frame_curve, text=label, variable=var,
+                            command=self._update_curve_visibility).pack(side="left")
+
+        # Navn som før (var_show_sp, var_show_u_p, ...)
+        self.var_show_sp = self._show["sp"]
+        self.var_show_pv = self._show["pv"]
+        self.var_show_u_tot = self._show["u_tot"]
+        self.var_show_u_p = self._show["u_p"]
+        self.var_show_u_i = self._show["u_i"]
+        self.var_show_u_d = self._show["u_d"]
+
+    # ---------------------------------------------------------
+    # VIS / SKJUL KURVER
+    # ---------------------------------------------------------
+    def _update_curve_visibility(self):
+        fields = tuple(f for f, *_ in PLOT_CURVES if self._show[f].get())
+        self._visible_fields = fields
+
+        # Nye synlige felt: bygg min/maks fra bufferet. Skjulte: glem.
+        t_last = self.buffer.last_time()
+        extrema = {}
+        for f in fields:
+            ext = self._extrema.get(f)
+            if ext is None:
+                ext = WindowExtrema()
+                if t_last is not None:
+                    ext.seed(self.buffer.view(t_min=t_last - self.time_window), f)
+            extrema[f] = ext
+        self._extrema = extrema
+
+        self.decimator.set_fields(fields)
+
+        self._on_visibility_changed()
+        self.render_frame()
+
+    # ---------------------------------------------------------
+    # BIND + RENDER-TIMER
+    # ---------------------------------------------------------
+    def bind(self, controller):
+        BaseWidget.bind(self, controller)
+        if self._frame_job is None:
+            self._frame_job = self.after(self.frame_ms, self._frame_tick)
+
+    def _frame_tick(self):
+        c = self.controller
+        if c is not None and hasattr(c, "drain_samples"):
+            samples = c.drain_samples()
+            if samples:
+                self.ingest(samples)
+
+        if self._dirty:
+            self.render_frame()
+
+        self._frame_job = self.after(self.frame_ms, self._frame_tick)
+
+    # ---------------------------------------------------------
+    # OPPDATER DATA
+    # ---------------------------------------------------------
+    def ingest(self, samples):
+        """
+        Legger en batch samples inn i bufferet (tegner ikke).
+        samples: iterable av (t, sp, pv, u_tot, u_p, u_i, u_d)
+        """
+        batch = np.array(samples, dtype=PLOT_DTYPE)
+        if not len(batch):
+            return
+        self.buffer.extend(batch)
+
+        t = float(batch["t"][-1])
+        for field, ext in self._extrema.items():
+            y = batch[field]
+            ext.push(t, float(y.min()), float(y.max()))
+        self._dirty = True
+
+    def update_plot(self, sp, pv, u_tot, u_p, u_i, u_d):
+        """Ett sample med tidsstempel nå + tegning (enkeltvis bruk/preview)."""
+        self.ingest([(time.monotonic(), sp, pv, u_tot, u_p, u_i, u_d)])
+        self.render_frame()
+
+    def _window_data(self):
+        """
+        Data som skal tegnes: (data, t_min), eller (None, None) hvis tomt.
+        Rådata (view) eller min/maks-desimert når det er flere samples enn piksler.
+        """
+        t_last = self.buffer.last_time()
+        if t_last is None:
+            return None, None
+
+        # Kun samples innenfor tidsvinduet (view, ingen kopi)
+        t_min = t_last - self.time_window
+        data = self.buffer.view(t_min=t_min)
+
+        # Flere samples enn piksler -> min/maks per pikselbøtte
+        if self.use_decimation and len(data) > 2 * self.decimator.n_buckets:
+            data = self.decimator.view(t_min)
+        return data, t_min
+
+    # ---------------------------------------------------------
+    # AUTOSCALE
+    # ---------------------------------------------------------
+    def _autoscale_limits(self, t_min, ylim):
+        """
+        Nye y-grenser (lo, hi) hvis gjeldende `ylim` bør endres, ellers None.
+
+        Hysterese: behold grensene så lenge data er innenfor og
+        området ikke er blitt mye større enn nødvendig.
+        """
+        lo = hi = None
+        for ext in self._extrema.values():
+            ext.expire(t_min)
+            b = ext.bounds()
+            if b is None:
+                continue
+            lo = b[0] if lo is None else min(lo, b[0])
+            hi = b[1] if hi is None else max(hi, b[1])
+        if lo is None:
+            return None
+
+        # Konstant signal -> gi litt høyde (som matplotlib sin nonsingular)
+        if hi - lo < 1e-12:
+            pad = 0.1 * abs(lo) if lo else 0.1
+            lo, hi = lo - pad, hi + pad
+        span = hi - lo
+
+        y0, y1 = ylim
+        if y0 <= lo and hi <= y1 and (y1 - y0) <= settings.PLOT_AUTOSCALE_SHRINK * span:
+            return None
+
+        margin = settings.PLOT_AUTOSCALE_MARGIN * span
+        return lo - margin, hi + margin
+
+    # ---------------------------------------------------------
+    def _resize_decimator(self, width_px, force=False):
+        n = max(50, int(width_px))
+        if force or n != self.decimator.n_buckets:
+            self.decimator.configure(self.time_window, n)
+
+    def _reseed_extrema(self):
+        t_last = self.buffer.last_time()
+        if t_last is None:
+            return
+        window = self.buffer.view(t_min=t_last - self.time_window)
+        for field, ext in self._extrema.items():
+            ext.seed(window, field)
+
+    def _window_changed(self, event=None):
+        self.time_window = float(self.cmb_window.get())
+        self._reseed_extrema()
+        self._on_window_changed()
+
+    def _clear(self):
+        self.buffer.clear()
+        self.decimator.reset()
+        for ext in self._extrema.values():
+            ext.clear()
+        self._on_clear()
+
+    # ---------------------------------------------------------
+    # Implementeres av backend
+    # ---------------------------------------------------------
+    @abstractmethod
+    def _build_plot(self):
+        """Lag tegneflate og kurver (kalles fra __init__)."""
+
+    @abstractmethod
+    def render_frame(self):
+        """Tegn siste data (kalles av render-timeren)."""
+
+    def _on_visibility_changed(self):
+        pass
+
+    def _on_window_changed(self):
+        pass
+
+    def _on_clear(self):
+        pass
@@ -0,0 +1,259 @@
+"""
+plot_buffer.py
+---------------------------------------
+Ringbuffer for plott-data (NumPy).
+
+Formål:
+    Lagre tid + 6 signaler (SP, PV, u_tot, u_P, u_I, u_D) i ett
+    forhåndsallokert, strukturert NumPy-array med fast kapasitet.
+
+    - append(): O(1) per sample (ingen list.pop(0))
+    - view():   de siste samplene som ÉN sammenhengende array-view
+                (ingen kopiering) – kan gis rett til Line2D.set_data()
+
+Triks:
+    Hvert sample skrives to steder (i og i + kapasitet). Da ligger de
+    siste N samplene alltid sammenhengende i minnet, uansett hvor i
+    ringen vi er.
+
+WindowExtrema:
+    Løpende min/maks over tidsvinduet (monotone køer), oppdatert per
+    innkommende batch. Brukes til autoscale uten relim().
+
+MinMaxDecimator:
+    Min/maks per tidsbøtte (≈ én bøtte per piksel i bredden). Gir
+    maks 2 punkter per bøtte og kurve, så tegnekostnaden følger
+    widget-bredden og ikke tidsvinduets lengde. Spikes og metning
+    bevares (både min og maks i bøtta tegnes).
+
+Brukes av:
+    PlotWidget (gui/widgets/monitoring/plot_widget.py)
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+# Feltnavn i bufferet (t = tid i sekunder, time.monotonic())
+PLOT_FIELDS = ("t", "sp", "pv", "u_tot", "u_p", "u_i", "u_d")
+PLOT_DTYPE = np.dtype([(name, np.float64) for name in PLOT_FIELDS])
+
+
+class SampleRingBuffer:
+    """
+    Fast-kapasitets ringbuffer med strukturert dtype (PLOT_DTYPE).
+
+    Metoder:
+        append(t, sp, pv, u_tot, u_p, u_i, u_d)
+        view(t_min=None) -> strukturert array-view (eldste først)
+        clear()
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=PLOT_DTYPE)
+        self._head = 0      # neste skriveposisjon (0..capacity-1)
+        self._count = 0     # antall gyldige samples (<= capacity)
+
+    def __len__(self):
+        return self._count
+
+    # ---------------------------------------------------------
+    def append(self, t, sp, pv, u_tot, u_p, u_i, u_d):
+        rec = (t, sp, pv, u_tot, u_p, u_i, u_d)
+        h = self._head
+        self._data[h] = rec
+        self._data[h + self.capacity] = rec
+
+        h += 1
+        self._head = 0 if h == self.capacity else h
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, records):
+        """Legger inn mange samples (strukturert array med PLOT_DTYPE)."""
+        n = len(records)
+        if n == 0:
+            return
+        if n > self.capacity:
+            records = records[-self.capacity:]
+            n = self.capacity
+
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._data[idx] = records
+        self._data[idx + self.capacity] = records
+
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self.capacity, self._count + n)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    # ---------------------------------------------------------
+    def view(self, t_min=None):
+        """
+        Returnerer de siste samplene (eldste først) som en view.
+        t_min: ta kun med samples med t >= t_min (binærsøk, O(log n)).
+        """
+        end = self._head + self.capacity
+        data = self._data[end - self._count:end]
+
+        if t_min is not None and self._count:
+            start = int(np.searchsorted(data["t"], t_min, side="left"))
+            data = data[start:]
+        return data
+
+    def last_time(self):
+        if not self._count:
+            return None
+        return float(self._data[self._head + self.capacity - 1]["t"])
+
+
+class WindowExtrema:
+    """
+    Min/maks for ett signal over et glidende tidsvindu.
+
+    Hver batch legges inn som (t_siste, min, maks). To monotone køer
+    gjør at push/expire er O(1) amortisert, og bounds() er O(1).
+    En batch forsvinner når dens siste sample er ute av vinduet
+    (litt konservativt, men aldri for smalt).
+    """
+
+    def __init__(self):
+        self._lo = deque()      # (t, verdi), stigende verdier
+        self._hi = deque()      # (t, verdi), synkende verdier
+
+    def clear(self):
+        self._lo.clear()
+        self._hi.clear()
+
+    def push(self, t, lo, hi):
+        q = self._lo
+        while q and q[-1][1] >= lo:
+            q.pop()
+        q.append((t, lo))
+
+        q = self._hi
+        while q and q[-1][1] <= hi:
+            q.pop()
+        q.append((t, hi))
+
+    def expire(self, t_min):
+        for q in (self._lo, self._hi):
+            while q and q[0][0] < t_min:
+                q.popleft()
+
+    def bounds(self):
+        """(min, maks) eller None hvis tomt."""
+        if not self._lo:
+            return None
+        return self._lo[0][1], self._hi[0][1]
+
+    def seed(self, data, field, chunks=32):
+        """Bygger opp på nytt fra bufferdata (brukes når en kurve vises igjen)."""
+        self.clear()
+        n = len(data)
+        if n == 0:
+            return
+        starts = np.linspace(0, n, min(n, chunks), endpoint=False).astype(np.intp)
+        ends = np.r_[starts[1:], n] - 1
+        y = data[field]
+        lo = np.minimum.reduceat(y, starts)
+        hi = np.maximum.reduceat(y, starts)
+        t = data["t"][ends]
+        for i in range(len(starts)):
+            self.push(float(t[i]), float(lo[i]), float(hi[i]))
+
+
+class MinMaxDecimator:
+    """
+    Inkrementell min/maks-desimering av en SampleRingBuffer.
+
+    Tidsaksen deles i faste bøtter (bucket_dt = vindu / n_buckets),
+    låst til absolutt tid. Ferdige bøtter regnes ut én gang og legges
+    i en egen ringbuffer; kun den åpne (siste) bøtta regnes på nytt
+    hver frame.
+
+    Hver bøtte gir to punkter per felt: (min, maks) eller (maks, min),
+    i den rekkefølgen signalet går (stigende/fallende i bøtta).
+    """
+
+    def __init__(self, source: SampleRingBuffer, window_s: float = 10.0, n_buckets: int = 800):
+        self.source = source
+        self._values = PLOT_FIELDS[1:]
+        self.configure(window_s, n_buckets)
+
+    def configure(self, window_s: float, n_buckets: int):
+        self.window_s = float(window_s)
+        self.n_buckets = max(1, int(n_buckets))
+        self.bucket_dt = self.window_s / self.n_buckets
+
+        # Ferdige bøtter: 2 rader per bøtte (+ litt slakk)
+        self._out = SampleRingBuffer(2 * (self.n_buckets + 2))
+        self._open = np.zeros(0, dtype=PLOT_DTYPE)
+        self._next_bucket = None    # første bøtte som ikke er ferdig
+
+    def set_fields(self, fields):
+        """Begrens til feltene som faktisk vises (skjulte kurver koster ingenting)."""
+        fields = tuple(fields)
+        if fields != self._values:
+            self._values = fields
+            self.reset()
+
+    def reset(self):
+        self._out.clear()
+        self._open = np.zeros(0, dtype=PLOT_DTYPE)
+        self._next_bucket = None
+
+    # ---------------------------------------------------------
+    def _update(self, t_min):
+        dt = self.bucket_dt
+        first = int(np.floor(t_min / dt))
+        if self._next_bucket is None or self._next_bucket < first:
+            # Start / etter pause: ferdige bøtter utenfor vinduet er uansett borte
+            if self._next_bucket is None:
+                self._out.clear()
+            self._next_bucket = first
+
+        # Én bøtte slakk i tidssøket; selve bøtte-indeksen avgjør
+        # (unngår avrundingsfeil mellom k*dt og floor(t/dt))
+        data = self.source.view(t_min=(self._next_bucket - 1) * dt)
+        idx = np.floor(data["t"] / dt).astype(np.int64)
+        k = int(np.searchsorted(idx, self._next_bucket, side="left"))
+        data = data[k:]
+        idx = idx[k:]
+        if not len(data):
+            self._open = np.zeros(0, dtype=PLOT_DTYPE)
+            return
+
+        t = data["t"]
+        starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+        ends = np.r_[starts[1:], len(t)] - 1
+
+        rows = np.zeros(2 * len(starts), dtype=PLOT_DTYPE)
+        t0 = idx[starts] * dt
+        rows["t"][0::2] = t0
+        rows["t"][1::2] = t0 + 0.5 * dt
+
+        for name in self._values:
+            y = data[name]
+            lo = np.minimum.reduceat(y, starts)
+            hi = np.maximum.reduceat(y, starts)
+            rising = y[ends] >= y[starts]
+            rows[name][0::2] = np.where(rising, lo, hi)
+            rows[name][1::2] = np.where(rising, hi, lo)
+
+        # Alle bøtter unntatt den siste er ferdige
+        self._out.extend(rows[:-2])
+        self._open = rows[-2:]
+        self._next_bucket = int(idx[-1])
+
+    def view(self, t_min):
+        """Desimerte data (PLOT_DTYPE) for t >= t_min, eldste først."""
+        self._update(t_min)
+        done = self._out.view(t_min=t_min - self.bucket_dt)
+        if not len(self._open):
+            return done
+        return np.concatenate((done, self._open))
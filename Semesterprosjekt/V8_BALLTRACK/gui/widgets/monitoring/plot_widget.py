@@ -3,90 +3,57 @@ plot_widget.py
 ---------------------------------------
 Utvidet plott-widget med 6 kurver:
 SP, PV, u_tot, u_P, u_I, u_D
-"""
 
-import tkinter as tk
-from tkinter import ttk
-import time
+Data lagres i en NumPy-ringbuffer (plot_buffer.py). Kurvene får
+views rett fra bufferet, og tidsaksen forskyves med en transform
+i stedet for å regne ut ny t_rel-liste hver frame.
+
+Blitting (settings.PLOT_BLIT):
+    Bakgrunnen (akser, ticks, legend) tegnes én gang og caches.
+    Hver frame tegnes kun kurvene på nytt. Full redraw bare når
+    tidsvindu, y-grenser, kurvevalg eller størrelse endres.
+
+Datainntak vs. tegning:
+    Etter bind() henter widgeten selv alle nye kontrollsamples i batch
+    (controller.drain_samples()) og tegner med egen frame-rate
+    (settings.PLOT_FPS). Kontrollraten og GUI-raten er dermed
+    uavhengige, og ingen samples går tapt mellom to frames.
+
+Desimering (settings.PLOT_DECIMATE):
+    Når vinduet har flere samples enn ~2 per piksel, tegnes min/maks
+    per pikselbøtte (MinMaxDecimator) i stedet for rådata.
+
+Skjulte kurver og autoscale:
+    Kun synlige kurver får set_data, desimering og min/maks-sporing.
+    Autoscale bruker løpende min/maks (WindowExtrema) i stedet for
+    relim(), med hysterese: y-aksen endres bare når data går utenfor,
+    eller når området er blitt mye større enn nødvendig.
+
+Kontroller, buffer og render-timer ligger i PlotBase (plot_base.py),
+som deles med den lette Canvas-varianten (canvas_plot_widget.py).
+"""
 
-from V8_BALLTRACK.gui.widgets.base_widget import BaseWidget
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.gui.widgets.monitoring.plot_base import PLOT_CURVES, PlotBase
 
 
 import matplotlib
 matplotlib.use("TkAgg")
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
+from matplotlib.transforms import Affine2D
 
 from V8_BALLTRACK.gui.widgets.registry import register_widget
 
 @register_widget("plot", "Preview – PlotWidget")
 
-class PlotWidget(ttk.LabelFrame, BaseWidget):
+class PlotWidget(PlotBase):
     def __init__(self, parent):
-        ttk.LabelFrame.__init__(self, parent, text="Plot")
-        BaseWidget.__init__(self)
-
-        # Dataserier
-        self.timestamps = []
-        self.data_sp = []
-        self.data_pv = []
-        self.data_u_tot = []
-        self.data_u_p = []
-        self.data_u_i = []
-        self.data_u_d = []
-
-        self.time_window = 10.0
+        # Blitting: cachet bakgrunn (None = full redraw pågår/trengs)
+        self.use_blit = settings.PLOT_BLIT
+        self._background = None
 
-        self._build_ui()
-        self._build_plot()
-
-    # ---------------------------------------------------------
-    # UI-KOMPONENTER
-    # ---------------------------------------------------------
-    def _build_ui(self):
-        frame_top = ttk.Frame(self)
-        frame_top.pack(fill="x", padx=5, pady=5)
-
-        ttk.Label(frame_top, text="Tidsvindu (sek):").pack(side="left")
-        self.cmb_window = ttk.Combobox(
-            frame_top, values=["5", "10", "20", "30", "60"],
-            width=5, state="readonly"
-        )
-        self.cmb_window.set("10")
-        self.cmb_window.pack(side="left", padx=5)
-        self.cmb_window.bind("<<ComboboxSelected>>", self._window_changed)
-
-        self.var_autoscale = tk.BooleanVar(value=True)
-        ttk.Checkbutton(frame_top, text="Autoscale",
-                        variable=self.var_autoscale).pack(side="left", padx=10)
-
-        ttk.Button(frame_top, text="Clear", command=self._clear).pack(side="right")
-
-        # ---------------------------
-        # Kurvevalg (checkboxes)
-        # ---------------------------
-        self.frame_curve = ttk.Frame(self)
-        self.frame_curve.pack(fill="x", padx=5, pady=3)
-
-        self.var_show_sp = tk.BooleanVar(value=True)
-        self.var_show_pv = tk.BooleanVar(value=True)
-        self.var_show_u_tot = tk.BooleanVar(value=True)
-        self.var_show_u_p = tk.BooleanVar(value=False)
-        self.var_show_u_i = tk.BooleanVar(value=False)
-        self.var_show_u_d = tk.BooleanVar(value=False)
-
-        ttk.Checkbutton(self.frame_curve, text="Setpoint", variable=self.var_show_sp,
-                        command=self._update_curve_visibility).pack(side="left")
-        ttk.Checkbutton(self.frame_curve, text="PV", variable=self.var_show_pv,
-                        command=self._update_curve_visibility).pack(side="left")
-        ttk.Checkbutton(self.frame_curve, text="u_tot", variable=self.var_show_u_tot,
-                        command=self._update_curve_visibility).pack(side="left")
-        ttk.Checkbutton(self.frame_curve, text="u_P", variable=self.var_show_u_p,
-                        command=self._update_curve_visibility).pack(side="left")
-        ttk.Checkbutton(self.frame_curve, text="u_I", variable=self.var_show_u_i,
-                        command=self._update_curve_visibility).pack(side="left")
-        ttk.Checkbutton(self.frame_curve, text="u_D", variable=self.var_show_u_d,
-                        command=self._update_curve_visibility).pack(side="left")
+        PlotBase.__init__(self, parent)
 
     # ---------------------------------------------------------
     # PLOTTING – MATPLOTLIB
@@ -101,92 +68,121 @@ class PlotWidget(ttk.LabelFrame, BaseWidget):
         self.ax.set_ylabel("Verdi")
         self.ax.set_xlabel("Tid (sek)")
 
-        # Kurver
-        self.line_sp,     = self.ax.plot([], [], color="#D32F2F", label="Setpoint")
-        self.line_pv,     = self.ax.plot([], [], color="#1976D2", label="PV")
-        self.line_u_tot,  = self.ax.plot([], [], color="#FFC107", label="u_tot")
-        self.line_u_p,    = self.ax.plot([], [], color="#388E3C", label="u_P")
-        self.line_u_i,    = self.ax.plot([], [], color="#FF9800", label="u_I")
-        self.line_u_d,    = self.ax.plot([], [], color="#9C27B0", label="u_D")
+        # Kurver (animated=True: tegnes ikke i full redraw, kun ved blit)
+        anim = self.use_blit
+        self._line_by_field = {}
+        for field, label, color, _ in PLOT_CURVES:
+            line, = self.ax.plot([], [], color=color, label=label, animated=anim)
+            self._line_by_field[field] = line
+
+        self.line_sp = self._line_by_field["sp"]
+        self.line_pv = self._line_by_field["pv"]
+        self.line_u_tot = self._line_by_field["u_tot"]
+        self.line_u_p = self._line_by_field["u_p"]
+        self.line_u_i = self._line_by_field["u_i"]
+        self.line_u_d = self._line_by_field["u_d"]
+
+        # Kurve -> felt i bufferet
+        self._lines = tuple((line, field) for field, line in self._line_by_field.items())
+        self._visible = ()
+
+        # x-akse: t - t0 gjøres med en transform (O(1) per frame),
+        # slik at set_data kan få bufferets tid direkte.
+        self._x_shift = Affine2D()
+        for line, _ in self._lines:
+            line.set_transform(self._x_shift + self.ax.transData)
 
         # Fast legend på høyre side
         self.ax.legend(loc="center left", bbox_to_anchor=(1, 0.5))
 
+        self.ax.set_xlim(0, self.time_window)
+
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
+        # Etter hver full redraw (også ved resize): cache ny bakgrunn
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # ---------------------------------------------------------
+    # BLITTING
+    # ---------------------------------------------------------
+    def _on_draw(self, event=None):
+        # Ny størrelse? -> nytt antall pikselbøtter
+        self._resize_decimator(self.ax.bbox.width)
+        if not self.use_blit:
+            return
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_lines()
+        self.canvas.blit(self.ax.bbox)
+
+    def _draw_lines(self):
+        for line, _ in self._visible:
+            self.ax.draw_artist(line)
+
+    def _request_full_redraw(self):
+        self._background = None
+        self.canvas.draw_idle()
+
+    def _render(self):
+        if not self.use_blit:
+            self.canvas.draw_idle()
+            return
+
+        if self._background is None:
+            # Full redraw er bestilt – _on_draw tegner kurvene
+            return
+
+        self.canvas.restore_region(self._background)
+        self._draw_lines()
+        self.canvas.blit(self.ax.bbox)
+
     # ---------------------------------------------------------
     # VIS / SKJUL KURVER
     # ---------------------------------------------------------
-    def _update_curve_visibility(self):
-        self.line_sp.set_visible(self.var_show_sp.get())
-        self.line_pv.set_visible(self.var_show_pv.get())
-        self.line_u_tot.set_visible(self.var_show_u_tot.get())
-        self.line_u_p.set_visible(self.var_show_u_p.get())
-        self.line_u_i.set_visible(self.var_show_u_i.get())
-        self.line_u_d.set_visible(self.var_show_u_d.get())
+    def _on_visibility_changed(self):
+        for line, field in self._lines:
+            line.set_visible(field in self._visible_fields)
+        self._visible = tuple((line, field) for line, field in self._lines if line.get_visible())
 
-        self.canvas.draw_idle()
+        self._request_full_redraw()
 
     # ---------------------------------------------------------
-    # OPPDATER DATA
+    # TEGN
     # ---------------------------------------------------------
-    def update_plot(self, sp, pv, u_tot, u_p, u_i, u_d):
-        now = time.time()
-
-        self.timestamps.append(now)
-        self.data_sp.append(sp)
-        self.data_pv.append(pv)
-        self.data_u_tot.append(u_tot)
-        self.data_u_p.append(u_p)
-        self.data_u_i.append(u_i)
-        self.data_u_d.append(u_d)
-
-        self._trim_data(now)
-
-        # Relative time
-        t0 = self.timestamps[0]
-        t_rel = [t - t0 for t in self.timestamps]
-
-        # Sett datasett
-        self.line_sp.set_data(t_rel, self.data_sp)
-        self.line_pv.set_data(t_rel, self.data_pv)
-        self.line_u_tot.set_data(t_rel, self.data_u_tot)
-        self.line_u_p.set_data(t_rel, self.data_u_p)
-        self.line_u_i.set_data(t_rel, self.data_u_i)
-        self.line_u_d.set_data(t_rel, self.data_u_d)
+    def render_frame(self):
+        self._dirty = False
+
+        data, t_min = self._window_data()
+        if data is None:
+            return
+
+        # Relative time: x = t - t0 via transform
+        t0 = data["t"][0]
+        self._x_shift.clear().translate(-t0, 0.0)
+
+        # Sett datasett (kun synlige kurver)
+        t = data["t"]
+        for line, field in self._visible:
+            line.set_data(t, data[field])
 
         # Autoscale
         if self.var_autoscale.get():
-            self.ax.relim()
-            self.ax.autoscale_view()
+            ylim = self._autoscale_limits(t_min, self.ax.get_ylim())
+            if ylim is not None:
+                # Nye y-grenser -> ticks endres -> bakgrunnen må tegnes på nytt
+                self.ax.set_ylim(*ylim)
+                self._request_full_redraw()
+                return
 
-        self.ax.set_xlim(0, self.time_window)
-
-        self.canvas.draw_idle()
+        self._render()
 
     # ---------------------------------------------------------
-    def _trim_data(self, now):
-        while self.timestamps and now - self.timestamps[0] > self.time_window:
-            self.timestamps.pop(0)
-            self.data_sp.pop(0)
-            self.data_pv.pop(0)
-            self.data_u_tot.pop(0)
-            self.data_u_p.pop(0)
-            self.data_u_i.pop(0)
-            self.data_u_d.pop(0)
-
-    def _window_changed(self, event=None):
-        self.time_window = float(self.cmb_window.get())
-
-    def _clear(self):
-        self.timestamps.clear()
-        self.data_sp.clear()
-        self.data_pv.clear()
-        self.data_u_tot.clear()
-        self.data_u_p.clear()
-        self.data_u_i.clear()
-        self.data_u_d.clear()
-        self.canvas.draw_idle()
-
+    def _on_window_changed(self):
+        self.ax.set_xlim(0, self.time_window)
+        self._resize_decimator(self.ax.bbox.width, force=True)
+        self._request_full_redraw()
 
+    def _on_clear(self):
+        for line, _ in self._lines:
+            line.set_data([], [])
+        self._request_full_redraw()
@@ -9,6 +9,12 @@ Tilpasset V7 + V5-basert PositionController med følgende API:
     controller.set_pid(kp,ki,kd)
     controller.disable_integral(flag)
     controller.disable_derivative(flag)
+    controller.start_autotune(rule, terms, pid_type)   (valgfri)
+    controller.cancel_autotune()                       (valgfri)
+
+Autotune (relé, Åström–Hägglund) bruker valgt PID-form og modus
+(P/PI/PID), og regel ZN eller TL. Når den er ferdig hentes nye
+verdier automatisk (Reset).
 
 Modusvelger (PID/PI/PD/P) er beholdt for pedagogikk, men brukes til
 å slå av/på I- og D-leddet automatisk.
@@ -18,6 +24,7 @@ import tkinter as tk
 from tkinter import ttk
 from V8_BALLTRACK.gui.widgets.base_widget import BaseWidget
 from V8_BALLTRACK.controller.pid import PIDType
+from V8_BALLTRACK.controller.autotune import TUNING_RULES
 
 from V8_BALLTRACK.gui.widgets.registry import register_widget
 
@@ -34,6 +41,7 @@ class PIDWidget(ttk.LabelFrame, BaseWidget):
         - Deaktiver D-ledd (D → 0)
         - Apply-knapp
         - Reset-knapp
+        - Autotune (regel ZN/TL, start/avbryt, status)
     """
 
     def __init__(self, parent):
@@ -51,6 +59,8 @@ class PIDWidget(ttk.LabelFrame, BaseWidget):
         self.var_disable_i = tk.BooleanVar(value=False)
         self.var_disable_d = tk.BooleanVar(value=False)
 
+        self.var_tune_rule = tk.StringVar(value="zn")
+
         self._build_ui()
 
     # ---------------------------------------------------------
@@ -116,6 +126,25 @@ class PIDWidget(ttk.LabelFrame, BaseWidget):
 
         ttk.Button(frame_buttons, text="Apply", command=self._apply).grid(row=0, column=0, padx=5)
         ttk.Button(frame_buttons, text="Reset", command=self._reset).grid(row=0, column=1, padx=5)
+
+        # --- Autotune ---
+        frame_tune = ttk.Frame(self)
+        frame_tune.grid(row=8, column=0, columnspan=2, sticky="ew", pady=(8, 0))
+
+        ttk.Label(frame_tune, text="Autotune:").grid(row=0, column=0, sticky="w")
+        self.combo_tune_rule = ttk.Combobox(
+            frame_tune,
+            values=["zn", "tl"],
+            textvariable=self.var_tune_rule,
+            state="readonly",
+            width=4
+        )
+        self.combo_tune_rule.grid(row=0, column=1, padx=4)
+        ttk.Button(frame_tune, text="Start", command=self._start_autotune).grid(row=0, column=2, padx=2)
+        ttk.Button(frame_tune, text="Avbryt", command=self._cancel_autotune).grid(row=0, column=3, padx=2)
+
+        self.lbl_tune = ttk.Label(frame_tune, text="idle")
+        self.lbl_tune.grid(row=1, column=0, columnspan=4, sticky="w")
         
     # ---------------------------------------------------------
     # BINDING
@@ -125,6 +154,45 @@ class PIDWidget(ttk.LabelFrame, BaseWidget):
 
         self._reset()
 
+        # GuiTags: autotune-status pushes når den endres
+        if hasattr(self.controller, "subscribe"):
+            self.controller.subscribe(("autotune",), self._on_tags)
+
+    def _on_tags(self, changes: dict):
+        state = changes["autotune"]
+        self.lbl_tune.config(text=state)
+
+        # Ferdig: hent nye gains inn i feltene
+        if state == "done":
+            self._reset()
+
+    # ---------------------------------------------------------
+    # AUTOTUNE
+    # ---------------------------------------------------------
+    def _start_autotune(self):
+        if not self.controller or not hasattr(self.controller, "start_autotune"):
+            print("[PIDWidget] Controller støtter ikke autotune.")
+            return
+
+        # Modus = ledd som tunes (PD finnes ikke i ZN/TL → avvises under)
+        terms = self.var_mode.get()
+        rule = self.var_tune_rule.get()
+
+        if (rule, terms) not in TUNING_RULES:
+            print(f"[PIDWidget] Autotune: regel {rule.upper()} har ingen {terms}-innstilling.")
+            return
+
+        # GuiTags: False = ikke lagt i køen (full, eller controller mangler autotune)
+        if self.controller.start_autotune(rule, terms, self.var_pid_type.get()) is False:
+            print("[PIDWidget] Autotune ble ikke startet (controller/kø avviste kommandoen).")
+            return
+
+        print(f"[PIDWidget] Autotune startet → Regel={rule.upper()}, Ledd={terms}, Form={self.var_pid_type.get()}")
+
+    def _cancel_autotune(self):
+        if self.controller and hasattr(self.controller, "cancel_autotune"):
+            self.controller.cancel_autotune()
+
     # ---------------------------------------------------------
     # APPLY – send nye verdier til controller
     # ---------------------------------------------------------
@@ -1,6 +1,6 @@
 # V8_BALLTRACK/hardware/adc/ads1015.py
-from smbus2 import SMBus
-import time
+from V8_BALLTRACK.hardware.adc import ads1x15
+from V8_BALLTRACK.hardware.i2c_bus import get_bus
 
 class ADS1015:
     REG_CONVERSION = 0x00
@@ -18,12 +18,37 @@ class ADS1015:
     # MUX for single-ended AINx vs GND
     MUX_SINGLE = {0: 0b100, 1: 0b101, 2: 0b110, 3: 0b111}
 
-    def __init__(self, bus=1, address=0x48, default_channel=0, debug=False):
+    # 1600 SPS -> 0.625 ms per konvertering
+    CONVERSION_TIME_S = 1.0 / 1600
+
+    def __init__(self, bus=1, address=0x48, default_channel=0, debug=False,
+                 ready_timeout_s=0.02, i2c=None):
+        """
+        ready_timeout_s: slakk utover konverteringstiden (se ads1x15.wait_ready)
+        i2c: delt I2CBus (hardware/i2c_bus.py). None -> get_bus(bus).
+        """
         self.bus_num = bus
         self.address = address
         self.default_channel = default_channel
         self.debug = debug
-        self.bus = SMBus(bus)
+        self.ready_timeout_s = ready_timeout_s
+        # Delt, låst buss (hardware/i2c_bus.py)
+        self.bus = i2c if i2c is not None else get_bus(bus)
+
+        # Måledata fra siste konvertering (for latency-analyse)
+        self.last_poll_count = 0
+        self.last_conversion_s = 0.0
+
+    def _wait_ready(self):
+        """
+        Poller OS-biten til konverteringen er ferdig (se ads1x15.wait_ready).
+        Returnerer antall poll, TimeoutError ved heng.
+        """
+        polls, self.last_conversion_s = ads1x15.wait_ready(
+            self.bus, self.address, self.CONVERSION_TIME_S, self.ready_timeout_s, "ADS1015"
+        )
+        self.last_poll_count = polls
+        return polls
 
     def read_raw(self, channel=None) -> int:
         """Returnerer 12-bit raw (0..4095) fra valgt channel (0..3)."""
@@ -35,16 +60,19 @@ class ADS1015:
         mux = self.MUX_SINGLE[channel]
         config = (self.BASE_CONFIG & ~(0b111 << 12)) | (mux << 12)
 
-        # skriv config (big-endian)
-        self.bus.write_i2c_block_data(
-            self.address,
-            self.REG_CONFIG,
-            [(config >> 8) & 0xFF, config & 0xFF]
-        )
+        # write → poll → read under busslåsen (én logisk transaksjon)
+        with self.bus.transaction():
+            # skriv config (big-endian)
+            self.bus.write_i2c_block_data(
+                self.address,
+                self.REG_CONFIG,
+                [(config >> 8) & 0xFF, config & 0xFF]
+            )
 
-        time.sleep(0.002)  # ~2ms holder for 1600SPS
+            # Vent til OS-biten sier ferdig (før: fast 2 ms sleep)
+            self._wait_ready()
 
-        hi, lo = self.bus.read_i2c_block_data(self.address, self.REG_CONVERSION, 2)
+            hi, lo = self.bus.read_i2c_block_data(self.address, self.REG_CONVERSION, 2)
 
         # ADS1015 gir 12-bit venstrejustert i 16-bit ord
         raw = (hi << 4) | (lo >> 4)
@@ -55,10 +83,9 @@ class ADS1015:
         return raw
 
     def close(self):
-        try:
-            self.bus.close()
-        except Exception:
-            pass
+        # Bussen er delt med de andre driverne og lukkes ikke her
+        # (se i2c_bus.close_all()).
+        pass
 
     def __del__(self):
         self.close()
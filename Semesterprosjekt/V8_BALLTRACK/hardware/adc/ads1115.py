@@ -1,45 +1,88 @@
 # V8_BALLTRACK/hardware/adc/ads1115.py
-from smbus2 import SMBus
 import time
 
+from V8_BALLTRACK.hardware.adc import ads1x15
+from V8_BALLTRACK.hardware.i2c_bus import get_bus
+
 class ADS1115:
     REG_CONVERSION = 0x00
     REG_CONFIG = 0x01
 
-    # MODE=1 (single-shot), PGA=±4.096V, DR=128SPS, comparator disabled
-    # OS-biten settes ved hver måling for å starte konvertering
+    # PGA=±4.096V, comparator disabled. MODE og DR settes per måling/oppsett.
+    # OS-biten settes ved hver single-shot måling for å starte konvertering
     BASE_CONFIG = (
-        (1 << 8)  |      # MODE (single-shot)
         (0b001 << 9) |   # PGA ±4.096V
-        (0b100 << 5) |   # DR 128 SPS
         0b11             # COMP_QUE disable
     )
+    MODE_SINGLE_SHOT = 1 << 8
 
     # MUX for single-ended AINx vs GND
     MUX_SINGLE = {0: 0b100, 1: 0b101, 2: 0b110, 3: 0b111}
 
-    def __init__(self, bus=1, address=0x48, default_channel=0, debug=False):
+    # Data rate (SPS) -> DR-bits (bit 7:5)
+    DATA_RATES = {
+        8: 0b000, 16: 0b001, 32: 0b010, 64: 0b011,
+        128: 0b100, 250: 0b101, 475: 0b110, 860: 0b111,
+    }
+
+    # Intern oscillator kan avvike ±10 % fra nominell data rate
+    CONVERSION_MARGIN = ads1x15.CONVERSION_MARGIN
+
+    def __init__(self, bus=1, address=0x48, default_channel=0, debug=False,
+                 data_rate=128, continuous=False, ready_timeout_s=0.05, i2c=None):
+        """
+        data_rate:  8..860 SPS (se DATA_RATES)
+        continuous: True -> continuous-conversion. Kanal-config skrives én
+                    gang, og read_raw() leser kun siste sample (2 byte).
+        ready_timeout_s: slakk utover konverteringstiden i single-shot
+                    (frist = 1/data_rate · CONVERSION_MARGIN + ready_timeout_s)
+        i2c:        delt I2CBus (hardware/i2c_bus.py). None -> get_bus(bus).
+        """
+        if data_rate not in self.DATA_RATES:
+            raise ValueError(
+                f"Ugyldig data_rate {data_rate}. Gyldig: {sorted(self.DATA_RATES)}"
+            )
+
         self.bus_num = bus
         self.address = address
         self.default_channel = default_channel
         self.debug = debug
-        self.bus = SMBus(bus)
+        self.data_rate = data_rate
+        self.continuous = continuous
+        self.conversion_time_s = 1.0 / data_rate
+        self.ready_timeout_s = ready_timeout_s
+        # Delt, låst buss (hardware/i2c_bus.py)
+        self.bus = i2c if i2c is not None else get_bus(bus)
 
-    def read_raw(self, channel=None) -> int:
-        """
-        Returnerer signed 16-bit råverdi fra ADS1115.
-        For single-ended forventes normalt 0..32767.
-        """
+        # Måledata fra siste single-shot (for latency-analyse)
+        self.last_poll_count = 0
+        self.last_conversion_s = 0.0
+
+        # Kanal som er konfigurert i continuous-mode (None = ikke startet)
+        self._active_channel = None
+
+    # ---------------------------------------------------------
+    # Intern hjelp
+    # ---------------------------------------------------------
+    def _check_channel(self, channel):
         if channel is None:
             channel = self.default_channel
         if channel not in self.MUX_SINGLE:
             raise ValueError(f"Ugyldig ADC channel {channel}. Gyldig: 0..3")
+        return channel
 
-        mux = self.MUX_SINGLE[channel]
-
-        # Sett OS=1 for å starte konvertering (bit 15)
-        config = (1 << 15) | (self.BASE_CONFIG & ~(0b111 << 12)) | (mux << 12)
+    def _config_word(self, channel, single_shot) -> int:
+        config = (
+            self.BASE_CONFIG
+            | (self.MUX_SINGLE[channel] << 12)
+            | (self.DATA_RATES[self.data_rate] << 5)
+        )
+        if single_shot:
+            # Sett OS=1 for å starte konvertering (bit 15)
+            config |= (1 << 15) | self.MODE_SINGLE_SHOT
+        return config
 
+    def _write_config(self, config):
         # skriv config (big-endian)
         self.bus.write_i2c_block_data(
             self.address,
@@ -47,9 +90,18 @@ class ADS1115:
             [(config >> 8) & 0xFF, config & 0xFF]
         )
 
-        # 128 SPS -> ~7.8ms per konvertering. 10ms er trygt.
-        time.sleep(0.01)
+    def _wait_ready(self):
+        """
+        Poller OS-biten til konverteringen er ferdig (se ads1x15.wait_ready).
+        Returnerer antall poll. TimeoutError hvis brikken ikke blir ferdig.
+        """
+        polls, self.last_conversion_s = ads1x15.wait_ready(
+            self.bus, self.address, self.conversion_time_s, self.ready_timeout_s, "ADS1115"
+        )
+        self.last_poll_count = polls
+        return polls
 
+    def _read_conversion(self, channel) -> int:
         hi, lo = self.bus.read_i2c_block_data(self.address, self.REG_CONVERSION, 2)
         raw = (hi << 8) | lo
 
@@ -62,11 +114,64 @@ class ADS1115:
 
         return raw
 
+    # ---------------------------------------------------------
+    # Continuous-conversion
+    # ---------------------------------------------------------
+    def start_continuous(self, channel=None):
+        """
+        Starter continuous-conversion på valgt kanal.
+        Venter én konverteringstid slik at første sample er gyldig.
+        """
+        channel = self._check_channel(channel)
+
+        self._write_config(self._config_word(channel, single_shot=False))
+        time.sleep(self.conversion_time_s * self.CONVERSION_MARGIN)
+
+        self._active_channel = channel
+
+    def stop_continuous(self):
+        """Setter brikken tilbake i single-shot (power-down mellom målinger)."""
+        channel = self._active_channel if self._active_channel is not None else self.default_channel
+        self._write_config(self._config_word(channel, single_shot=False) | self.MODE_SINGLE_SHOT)
+        self._active_channel = None
+
+    # ---------------------------------------------------------
+    # Lesing
+    # ---------------------------------------------------------
+    def read_raw(self, channel=None) -> int:
+        """
+        Returnerer signed 16-bit råverdi fra ADS1115.
+        For single-ended forventes normalt 0..32767.
+
+        Continuous-mode: kun én 2-byte lesing av REG_CONVERSION
+        (config skrives bare ved første kall / kanalbytte).
+        """
+        channel = self._check_channel(channel)
+
+        if self.continuous:
+            if channel != self._active_channel:
+                self.start_continuous(channel)
+            return self._read_conversion(channel)
+
+        # write → poll → read er én logisk transaksjon: ingen annen tråd
+        # (probe, annen enhet) skal kunne skrive config midt i den.
+        # Bussen er uansett opptatt av kontrollsyklusen i denne tiden.
+        with self.bus.transaction():
+            self._write_config(self._config_word(channel, single_shot=True))
+
+            # Vent til OS-biten sier ferdig (i stedet for fast worst-case sleep)
+            self._wait_ready()
+
+            return self._read_conversion(channel)
+
     def close(self):
         try:
-            self.bus.close()
+            if self._active_channel is not None:
+                self.stop_continuous()
         except Exception:
             pass
+        # Bussen er delt med de andre driverne og lukkes ikke her
+        # (se i2c_bus.close_all()).
 
     def __del__(self):
         self.close()
@@ -0,0 +1,56 @@
+# V8_BALLTRACK/hardware/adc/ads1x15.py
+# -----------------------------------------------------------
+# Felles for ADS1015/ADS1115: vent på ferdig single-shot
+# -----------------------------------------------------------
+# Begge brikkene setter OS-biten (bit 15 i config-registeret) til 1
+# når en single-shot konvertering er ferdig. I stedet for å sove en
+# fast worst-case tid sover vi til tidligste mulige ferdig-tidspunkt,
+# og poller deretter OS-biten.
+#
+# Frist: nominell konverteringstid · CONVERSION_MARGIN + ready_timeout_s.
+# Dermed skalerer fristen med data rate (8 SPS = 125 ms per konvertering),
+# og ready_timeout_s er kun slakk for buss/planlegger – ikke selve
+# konverteringen.
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Tuple
+import time
+
+
+REG_CONFIG = 0x01
+
+# Intern oscillator kan avvike ±10 % fra nominell data rate
+CONVERSION_MARGIN = 1.25
+# Tidligste mulige ferdig-tidspunkt (rask oscillator) – før dette
+# er det ingen vits å polle OS-biten
+EARLIEST_READY = 0.9
+
+
+def wait_ready(bus, address: int, conversion_time_s: float, ready_timeout_s: float,
+               chip: str = "ADS1x15") -> Tuple[int, float]:
+    """
+    Poller OS-biten til konverteringen er ferdig (OS=1 ved lesing).
+    Returnerer (antall poll, ventetid i sekunder).
+    Kaster TimeoutError hvis brikken ikke blir ferdig innen fristen.
+    """
+    t_start = time.perf_counter()
+    budget_s = conversion_time_s * CONVERSION_MARGIN + ready_timeout_s
+    deadline = t_start + budget_s
+
+    time.sleep(conversion_time_s * EARLIEST_READY)
+
+    polls = 0
+    while True:
+        hi, _ = bus.read_i2c_block_data(address, REG_CONFIG, 2)
+        polls += 1
+        if hi & 0x80:
+            break
+        if time.perf_counter() > deadline:
+            raise TimeoutError(
+                f"{chip} 0x{address:02X}: konvertering ikke ferdig "
+                f"etter {budget_s * 1000:.0f} ms ({polls} poll)"
+            )
+
+    return polls, time.perf_counter() - t_start
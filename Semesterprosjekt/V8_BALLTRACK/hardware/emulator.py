@@ -0,0 +1,401 @@
+# -------------------------------------------------------------------
+# hardware/emulator.py
+#
+# Register-nivå emulator for ADS1115 og PCA9685 (uten Raspberry Pi).
+#
+# Formål:
+#   - Kjøre HELE den ekte stacken off-target:
+#       PositionControllerV8 -> ADS1115 / PCA9685 -> I2CBus -> (emulert buss)
+#   - Driverne brukes uendret: emulatoren ser ut som en SMBus.
+#   - Emulerte brikker har registre som databladet:
+#       ADS1115: CONFIG (OS/MUX/MODE/DR) og CONVERSION med data rate-timing
+#       PCA9685: MODE1 (SLEEP/AI/RESTART), PRESCALE og LEDn ON/OFF
+#   - En plant-modell (ballen på banen) drives av servo-pulsen fra PCA9685
+#     og leses av ADS1115. settings.SIM_PLANT velger fysisk modell
+#     (controller/plant.py: BallBeamPlant) eller SimplePlant under.
+#   - Bussen teller bytes og beregner "ekte" busstid (100/400 kHz).
+#
+# Bruk:
+#   from V8_BALLTRACK.hardware.emulator import install_emulator
+#   sim = install_emulator()        # før driverne opprettes
+#   ... create_controller() som vanlig ...
+# -------------------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional
+import errno
+import time
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.hardware.i2c_bus import I2CBus, register_bus
+
+
+# I2C_M_RD-flagget i i2c_msg (smbus2)
+I2C_M_RD = 0x0001
+
+
+def _clamp(x: float, lo: float, hi: float) -> float:
+    if x < lo:
+        return lo
+    if x > hi:
+        return hi
+    return x
+
+
+# ===================================================================
+# Enkel plant (ball på bane)
+# ===================================================================
+class SimplePlant:
+    """
+    Enkel plant for emulatoren: ballposisjonen (0..1) integrerer
+    servoutslaget, samme modell som DummyController.
+
+    Plant-kontrakt (brukes av emulatoren):
+        set_pulse_us(us)   – servo-puls fra PCA9685
+        advance(dt)        – simuler dt sekunder frem
+        read_raw()         – ADS1115-råverdi for softpot (0..32767)
+    """
+
+    def __init__(self, gain: float = 0.30, pos: float = 0.5):
+        self.gain = gain
+        self.pos = pos
+        self.pulse_us = (settings.SERVO_MIN_US + settings.SERVO_MAX_US) / 2.0
+
+    def set_pulse_us(self, pulse_us: float) -> None:
+        self.pulse_us = pulse_us
+
+    def advance(self, dt: float) -> None:
+        if dt <= 0.0 or self.pulse_us <= 0.0:
+            # pulse 0 = servo av, banen står i ro
+            return
+        mid = (settings.SERVO_MIN_US + settings.SERVO_MAX_US) / 2.0
+        span = (settings.SERVO_MAX_US - settings.SERVO_MIN_US) / 2.0
+        u = _clamp((self.pulse_us - mid) / span, -1.0, 1.0)
+        self.pos = _clamp(self.pos + u * self.gain * dt, 0.0, 1.0)
+
+    def read_raw(self) -> int:
+        raw_min = settings.SOFTPOT_RAW_MIN
+        raw_max = settings.SOFTPOT_RAW_MAX
+        return int(round(raw_min + self.pos * (raw_max - raw_min)))
+
+
+# ===================================================================
+# ADS1115
+# ===================================================================
+class EmulatedADS1115:
+    """
+    Registermodell av ADS1115.
+
+    - Single-shot: skriving med OS=1 starter en konvertering som er ferdig
+      etter 1/DR sekunder. Config-registeret leser OS=0 til den er ferdig.
+    - Continuous: ny konvertering hver 1/DR, CONVERSION holder siste.
+    - Kun `channel` (AINx) er koblet til plant; andre kanaler leser 0.
+    """
+
+    REG_CONVERSION = 0x00
+    REG_CONFIG = 0x01
+
+    DATA_RATES = (8, 16, 32, 64, 128, 250, 475, 860)
+    DEFAULT_CONFIG = 0x8583   # fra databladet (power-up)
+
+    def __init__(self, plant, clock: Callable[[], float], channel: int = 0):
+        self.plant = plant
+        self.clock = clock
+        self.channel = channel
+
+        self.config = self.DEFAULT_CONFIG
+        self.conversion = 0
+
+        self._busy_until = 0.0        # single-shot: tid når konvertering er ferdig
+        self._cont_t0: Optional[float] = None
+        self._cont_k = -1             # siste continuous-konvertering som er lagt inn
+
+        self.conversions = 0
+
+    # ---------------------------------------------------------
+    def _period(self) -> float:
+        return 1.0 / self.DATA_RATES[(self.config >> 5) & 0b111]
+
+    def _sample(self) -> int:
+        mux = (self.config >> 12) & 0b111
+        if mux != 0b100 + self.channel:
+            return 0
+        self.conversions += 1
+        return int(_clamp(self.plant.read_raw(), -32768, 32767))
+
+    def _sync(self, now: float) -> None:
+        single_shot = bool(self.config & (1 << 8))
+
+        if single_shot:
+            if self._busy_until and now >= self._busy_until:
+                self.conversion = self._sample()
+                self._busy_until = 0.0
+            return
+
+        if self._cont_t0 is None:
+            return
+        k = int((now - self._cont_t0) / self._period())
+        if k > self._cont_k and k >= 1:
+            self.conversion = self._sample()
+            self._cont_k = k
+
+    # ---------------------------------------------------------
+    def write_register(self, reg: int, data) -> None:
+        now = self.clock()
+        self._sync(now)
+
+        if len(data) == 0:
+            return  # kun pekerskriving
+        if reg != self.REG_CONFIG or len(data) < 2:
+            return  # CONVERSION er read-only
+
+        value = ((data[0] & 0xFF) << 8) | (data[1] & 0xFF)
+        os_bit = value & 0x8000
+        self.config = value & 0x7FFF
+
+        if self.config & (1 << 8):
+            # single-shot / power-down
+            self._cont_t0 = None
+            if os_bit:
+                self._busy_until = now + self._period()
+        else:
+            # continuous: start ny sekvens
+            self._busy_until = 0.0
+            self._cont_t0 = now
+            self._cont_k = 0
+
+    def read_register(self, reg: int, length: int):
+        self._sync(self.clock())
+
+        if reg == self.REG_CONFIG:
+            value = self.config
+            if not self._busy_until:
+                value |= 0x8000   # OS=1: ikke opptatt
+        else:
+            value = self.conversion & 0xFFFF
+
+        out = [(value >> 8) & 0xFF, value & 0xFF]
+        return (out * ((length + 1) // 2))[:length]
+
+
+# ===================================================================
+# PCA9685
+# ===================================================================
+class EmulatedPCA9685:
+    """
+    Registermodell av PCA9685.
+
+    - MODE1: SLEEP/AI/RESTART. PRESCALE kan kun endres i SLEEP.
+    - Burst-skriving øker adressen kun når AI er satt.
+    - Skriving til LEDn for `servo_channel` oppdaterer plantens servo-puls.
+    """
+
+    MODE1 = 0x00
+    PRESCALE = 0xFE
+    LED0_ON_L = 0x06
+
+    RESTART = 0x80
+    AI = 0x20
+    SLEEP = 0x10
+
+    def __init__(self, plant, servo_channel: int = 0):
+        self.plant = plant
+        self.servo_channel = servo_channel
+
+        self.regs = [0] * 256
+        self.regs[self.MODE1] = 0x11     # SLEEP | ALLCALL (power-up)
+        self.regs[0x01] = 0x04           # MODE2: OUTDRV
+        self.regs[self.PRESCALE] = 0x1E  # 200 Hz (power-up)
+
+        self.channel_writes = 0
+
+    def freq_hz(self) -> float:
+        return 25_000_000.0 / (4096 * (self.regs[self.PRESCALE] + 1))
+
+    def _write_one(self, reg: int, value: int) -> None:
+        value &= 0xFF
+        if reg == self.PRESCALE and not (self.regs[self.MODE1] & self.SLEEP):
+            return  # ignoreres av brikken når den ikke sover
+        if reg == self.MODE1:
+            # RESTART-biten fjernes av brikken etter restart
+            value &= ~self.RESTART
+        self.regs[reg] = value
+
+    def _update_plant(self, touched) -> None:
+        base = self.LED0_ON_L + 4 * self.servo_channel
+        if not any(base <= r < base + 4 for r in touched):
+            return
+        self.channel_writes += 1
+
+        on = self.regs[base] | ((self.regs[base + 1] & 0x0F) << 8)
+        off = self.regs[base + 2] | ((self.regs[base + 3] & 0x0F) << 8)
+        full_off = self.regs[base + 3] & 0x10
+
+        if full_off or off == on or (self.regs[self.MODE1] & self.SLEEP):
+            pulse_us = 0.0
+        else:
+            period_us = 1_000_000.0 / self.freq_hz()
+            pulse_us = ((off - on) % 4096) * period_us / 4096.0
+        self.plant.set_pulse_us(pulse_us)
+
+    def write_register(self, reg: int, data) -> None:
+        touched = []
+        auto_inc = bool(self.regs[self.MODE1] & self.AI)
+        for i, value in enumerate(data):
+            r = (reg + i) & 0xFF if auto_inc else reg
+            self._write_one(r, value)
+            touched.append(r)
+        self._update_plant(touched)
+
+    def read_register(self, reg: int, length: int):
+        auto_inc = bool(self.regs[self.MODE1] & self.AI)
+        return [
+            self.regs[(reg + i) & 0xFF if auto_inc else reg]
+            for i in range(length)
+        ]
+
+
+# ===================================================================
+# SMBus-erstatning
+# ===================================================================
+class SimSMBus:
+    """
+    SMBus-kompatibel emulert buss.
+
+    - devices: {adresse: emulert brikke}
+    - plant.advance() kalles med tiden siden forrige transaksjon
+    - bus_time_s: beregnet tid på ledningen (bits / bus_hz)
+    - realtime=True: transaksjonen venter også denne tiden, slik at
+      timing blir som på ekte hardware
+    """
+
+    def __init__(
+        self,
+        plant,
+        clock: Callable[[], float] = time.monotonic,
+        bus_hz: float = 100_000.0,
+        realtime: bool = True,
+    ):
+        self.plant = plant
+        self.clock = clock
+        self.bus_hz = float(bus_hz)
+        self.realtime = realtime
+
+        self.devices: Dict[int, object] = {}
+        self.bus_time_s = 0.0
+        self.transactions = 0
+        self._last_t = clock()
+
+    def add_device(self, address: int, device) -> None:
+        self.devices[address] = device
+
+    # ---------------------------------------------------------
+    def _device(self, addr: int):
+        dev = self.devices.get(addr)
+        if dev is None:
+            # Samme feil som Linux gir når ingen svarer (NACK)
+            raise OSError(errno.EREMOTEIO, f"Remote I/O error (emulator: ingen enhet på 0x{addr:02X})")
+        return dev
+
+    def _begin(self) -> None:
+        now = self.clock()
+        dt = now - self._last_t
+        if dt > 0.0:
+            self.plant.advance(dt)
+        self._last_t = now
+
+    def _account(self, n_bytes: int, n_starts: int = 1) -> None:
+        # Hver byte = 8 bit + ACK, pluss START/STOP per melding
+        bits = n_bytes * 9 + n_starts * 2
+        t = bits / self.bus_hz
+        self.bus_time_s += t
+        self.transactions += 1
+        if self.realtime:
+            t_end = time.perf_counter() + t
+            while time.perf_counter() < t_end:
+                pass
+
+    # ---------------------------------------------------------
+    def write_byte_data(self, addr: int, reg: int, value: int) -> None:
+        self._begin()
+        self._device(addr).write_register(reg, [value])
+        self._account(3)
+
+    def read_byte_data(self, addr: int, reg: int) -> int:
+        self._begin()
+        value = self._device(addr).read_register(reg, 1)[0]
+        self._account(4, 2)
+        return value
+
+    def write_i2c_block_data(self, addr: int, reg: int, data) -> None:
+        self._begin()
+        self._device(addr).write_register(reg, list(data))
+        self._account(2 + len(data))
+
+    def read_i2c_block_data(self, addr: int, reg: int, length: int):
+        self._begin()
+        out = self._device(addr).read_register(reg, length)
+        self._account(3 + length, 2)
+        return out
+
+    def i2c_rdwr(self, *msgs) -> None:
+        """Kombinerte meldinger: write(reg[, data...]) etterfulgt av read(n)."""
+        self._begin()
+        reg = 0
+        n_bytes = 0
+        for msg in msgs:
+            dev = self._device(msg.addr)
+            n_bytes += 1 + msg.len
+            if msg.flags & I2C_M_RD:
+                data = dev.read_register(reg, msg.len)
+                for i, b in enumerate(data):
+                    msg.buf[i] = bytes([b])
+            else:
+                data = list(msg)
+                if data:
+                    reg = data[0]
+                    dev.write_register(reg, data[1:])
+        self._account(n_bytes, len(msgs) + 1)
+
+    def close(self) -> None:
+        pass
+
+    def get_stats(self):
+        return {
+            "transactions": self.transactions,
+            "bus_time_ms": self.bus_time_s * 1000.0,
+        }
+
+
+# ===================================================================
+# Oppsett
+# ===================================================================
+def install_emulator(
+    plant=None,
+    clock: Callable[[], float] = time.monotonic,
+    realtime: bool = True,
+) -> SimSMBus:
+    """
+    Lager en emulert buss med ADS1115 + PCA9685 på adressene fra settings,
+    og registrerer den som delt I2CBus. Må kalles før driverne opprettes.
+    """
+    if plant is None:
+        from V8_BALLTRACK.controller.plant import create_plant
+        plant = create_plant()
+
+    sim = SimSMBus(plant, clock=clock, realtime=realtime)
+    sim.add_device(
+        settings.ADC_I2C_ADDR,
+        EmulatedADS1115(plant, clock, channel=settings.ADC_CHANNEL),
+    )
+    sim.add_device(
+        settings.PCA9685_I2C_ADDR,
+        EmulatedPCA9685(plant, servo_channel=settings.SERVO_CHANNEL),
+    )
+
+    register_bus(I2CBus(settings.ADC_I2C_BUS, smbus=sim))
+    if settings.PCA9685_I2C_BUS != settings.ADC_I2C_BUS:
+        register_bus(I2CBus(settings.PCA9685_I2C_BUS, smbus=sim))
+
+    return sim
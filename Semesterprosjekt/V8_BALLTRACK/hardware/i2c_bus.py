@@ -0,0 +1,203 @@
+# -------------------------------------------------------------------
+# hardware/i2c_bus.py
+#
+# Delt, låst I2C-buss for alle drivere (ADS1015/ADS1115/PCA9685).
+#
+# Problem uten denne:
+#   - Hver driver åpnet sin egen SMBus(1).
+#   - Kontrolltråd og GUI-tråd kunne flette transaksjoner på samme
+#     fysiske buss (f.eks. ADC-lesing midt i en servo-skriving).
+#
+# Løsning:
+#   - Én I2CBus per bussnummer (get_bus(1) gir alltid samme objekt).
+#   - Hver transaksjon går under en lås.
+#   - Teller antall transaksjoner og tidsbruk per I2C-adresse.
+#   - En buss der en tråd har hengt (probe-timeout) merkes ubrukelig:
+#     nye transaksjoner feiler med en gang i stedet for å vente for
+#     alltid på låsen den hengende tråden holder.
+#
+# I2CBus har samme metodenavn som SMBus, så driverne bruker den
+# akkurat som før (self.bus.write_byte_data(...) osv.).
+# -------------------------------------------------------------------
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+import errno
+import threading
+import time
+
+from smbus2 import SMBus, i2c_msg
+
+
+class I2CBus:
+    """
+    Trådsikker innpakning rundt én SMBus-handle.
+
+    bus:   bussnummer (1 = /dev/i2c-1 på Pi)
+    smbus: valgfritt ferdig SMBus-lignende objekt (f.eks. emulator).
+           Hvis None åpnes SMBus(bus).
+    """
+
+    def __init__(self, bus: int = 1, smbus=None):
+        self.bus_num = bus
+        self._smbus = smbus if smbus is not None else SMBus(bus)
+
+        # RLock: lock kan også holdes rundt flere transaksjoner (transaction())
+        self.lock = threading.RLock()
+
+        # addr -> [count, total_s, max_s, errors]
+        self._stats: Dict[int, List[float]] = {}
+
+        # Satt av mark_unusable() – grunnen til at bussen ikke kan brukes
+        self.unusable: Optional[str] = None
+
+    # ---------------------------------------------------------
+    # Hengt buss
+    # ---------------------------------------------------------
+    def mark_unusable(self, reason: str) -> None:
+        """
+        Merker bussen som ubrukelig (f.eks. probe-tråd som ikke kom
+        tilbake og kanskje fortsatt holder låsen). Settes uten lås.
+        """
+        if self.unusable is None:
+            print(f"[I2CBus] Buss {self.bus_num} merket ubrukelig: {reason}")
+            self.unusable = reason
+
+    def _check_usable(self) -> None:
+        if self.unusable is not None:
+            raise OSError(errno.EIO, f"I2C-buss {self.bus_num} er ubrukelig ({self.unusable})")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Holder låsen rundt flere kall (f.eks. write → poll → read).
+        Feiler med en gang hvis bussen er merket ubrukelig.
+        """
+        self._check_usable()
+        with self.lock:
+            yield self
+
+    # ---------------------------------------------------------
+    # Statistikk
+    # ---------------------------------------------------------
+    def _record(self, addr: int, t0: float, ok: bool) -> None:
+        dt = time.perf_counter() - t0
+        st = self._stats.get(addr)
+        if st is None:
+            st = self._stats[addr] = [0, 0.0, 0.0, 0]
+        st[0] += 1
+        st[1] += dt
+        if dt > st[2]:
+            st[2] = dt
+        if not ok:
+            st[3] += 1
+
+    def _run(self, addr: int, fn, *args):
+        # Sjekkes før låsen: en hengende tråd kan holde den
+        self._check_usable()
+        with self.lock:
+            t0 = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                self._record(addr, t0, ok)
+
+    def get_stats(self) -> Dict[int, Dict[str, Any]]:
+        """Transaksjoner per I2C-adresse: antall, total/maks tid (ms), feil."""
+        with self.lock:
+            return {
+                addr: {
+                    "count": int(st[0]),
+                    "total_ms": st[1] * 1000.0,
+                    "avg_ms": (st[1] / st[0] * 1000.0) if st[0] else 0.0,
+                    "max_ms": st[2] * 1000.0,
+                    "errors": int(st[3]),
+                }
+                for addr, st in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self._stats.clear()
+
+    # ---------------------------------------------------------
+    # SMBus-kompatible transaksjoner
+    # ---------------------------------------------------------
+    def write_byte_data(self, addr: int, reg: int, value: int) -> None:
+        return self._run(addr, self._smbus.write_byte_data, addr, reg, value)
+
+    def read_byte_data(self, addr: int, reg: int) -> int:
+        return self._run(addr, self._smbus.read_byte_data, addr, reg)
+
+    def write_i2c_block_data(self, addr: int, reg: int, data) -> None:
+        return self._run(addr, self._smbus.write_i2c_block_data, addr, reg, data)
+
+    def read_i2c_block_data(self, addr: int, reg: int, length: int) -> List[int]:
+        return self._run(addr, self._smbus.read_i2c_block_data, addr, reg, length)
+
+    def i2c_rdwr(self, *msgs) -> None:
+        """
+        Kombinerte meldinger (repeated start) i én transaksjon.
+        Alle meldinger forventes å gå til samme adresse.
+        """
+        addr = msgs[0].addr if msgs else -1
+        return self._run(addr, self._smbus.i2c_rdwr, *msgs)
+
+    def write_read(self, addr: int, data, length: int) -> List[int]:
+        """
+        Skriv bytes og les tilbake `length` bytes i én kombinert
+        transaksjon (write + repeated start + read).
+        """
+        w = i2c_msg.write(addr, list(data))
+        r = i2c_msg.read(addr, length)
+        self.i2c_rdwr(w, r)
+        return list(r)
+
+    def close(self) -> None:
+        if self.unusable is not None:
+            # Låsen kan være holdt av en hengende tråd – ikke vent på den
+            return
+        with self.lock:
+            try:
+                self._smbus.close()
+            except Exception:
+                pass
+
+
+# -------------------------------------------------------------------
+# Én delt I2CBus per bussnummer
+# -------------------------------------------------------------------
+_BUSES: Dict[int, I2CBus] = {}
+_BUSES_LOCK = threading.Lock()
+
+
+def get_bus(bus: int = 1, smbus=None) -> I2CBus:
+    """
+    Returnerer den delte I2CBus-en for et bussnummer (opprettes ved behov).
+    smbus brukes bare første gang bussen opprettes.
+    """
+    with _BUSES_LOCK:
+        b = _BUSES.get(bus)
+        if b is None:
+            b = _BUSES[bus] = I2CBus(bus, smbus=smbus)
+        return b
+
+
+def register_bus(i2c: I2CBus) -> Optional[I2CBus]:
+    """Registrerer en ferdig I2CBus (f.eks. emulator). Returnerer evt. forrige."""
+    with _BUSES_LOCK:
+        old = _BUSES.get(i2c.bus_num)
+        _BUSES[i2c.bus_num] = i2c
+        return old
+
+
+def close_all() -> None:
+    with _BUSES_LOCK:
+        for b in _BUSES.values():
+            b.close()
+        _BUSES.clear()
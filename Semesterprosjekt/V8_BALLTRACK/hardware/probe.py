@@ -0,0 +1,239 @@
+# -------------------------------------------------------------------
+# hardware/probe.py
+#
+# Parallell hardware-probing med timeout + cachet hardware-profil.
+#
+# Før:
+#   - create_controller() testet ADC, så PCA9685, etter hverandre.
+#   - En hengende I2C-buss hadde ingen timeout.
+#
+# Nå:
+#   - Hver enhet probes i egen daemon-tråd, alle samtidig, med én felles
+#     hard timeout (join). En tråd som henger blir forlatt (daemon, så
+#     den stopper ikke programmet), og enheten regnes som "ikke funnet".
+#   - En probe som går ut på tid kan fortsatt holde busslåsen. Bussen
+#     merkes da ubrukelig (I2CBus.mark_unusable), så ingen driver blir
+#     opprettet oppå den hengende tråden.
+#   - Profilen (adresser, ADC-type ADS1015/ADS1115, PCA9685 prescale/MODE1)
+#     lagres i settings.HW_PROFILE_PATH. Neste oppstart tar ADC-typen fra
+#     profilen og gjør bare en rask verifisering (registerlesinger) i
+#     stedet for full deteksjon.
+#   - PCA9685 hopper over init-skrivinger når brikken allerede er satt
+#     opp. Det avgjøres av MODE1/PRESCALE lest ved denne oppstarten
+#     (probe_pwm), ikke av cachen: brikken kan ha vært strømløs siden
+#     forrige oppstart, og da må init-skrivingene gjøres.
+#
+# Merk: ADC og PCA9685 deler som regel samme buss (og lås), så selve
+# I2C-transaksjonene går fortsatt etter hverandre. Parallelliteten gjør
+# at ventetider (konvertering, timeout) overlapper.
+# -------------------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+import json
+import os
+import threading
+import time
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.hardware.i2c_bus import get_bus
+
+
+PROFILE_VERSION = 1
+
+# ADS1x15-registre (felles for ADS1015 og ADS1115)
+_ADS_REG_CONVERSION = 0x00
+_ADS_REG_CONFIG = 0x01
+_ADS_MUX_SINGLE = {0: 0b100, 1: 0b101, 2: 0b110, 3: 0b111}
+
+# PCA9685-registre
+_PCA_MODE1 = 0x00
+_PCA_PRESCALE = 0xFE
+
+
+# ---------------------------------------------------------
+# Enkelt-prober (kjøres i egne tråder)
+# ---------------------------------------------------------
+def probe_adc(bus: int, address: int, channel: int = 0, detect_chip: bool = True,
+              samples: int = 4) -> Dict[str, Any]:
+    """
+    Sjekker at ADC svarer, og finner typen.
+
+    ADS1015 er 12-bit venstrejustert: de 4 laveste bitene i
+    konverteringsregisteret er alltid 0. ADS1115 (16-bit) har støy der.
+    Hvis alle samples er 0 (f.eks. inngang på 0 V) kan vi ikke avgjøre
+    typen, og settings.ADC_CHIP / ADS1115 brukes.
+    """
+    i2c = get_bus(bus)
+    hi, lo = i2c.read_i2c_block_data(address, _ADS_REG_CONFIG, 2)
+    info: Dict[str, Any] = {"address": address, "config": (hi << 8) | lo}
+    if not detect_chip:
+        return info
+
+    # Single-shot, PGA ±4.096 V, DR=0b111 (860 SPS på ADS1115, 3300 på ADS1015)
+    config = (
+        (1 << 15) | (_ADS_MUX_SINGLE[channel] << 12) | (0b001 << 9)
+        | (1 << 8) | (0b111 << 5) | 0b11
+    )
+    raws = []
+    for _ in range(samples):
+        i2c.write_i2c_block_data(address, _ADS_REG_CONFIG, [config >> 8, config & 0xFF])
+        time.sleep(1.0 / 860 * 1.25)
+        hi, lo = i2c.read_i2c_block_data(address, _ADS_REG_CONVERSION, 2)
+        raws.append((hi << 8) | lo)
+
+    if any(raws):
+        info["chip"] = "ADS1015" if all((r & 0x000F) == 0 for r in raws) else "ADS1115"
+    else:
+        info["chip"] = None
+    return info
+
+
+def probe_pwm(bus: int, address: int) -> Dict[str, Any]:
+    """Leser MODE1 og PRESCALE (ingen skriving)."""
+    i2c = get_bus(bus)
+    return {
+        "address": address,
+        "mode1": i2c.read_byte_data(address, _PCA_MODE1),
+        "prescale": i2c.read_byte_data(address, _PCA_PRESCALE),
+    }
+
+
+# ---------------------------------------------------------
+# Parallell kjøring med timeout
+# ---------------------------------------------------------
+def run_with_timeout(tasks: Dict[str, Callable[[], Any]], timeout_s: float) -> Dict[str, Any]:
+    """
+    Kjører alle tasks samtidig i daemon-tråder.
+    Returnerer {navn: resultat} – eller Exception / TimeoutError per task.
+
+    (Ikke ThreadPoolExecutor: dens tråder joines ved programslutt,
+    så en hengende I2C-transaksjon ville hengt hele programmet.)
+    """
+    results: Dict[str, Any] = {}
+
+    def worker(name, fn):
+        try:
+            results[name] = fn()
+        except Exception as e:
+            results[name] = e
+
+    threads = []
+    for name, fn in tasks.items():
+        t = threading.Thread(target=worker, args=(name, fn), name=f"probe-{name}", daemon=True)
+        t.start()
+        threads.append((name, t))
+
+    deadline = time.monotonic() + timeout_s
+    for name, t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+        if t.is_alive():
+            results[name] = TimeoutError(f"{name}: ingen svar innen {timeout_s * 1000:.0f} ms")
+
+    return results
+
+
+# ---------------------------------------------------------
+# Profil-cache
+# ---------------------------------------------------------
+def _profile_path(path: Optional[str] = None) -> str:
+    return os.path.expanduser(path or settings.HW_PROFILE_PATH)
+
+
+def _expected_rig() -> Dict[str, Any]:
+    """Det settings sier – cachen gjelder bare hvis dette er uendret."""
+    return {
+        "adc": {"bus": settings.ADC_I2C_BUS, "address": settings.ADC_I2C_ADDR},
+        "pwm": {"bus": settings.PCA9685_I2C_BUS, "address": settings.PCA9685_I2C_ADDR},
+    }
+
+
+def load_profile(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_profile_path(path), "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if profile.get("version") != PROFILE_VERSION or profile.get("rig") != _expected_rig():
+        return None
+    return profile
+
+
+def save_profile(profile: Dict[str, Any], path: Optional[str] = None) -> None:
+    p = _profile_path(path)
+    try:
+        os.makedirs(os.path.dirname(p) or ".", exist_ok=True)
+        tmp = p + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+        os.replace(tmp, p)
+    except OSError as e:
+        print("[Probe] Kunne ikke lagre hardware-profil:", e)
+
+
+# ---------------------------------------------------------
+# Hovedfunksjon
+# ---------------------------------------------------------
+def probe_hardware(use_cache: bool = True, timeout_s: float = settings.HW_PROBE_TIMEOUT_S,
+                   path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Prober ADC og PCA9685 samtidig.
+
+    Returnerer profil:
+        {
+          "adc": {"address", "config", "chip"}   eller {"error": "..."}
+          "pwm": {"address", "mode1", "prescale"} eller {"error": "..."}
+                 (mode1/prescale lest nå → PCA9685(known_state=...))
+          "cached": True hvis ADC-typen kom fra cachen (ingen konverteringer)
+          "probe_ms": tidsbruk
+        }
+    """
+    t0 = time.perf_counter()
+    cached = load_profile(path) if use_cache else None
+
+    # ADC-type: tvunget i settings, ellers fra cachen, ellers detekter
+    chip = settings.ADC_CHIP if settings.ADC_CHIP != "auto" else None
+    from_cache = False
+    if chip is None and cached is not None and cached.get("adc", {}).get("chip"):
+        chip = cached["adc"]["chip"]
+        from_cache = True
+
+    results = run_with_timeout({
+        # Kjent rigg: kun "svarer du?" – ingen konverteringer
+        "adc": lambda: probe_adc(settings.ADC_I2C_BUS, settings.ADC_I2C_ADDR,
+                                 channel=settings.ADC_CHANNEL, detect_chip=chip is None),
+        "pwm": lambda: probe_pwm(settings.PCA9685_I2C_BUS, settings.PCA9685_I2C_ADDR),
+    }, timeout_s)
+
+    profile: Dict[str, Any] = {"version": PROFILE_VERSION, "rig": _expected_rig()}
+    for name, res in results.items():
+        profile[name] = {"error": str(res)} if isinstance(res, Exception) else res
+        if isinstance(res, TimeoutError):
+            # Tråden lever videre og kan holde låsen – bussen er tapt
+            get_bus(profile["rig"][name]["bus"]).mark_unusable(str(res))
+
+    adc = profile["adc"]
+    if "error" not in adc:
+        if chip is not None:
+            adc["chip"] = chip
+        elif adc.get("chip") is None:
+            adc["chip"] = "ADS1115"
+            adc["chip_guessed"] = True
+
+    # Lagre bare når noe er nytt/endret (unngår skriving til SD-kort hver oppstart)
+    ok = all("error" not in profile[name] for name in ("adc", "pwm"))
+    if use_cache and ok and not adc.get("chip_guessed") and _changed(cached, profile):
+        save_profile(profile, path)
+
+    profile["cached"] = from_cache
+    profile["probe_ms"] = (time.perf_counter() - t0) * 1000.0
+    return profile
+
+
+def _changed(cached: Optional[Dict[str, Any]], profile: Dict[str, Any]) -> bool:
+    if cached is None:
+        return True
+    keys = (("adc", "chip"), ("pwm", "mode1"), ("pwm", "prescale"))
+    return any(cached.get(d, {}).get(k) != profile[d].get(k) for d, k in keys)
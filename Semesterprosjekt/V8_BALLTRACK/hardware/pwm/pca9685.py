@@ -12,9 +12,10 @@
 # å generere PWM selv. Det gir et mer robust system under regulering.
 # -------------------------------------------------------------------
 
-from smbus2 import SMBus
 import time
 
+from V8_BALLTRACK.hardware.i2c_bus import get_bus
+
 
 class PCA9685:
     """
@@ -40,6 +41,7 @@ class PCA9685:
 
     # MODE1 flagg
     RESTART = 0x80
+    AI      = 0x20   # Auto-Increment: registeradresse øker automatisk ved burst
     SLEEP   = 0x10
     ALLCALL = 0x01
 
@@ -47,23 +49,44 @@ class PCA9685:
     OUTDRV = 0x04
 
     # ----------------------------------------------------------------------
-    def __init__(self, address=0x40, bus=1, freq_hz=50):
+    def __init__(self, address=0x40, bus=1, freq_hz=50, min_change_ticks=0, i2c=None,
+                 known_state=None):
         """
         Initialiserer PCA9685.
 
         address: I2C-adressen til modulen
         bus:     Raspberry Pi sin I2C-bus (1 på Pi 4/5)
         freq_hz: PWM-frekvens. Servor bruker alltid ~50 Hz.
+        min_change_ticks: deadband. Endringer mindre enn dette (i ticks)
+                          skrives ikke. 0 = skriv alle reelle endringer.
+        i2c:     delt I2CBus (hardware/i2c_bus.py). None -> get_bus(bus).
+        known_state: {"mode1", "prescale"} lest ved probing (hardware/probe.py).
+                 Hvis brikken allerede er våken, har AI og riktig prescale,
+                 hoppes init-skrivingene (og 5 ms-pausene) over.
 
         Tilsvarer Arduino:
             servo.attach(pin);
         """
 
         self.address = address
-        self.bus = SMBus(bus)
-
-        # Aktiver I2C-kommunikasjon
-        self._write(self.MODE1, self.ALLCALL)
+        # Delt, låst buss (hardware/i2c_bus.py) – samme buss som ADC
+        self.bus = i2c if i2c is not None else get_bus(bus)
+
+        # Skyggekopi av siste skrevne (on, off) ticks per kanal.
+        # Brukes til å hoppe over I2C-skriving når ingenting endres.
+        self.min_change_ticks = int(min_change_ticks)
+        self._shadow = {}
+        self.writes_issued = 0
+        self.writes_suppressed = 0
+
+        # Allerede satt opp (f.eks. programmet startet på nytt uten strømbrudd)?
+        self.init_skipped = self._is_configured(known_state, freq_hz)
+        if self.init_skipped:
+            self._set_timing(freq_hz)
+            return
+
+        # Aktiver I2C-kommunikasjon + auto-increment (for burst-skriving)
+        self._write(self.MODE1, self.ALLCALL | self.AI)
         time.sleep(0.005)
 
         # Vekk brikken fra SLEEP-modus
@@ -83,6 +106,67 @@ class PCA9685:
     def _read(self, reg):
         return self.bus.read_byte_data(self.address, reg)
 
+    def _write_block(self, reg, values):
+        # Krever AI-biten i MODE1: alle bytes skrives i én I2C-transaksjon
+        self.bus.write_i2c_block_data(self.address, reg, values)
+
+    def _write_channel(self, channel, on_ticks, off_ticks, force=False):
+        """
+        Skriver ON_L/ON_H/OFF_L/OFF_H for én kanal som én burst.
+        Brikken ser dermed aldri en halvveis skrevet puls.
+
+        Hopper over skrivingen hvis verdien er lik siste skrevne
+        (eller innenfor deadband), med mindre force=True.
+        Returnerer True hvis det ble skrevet til brikken.
+        """
+        last = self._shadow.get(channel)
+        if not force and last is not None and last[0] == on_ticks:
+            delta = abs(off_ticks - last[1])
+            if delta == 0 or (off_ticks != 0 and delta < self.min_change_ticks):
+                self.writes_suppressed += 1
+                return False
+
+        reg_base = self.LED0_ON_L + 4 * channel
+        self._write_block(reg_base, [
+            on_ticks & 0xFF, on_ticks >> 8,
+            off_ticks & 0xFF, off_ticks >> 8,
+        ])
+        self._shadow[channel] = (on_ticks, off_ticks)
+        self.writes_issued += 1
+        return True
+
+    def get_write_stats(self):
+        """Antall kanal-skrivinger sendt på bussen vs. hoppet over."""
+        return {
+            "issued": self.writes_issued,
+            "suppressed": self.writes_suppressed,
+        }
+
+    # ----------------------------------------------------------------------
+    @staticmethod
+    def prescale_for(freq_hz):
+        """Prescale-verdi fra databladet: round(25 MHz / (4096 · f)) - 1."""
+        return int(round(25000000.0 / (4096 * freq_hz) - 1))
+
+    def _is_configured(self, state, freq_hz):
+        if not state:
+            return False
+        mode1 = state.get("mode1")
+        prescale = state.get("prescale")
+        if mode1 is None or prescale is None:
+            return False
+        return (
+            prescale == self.prescale_for(freq_hz)
+            and bool(mode1 & self.AI)
+            and not (mode1 & self.SLEEP)
+        )
+
+    def _set_timing(self, freq_hz):
+        # Verdier som brukes videre når vi setter puls i mikrosekunder
+        self.freq_hz = freq_hz
+        self.period_us = 1_000_000.0 / freq_hz       # f.eks 20000 µs
+        self.ticks_per_us = 4096.0 / self.period_us  # ticks per mikrosekund
+
     # ----------------------------------------------------------------------
     def set_pwm_freq(self, freq_hz):
         """
@@ -95,7 +179,7 @@ class PCA9685:
         ønsket frekvens til brikkens interne prescaler-verdi.
         """
 
-        prescale_val = int(round(25000000.0 / (4096 * freq_hz) - 1))
+        prescale_val = self.prescale_for(freq_hz)
 
         # Brikken må settes i "sleep" for å endre prescale
         old_mode = self._read(self.MODE1)
@@ -110,10 +194,10 @@ class PCA9685:
         time.sleep(0.005)
         self._write(self.MODE1, old_mode | self.RESTART)
 
-        # Verdier som brukes videre når vi setter puls i mikrosekunder
-        self.freq_hz = freq_hz
-        self.period_us = 1_000_000.0 / freq_hz       # f.eks 20000 µs
-        self.ticks_per_us = 4096.0 / self.period_us  # ticks per mikrosekund
+        self._set_timing(freq_hz)
+
+        # Etter restart stoler vi ikke på skyggekopien
+        self._shadow.clear()
 
     # ----------------------------------------------------------------------
     def set_pulse_us(self, channel, pulse_us):
@@ -135,21 +219,15 @@ class PCA9685:
         ticks = int(pulse_us * self.ticks_per_us)
         ticks &= 0x0FFF  # begrens til 12-bit
 
-        # Hver kanal har 4 registre som må fylles
-        reg_base = self.LED0_ON_L + 4 * channel
-
-        # Puls starter på 0
-        self._write(reg_base + 0, 0)
-        self._write(reg_base + 1, 0)
-
-        # Puls slutter på "ticks"
-        self._write(reg_base + 2, ticks & 0xFF)
-        self._write(reg_base + 3, ticks >> 8)
+        # Hver kanal har 4 registre som må fylles:
+        # puls starter på 0 og slutter på "ticks" (én burst-skriving).
+        # Samme tick som sist (vanlig i ro / metning) gir ingen I2C-trafikk.
+        return self._write_channel(channel, 0, ticks)
 
     # ----------------------------------------------------------------------
     def set_servo_us(self, channel, pulse_us):
 
-        self.set_pulse_us(channel, pulse_us)
+        return self.set_pulse_us(channel, pulse_us)
 
     # ----------------------------------------------------------------------
     def servo_off(self, channel):
@@ -157,8 +235,4 @@ class PCA9685:
         Slår PWM helt av på denne kanalen.
         Tilsvarer servo.detach() på Arduino.
         """
-        reg_base = self.LED0_ON_L + 4 * channel
-        self._write(reg_base + 0, 0)
-        self._write(reg_base + 1, 0)
-        self._write(reg_base + 2, 0)
-        self._write(reg_base + 3, 0)
+        self._write_channel(channel, 0, 0, force=True)
@@ -1,4 +1,13 @@
 # V8_BALLTRACK/main.py
+#
+# Oppstart: kun config, controller og hardware importeres her.
+# GUI-stacken (tkinter, widgets, matplotlib) og emulatoren importeres
+# først når de trengs, slik at --cli starter raskt.
+#
+# Moduser:
+#   (ingen)  GUI             --cli  terminal
+#   --sim    hodeløs simulering på virtuell klokke (controller/sim.py)
+# Måling: python -m V8_BALLTRACK.tools.startup_benchmark
 import sys
 import time
 
@@ -6,45 +15,103 @@ from V8_BALLTRACK.config import settings
 
 from V8_BALLTRACK.controller.position_controller import PositionControllerV8
 from V8_BALLTRACK.controller.dummy_controller import DummyController
+from V8_BALLTRACK.controller.control_runtime import ControlRuntime, DeadlineScheduler
 
+from V8_BALLTRACK.hardware.i2c_bus import get_bus
+from V8_BALLTRACK.hardware.probe import probe_hardware
+from V8_BALLTRACK.hardware.adc.ads1015 import ADS1015
 from V8_BALLTRACK.hardware.adc.ads1115 import ADS1115
 from V8_BALLTRACK.hardware.pwm.pca9685 import PCA9685
 
-from V8_BALLTRACK.gui.gui_tags import GuiTags
-from V8_BALLTRACK.gui.app_screen import run_app
+
+def _arg_value(name, default=None):
+    """Verdi fra argument på formen --navn=verdi (ellers default)."""
+    prefix = name + "="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
 
 
 # ----------------------------------------------------------
 # HARDWARE DETECTION
 # ----------------------------------------------------------
+def _create_adc(chip):
+    if chip == "ADS1015":
+        print("[main] ADS1015 (12-bit) – husk at SOFTPOT_RAW_MIN/MAX må kalibreres for 0..4095")
+        return ADS1015(
+            bus=settings.ADC_I2C_BUS,
+            address=settings.ADC_I2C_ADDR,
+            default_channel=settings.ADC_CHANNEL,
+            i2c=get_bus(settings.ADC_I2C_BUS),
+        )
+
+    return ADS1115(
+        bus=settings.ADC_I2C_BUS,
+        address=settings.ADC_I2C_ADDR,
+        default_channel=settings.ADC_CHANNEL,
+        data_rate=settings.ADC_DATA_RATE,
+        continuous=settings.ADC_CONTINUOUS,
+        i2c=get_bus(settings.ADC_I2C_BUS),
+    )
+
+
 def create_controller():
     print("\n=== Balltrack V8 – Hardware Detection ===")
 
+    # --emu: ekte drivere + PositionControllerV8 mot emulert I2C-buss
+    emulated = "--emu" in sys.argv
+    if emulated:
+        from V8_BALLTRACK.hardware.emulator import install_emulator
+        install_emulator()
+        print("[main] --emu: bruker emulert ADS1115 + PCA9685 (hardware/emulator.py)")
+
     try:
-        # Test ADC
-        adc = ADS1115(
-            bus=settings.ADC_I2C_BUS,
-            address=settings.ADC_I2C_ADDR,
-            default_channel=settings.ADC_CHANNEL,
+        # Prob ADC + PCA9685 samtidig, med hard timeout (hardware/probe.py).
+        # Kjent rigg: ADC-type fra cachet profil, --reprobe tvinger full deteksjon.
+        profile = probe_hardware(use_cache=not emulated and "--reprobe" not in sys.argv)
+        for name in ("adc", "pwm"):
+            if "error" in profile[name]:
+                raise RuntimeError(f"{name}: {profile[name]['error']}")
+        print(
+            f"[main] Probing {profile['probe_ms']:.1f} ms: {profile['adc']['chip']}"
+            f"{' (cache)' if profile['cached'] else ''}"
+            f" @0x{settings.ADC_I2C_ADDR:02X}, PCA9685 prescale={profile['pwm']['prescale']}"
         )
+
+        # Test ADC
+        adc = _create_adc(profile["adc"]["chip"])
         _ = adc.read_raw(settings.ADC_CHANNEL)
 
-        # Test PWM
+        # Test PWM (init-skrivinger hoppes over hvis brikken allerede er satt opp)
         pwm = PCA9685(
             address=settings.PCA9685_I2C_ADDR,
             bus=settings.PCA9685_I2C_BUS,
             freq_hz=settings.PCA9685_FREQ_HZ,
+            min_change_ticks=settings.PWM_MIN_CHANGE_TICKS,
+            i2c=get_bus(settings.PCA9685_I2C_BUS),
+            known_state=profile["pwm"],
         )
 
-        ctrl = PositionControllerV8(adc, pwm)
-        ctrl.mode = "HW"
+        ctrl = PositionControllerV8(
+            adc, pwm,
+            instrument=settings.CONTROL_INSTRUMENT or "--instrument" in sys.argv,
+        )
+        ctrl.mode = "EMU" if emulated else "HW"
         print("✓ Hardware OK – bruker PID-regulering.\n")
         return ctrl
 
     except Exception as e:
         print("⚠️ Hardware IKKE funnet – bytter til DummyController")
         print("Feilmelding:", e)
-        ctrl = DummyController(adc_resolution=settings.ADC_RESOLUTION)
+        from V8_BALLTRACK.controller.plant import create_plant
+        plant = create_plant() if settings.SIM_PLANT != "simple" else None
+        ctrl = DummyController(
+            adc_resolution=settings.ADC_RESOLUTION,
+            servo_min_us=settings.SERVO_MIN_US,
+            servo_max_us=settings.SERVO_MAX_US,
+            plant=plant,
+        )
         ctrl.mode = "DUMMY"
         return ctrl
 
@@ -57,17 +124,81 @@ def run_cli():
     ctrl.set_setpoint(settings.DEFAULT_SETPOINT)
     ctrl.start()
 
-    dt = settings.PID_TS
+    # Absolutte deadlines: perioden blir CONTROL_TS uansett hvor lang
+    # tid update() og utskrift tar. PID får målt dt, ikke antatt dt.
+    sched = DeadlineScheduler(settings.CONTROL_TS)
+
+    print_period = 1.0 / settings.CLI_PRINT_HZ
+    next_print = time.monotonic()
+
     print("Trykk CTRL+C for å stoppe.")
     try:
         while True:
+            dt = sched.wait_next()
             ctrl.update(dt)
-            s = ctrl.get_status()
-            print(f"[{s.get('mode','?')}] pos={s.get('pos',0):.3f}, u={s.get('u',0):.3f}")
-            time.sleep(dt)
+
+            now = time.monotonic()
+            if now >= next_print:
+                next_print = now + print_period
+                s = ctrl.get_status()
+                print(
+                    f"[{s.get('mode','?')}] pos={s.get('pos',0):.3f}, u={s.get('u',0):.3f}"
+                    f" | dt={sched.last_dt * 1000:.1f} ms, missed={sched.overruns}"
+                )
     except KeyboardInterrupt:
         ctrl.stop()
-        print("\nStoppet.")
+        st = sched.get_stats()
+        print(
+            f"\nStoppet. {st['cycles']} sykluser, {st['overruns']} missed deadlines, "
+            f"maks dt={st['max_dt'] * 1000:.1f} ms (periode {st['period_s'] * 1000:.1f} ms)"
+        )
+
+        latency = ctrl.get_status().get("latency") or {}
+        for stage, v in latency.items():
+            print(f"  {stage:7s} p50={v['p50']:8.1f} µs  p99={v['p99']:8.1f} µs  maks={v['max']:8.1f} µs")
+
+
+# ----------------------------------------------------------
+# SIM RUN (ingen hardware, virtuell klokke)
+# ----------------------------------------------------------
+def run_sim():
+    from V8_BALLTRACK.controller.pid import PID
+    from V8_BALLTRACK.controller.plant import create_plant
+    from V8_BALLTRACK.controller.position_controller import default_pid_config
+    from V8_BALLTRACK.controller.sim import SetpointProfile, run_sim as simulate
+
+    duration = float(_arg_value("--duration", settings.SIM_DURATION_S))
+    speed = float(_arg_value("--speed", settings.SIM_SPEED))
+    profile = SetpointProfile.parse(_arg_value("--profile", settings.SIM_PROFILE))
+    out = _arg_value("--out", settings.SIM_OUT)
+
+    cfg = default_pid_config()
+    gains = _arg_value("--pid")          # --pid=Kp,Ki,Kd
+    if gains:
+        cfg.Kp, cfg.Ki, cfg.Kd = (float(g) for g in gains.split(","))
+
+    # --seed=N: reproduserbar ADC-støy (kun BallBeamPlant har støy)
+    seed = _arg_value("--seed")
+    if seed is not None and settings.SIM_PLANT == "ballbeam":
+        plant = create_plant(seed=int(seed))
+    else:
+        plant = create_plant()
+
+    print(
+        f"[sim] {duration:g} s simulert, plant={settings.SIM_PLANT}, "
+        f"Kp={cfg.Kp}, Ki={cfg.Ki}, Kd={cfg.Kd}, "
+        f"speed={'maks' if speed <= 0 else f'{speed:g}x'}"
+    )
+    result = simulate(duration, profile, plant=plant, pid=PID(cfg),
+                      period_s=settings.CONTROL_TS, speed=speed)
+
+    if out:
+        result.write_csv(out)
+    print(
+        f"[sim] {len(result.rows)} sykluser på {result.wall_s * 1000:.0f} ms "
+        f"({result.speedup:.0f}x sanntid), IAE={result.iae():.3f}"
+        + (f" → {out}" if out else "")
+    )
 
 
 # ----------------------------------------------------------
@@ -75,12 +206,29 @@ def run_cli():
 # ----------------------------------------------------------
 def run_gui():
     ctrl = create_controller()
-    tags = GuiTags(ctrl)     # <-- nøkkelen: HMI binder mot tags
-    run_app(tags)            # <-- app_screen starter Tkinter
+
+    # Reguleringen går i egen tråd – GUI leser kun status.
+    # Tråden startes før GUI-importene, så første kontrollsyklus
+    # ikke venter på tkinter/matplotlib.
+    runtime = ControlRuntime(ctrl, period_s=settings.CONTROL_TS)
+    runtime.start()
+    try:
+        from V8_BALLTRACK.gui.gui_tags import GuiTags
+        from V8_BALLTRACK.gui.app_screen import run_app
+
+        tags = GuiTags(ctrl, runtime)   # <-- nøkkelen: HMI binder mot tags
+
+        # --plot=tk: lett Canvas-plott i stedet for matplotlib (Pi-LCD)
+        run_app(tags, _arg_value("--plot", settings.PLOT_BACKEND))
+    finally:
+        runtime.stop()
+        print("[main] Kontrolltråd:", runtime.get_stats())
 
 
 def main():
-    if "--cli" in sys.argv:
+    if "--sim" in sys.argv:
+        run_sim()
+    elif "--cli" in sys.argv:
         run_cli()
     else:
         run_gui()
@@ -0,0 +1,84 @@
+# tests/test_ads1115.py
+# Single-shot mot emulert ADS1115 (hardware/emulator.py) – ingen Pi nødvendig.
+# Kjør fra Semesterprosjekt/:  python -m pytest V8_BALLTRACK/tests/test_ads1115.py
+import threading
+
+import pytest
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.hardware.adc.ads1115 import ADS1115
+from V8_BALLTRACK.hardware.emulator import EmulatedADS1115, SimSMBus, SimplePlant
+from V8_BALLTRACK.hardware.i2c_bus import I2CBus
+
+
+def _emulated_bus(pos=0.5):
+    plant = SimplePlant(pos=pos)
+    sim = SimSMBus(plant, realtime=False)
+    sim.add_device(settings.ADC_I2C_ADDR, EmulatedADS1115(plant, sim.clock))
+    return I2CBus(settings.ADC_I2C_BUS, smbus=sim)
+
+
+@pytest.mark.parametrize("data_rate", sorted(ADS1115.DATA_RATES))
+def test_single_shot_every_data_rate(data_rate):
+    adc = ADS1115(address=settings.ADC_I2C_ADDR, data_rate=data_rate, i2c=_emulated_bus())
+
+    raw = adc.read_raw(0)
+
+    expected = (settings.SOFTPOT_RAW_MIN + settings.SOFTPOT_RAW_MAX) / 2
+    assert abs(raw - expected) <= 1
+    assert adc.last_poll_count >= 1
+    # Frist skalerer med data rate, ikke fast ready_timeout_s
+    assert adc.last_conversion_s >= adc.conversion_time_s * 0.9
+
+
+class _NeverReady:
+    """ADS1115 som aldri blir ferdig (OS=0 for alltid)."""
+
+    def write_register(self, reg, data):
+        pass
+
+    def read_register(self, reg, length):
+        return [0x00, 0x00]
+
+
+def test_single_shot_timeout():
+    sim = SimSMBus(SimplePlant(), realtime=False)
+    sim.add_device(settings.ADC_I2C_ADDR, _NeverReady())
+    adc = ADS1115(address=settings.ADC_I2C_ADDR, data_rate=860, ready_timeout_s=0.005,
+                  i2c=I2CBus(settings.ADC_I2C_BUS, smbus=sim))
+
+    with pytest.raises(TimeoutError):
+        adc.read_raw(0)
+
+
+def test_single_shot_holds_bus_lock():
+    # En annen tråd som bruker bussen skal ikke komme mellom write → poll → read
+    bus = _emulated_bus()
+    dev = bus._smbus.devices[settings.ADC_I2C_ADDR]
+    log = []
+    for name in ("write_register", "read_register"):
+        orig = getattr(dev, name)
+
+        def wrapped(reg, arg, _orig=orig):
+            log.append(threading.current_thread().name)
+            return _orig(reg, arg)
+        setattr(dev, name, wrapped)
+
+    adc = ADS1115(address=settings.ADC_I2C_ADDR, data_rate=64, i2c=bus)
+    stop = threading.Event()
+
+    def other():
+        while not stop.is_set():
+            bus.read_i2c_block_data(settings.ADC_I2C_ADDR, ADS1115.REG_CONFIG, 2)
+
+    t = threading.Thread(target=other, name="other")
+    t.start()
+    try:
+        adc.read_raw(0)
+    finally:
+        stop.set()
+        t.join()
+
+    main = [i for i, name in enumerate(log) if name != "other"]
+    assert len(main) >= 3
+    assert main == list(range(main[0], main[-1] + 1))
@@ -0,0 +1,62 @@
+# tests/test_autotune.py
+# Relé-autotuning mot BallBeamPlant (ingen hardware).
+# Kjør fra Semesterprosjekt/:  python -m pytest V8_BALLTRACK/tests/test_autotune.py
+import math
+
+import pytest
+
+from V8_BALLTRACK.config import settings
+from V8_BALLTRACK.controller.autotune import RelayAutotuner, apply_gains, tuning_rule
+from V8_BALLTRACK.controller.pid import PID, PIDType
+from V8_BALLTRACK.controller.plant import BallBeamPlant
+from V8_BALLTRACK.controller.position_controller import default_pid_config, raw_to_pos, u_to_pulse
+from V8_BALLTRACK.controller.sim import SetpointProfile, run_sim
+
+
+TS = settings.CONTROL_TS
+
+
+def _run_relay(tuner, plant):
+    # Samme syklus som PositionControllerV8._autotune_step
+    steps = int(settings.AUTOTUNE_TIMEOUT_S / TS) + 2
+    for _ in range(steps):
+        u = tuner.update(raw_to_pos(plant.read_raw()), TS)
+        plant.set_pulse_us(u_to_pulse(u)[0])
+        plant.advance(TS)
+        if tuner.done:
+            break
+    return tuner
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_relay_finishes_on_plant(seed):
+    tuner = _run_relay(RelayAutotuner(setpoint=0.5), BallBeamPlant(pos=0.5, seed=seed))
+
+    assert tuner.state == "done", tuner.message
+    assert tuner.result["converged"]
+    assert tuner.cycles <= settings.AUTOTUNE_MAX_CYCLES
+    assert tuner.t < settings.AUTOTUNE_TIMEOUT_S
+    assert tuner.result["Ku"] > 0.0 and tuner.result["Pu"] > 0.0
+
+
+def test_tuned_gains_settle_step():
+    tuner = _run_relay(RelayAutotuner(setpoint=0.5), BallBeamPlant(pos=0.5, seed=1))
+    assert tuner.state == "done", tuner.message
+
+    cfg = default_pid_config()
+    apply_gains(cfg, *tuner.result["gains"])
+
+    for pid_type in PIDType:
+        cfg.pid_type = pid_type
+        result = run_sim(
+            20.0, SetpointProfile([(0.0, 0.5), (2.0, 0.7)]),
+            plant=BallBeamPlant(pos=0.5, seed=1), pid=PID(cfg),
+        )
+        tail = [abs(r[1] - r[2]) for r in result.rows[-int(2.0 / TS):]]
+        assert max(tail) < 0.02, pid_type
+
+
+def test_tuning_rule_no_integral():
+    K, Ti, Td = tuning_rule(2.0, 3.0, "zn", "P")
+    assert K == pytest.approx(1.0)
+    assert math.isinf(Ti) and Td == 0.0
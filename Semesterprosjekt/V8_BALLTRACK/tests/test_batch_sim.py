@@ -0,0 +1,64 @@
+# tests/test_batch_sim.py
+# Batch-simulatoren skal regne likt som enkeltversjonene (PID + BallBeamPlant).
+# Kjør fra Semesterprosjekt/:  python -m pytest V8_BALLTRACK/tests/test_batch_sim.py
+import numpy as np
+import pytest
+
+from V8_BALLTRACK.controller.batch_sim import BatchBallBeam, BatchPID, run_batch
+from V8_BALLTRACK.controller.pid import PID, PIDConfig, PIDType
+from V8_BALLTRACK.controller.plant import BallBeamPlant
+from V8_BALLTRACK.controller.sim import SetpointProfile, run_sim
+
+
+# Én kandidat per form (parametre i formens egne navn)
+CASES = {
+    PIDType.PARALLEL: {"Kp": 2.0, "Ki": 0.3, "Kd": 0.9},
+    PIDType.IDEAL:    {"K": 1.8, "Ti": 6.0, "Td": 0.45},
+    PIDType.SERIES:   {"Kp": 2.2, "Ti": 5.0, "Td": 0.4},
+}
+
+DURATION_S = 10.0
+PROFILE = SetpointProfile([(0.0, 0.5), (2.0, 0.7), (6.0, 0.35)])
+
+
+@pytest.mark.parametrize("pid_type", list(CASES))
+def test_batch_matches_scalar_without_noise(pid_type):
+    params = CASES[pid_type]
+
+    scalar = run_sim(
+        DURATION_S, PROFILE,
+        plant=BallBeamPlant(pos=0.5, adc_noise_lsb=0.0),
+        pid=PID(PIDConfig(pid_type=pid_type, **params)),
+    )
+    pos_ref = np.array([r[2] for r in scalar.rows])
+    u_ref = np.array([r[3] for r in scalar.rows])
+
+    batch = run_batch(
+        BatchPID(1, pid_type, **params),
+        BatchBallBeam(1, pos=0.5, adc_noise_lsb=0.0),
+        DURATION_S, PROFILE, record=("pos", "u"),
+    )
+
+    assert batch.data["pos"].shape == (len(pos_ref), 1)
+    # Lagret som float32 → sammenlign med float32-presisjon
+    np.testing.assert_allclose(batch.data["pos"][:, 0], pos_ref, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(batch.data["u"][:, 0], u_ref, rtol=0, atol=1e-5)
+
+
+def test_batch_loops_are_independent():
+    # Tre former i samme batch = tre separate kjøringer
+    forms = list(CASES)
+    kw = {k: [CASES[f].get(k, 0.0) for f in forms] for k in ("Kp", "Ki", "Kd", "K", "Ti", "Td")}
+    mixed = run_batch(
+        BatchPID(3, forms, **kw),
+        BatchBallBeam(3, pos=0.5, adc_noise_lsb=0.0),
+        DURATION_S, PROFILE, record=("pos",),
+    )
+
+    for i, f in enumerate(forms):
+        single = run_batch(
+            BatchPID(1, f, **CASES[f]),
+            BatchBallBeam(1, pos=0.5, adc_noise_lsb=0.0),
+            DURATION_S, PROFILE, record=("pos",),
+        )
+        np.testing.assert_allclose(mixed.data["pos"][:, i], single.data["pos"][:, 0], atol=1e-6)
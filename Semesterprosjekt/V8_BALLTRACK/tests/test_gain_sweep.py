@@ -0,0 +1,18 @@
+# tests/test_gain_sweep.py
+# Kjør fra Semesterprosjekt/:  python -m pytest V8_BALLTRACK/tests/test_gain_sweep.py
+import numpy as np
+
+from V8_BALLTRACK.tools.gain_sweep import evaluate
+
+
+def test_metrics_independent_of_chunk_layout():
+    # Samme gains alene og bakerst i en bit skal gi identiske mål
+    # (cache-nøkkelen inneholder ikke bit-inndelingen)
+    gains = np.array([[2.0, 0.4, 0.8]])
+    others = np.array([[1.0, 0.1, 0.3], [3.0, 0.0, 1.2], [0.5, 0.2, 0.1],
+                       [2.5, 0.6, 0.5], [1.5, 0.3, 1.0]])
+
+    alone = evaluate("parallel", gains)[0]
+    in_chunk = evaluate("parallel", np.vstack([others, gains]))[-1]
+
+    np.testing.assert_allclose(alone, in_chunk, rtol=1e-9)
@@ -0,0 +1,430 @@
+# V8_BALLTRACK/tools/gain_sweep.py
+# -----------------------------------------------------------
+# Gain-sweep: søk etter PID-parametre i batch-simulatoren
+# -----------------------------------------------------------
+# Kjører sprangrespons (settings.SWEEP_STEP) for mange kandidater
+# i controller/batch_sim.py, og rangerer dem på:
+#   IAE, ISE, ITAE, oversving (%), innsvingningstid (s), pådrag (∫|u| dt)
+#
+# Kandidater per PID-form, i formens egne parametre:
+#   parallel: Kp, Ki, Kd     ideal: K, Ti, Td     series: Kp, Ti, Td
+# Utvalg: grid (--grid=N punkter per akse), random eller lhs
+# (Latin hypercube, --n=N). Søkeområder: settings.SWEEP_RANGES,
+# kan overstyres med f.eks. --Kp=0.5:4 --Ti=1:10.
+#
+# Parallellisering: kandidatene deles i biter (SWEEP_CHUNK) og kjøres
+# i en ProcessPoolExecutor (alle kjerner). Hver bit er én batch-
+# simulering, så både vektorisering og flere kjerner utnyttes.
+#
+# Cache: resultater lagres i sqlite (SWEEP_CACHE_PATH), med nøkkel =
+# hash av (kodeversjon, plant-parametre, scenario, form, parametre).
+# Alle kandidater ser samme ADC-støysekvens (SWEEP_SEED), så verdien
+# for en nøkkel er den samme uansett hvilken bit kandidaten havnet i.
+# Ny kjøring beregner bare punkter som ikke finnes. Endres plant-
+# modellen, PID-koden eller settings, blir nøklene nye.
+#
+# Resultat: rangert CSV. Kolonnene kp, ki, kd er parallell-ekvivalente
+# gains (u = kp·e + ki·∫e + kd·de/dt), og kan lastes rett inn i
+# PositionControllerV8.set_pid (PID-form parallel):
+#     from V8_BALLTRACK.tools.gain_sweep import best_gains
+#     ctrl.set_pid(*best_gains("gain_sweep.csv"))
+#
+# Bruk (fra mappen som inneholder V8_BALLTRACK):
+#   python -m V8_BALLTRACK.tools.gain_sweep --method=lhs --n=5000
+#   python -m V8_BALLTRACK.tools.gain_sweep --method=grid --grid=12 --forms=parallel
+# -----------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import csv
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from V8_BALLTRACK.config import settings
+
+
+# Parametre per PID-form (rekkefølgen = kolonnene p1, p2, p3)
+FORM_PARAMS = {
+    "parallel": ("Kp", "Ki", "Kd"),
+    "ideal": ("K", "Ti", "Td"),
+    "series": ("Kp", "Ti", "Td"),
+}
+
+METRICS = ("iae", "ise", "itae", "overshoot", "settling", "effort")
+
+CSV_COLUMNS = ("rank", "form", "p1", "p2", "p3", "kp", "ki", "kd") + METRICS
+
+
+# ---------------------------------------------------------
+# Utvalg av kandidater
+# ---------------------------------------------------------
+def sample(method: str, ranges: Sequence[Tuple[float, float]], n: int = 1000,
+           grid: int = 10, seed: Optional[int] = None) -> np.ndarray:
+    """Returnerer (M, D) array med kandidater innenfor `ranges`."""
+    lo = np.array([r[0] for r in ranges], dtype=float)
+    hi = np.array([r[1] for r in ranges], dtype=float)
+    dims = len(ranges)
+    rng = np.random.default_rng(seed)
+
+    if method == "grid":
+        axes = [np.linspace(a, b, grid) for a, b in zip(lo, hi)]
+        mesh = np.meshgrid(*axes, indexing="ij")
+        return np.stack([m.ravel() for m in mesh], axis=1)
+
+    if method == "random":
+        return lo + rng.random((n, dims)) * (hi - lo)
+
+    if method == "lhs":
+        # Én kandidat i hvert av n like store intervaller per akse,
+        # intervallene stokkes uavhengig per akse
+        u = (np.arange(n)[:, None] + rng.random((n, dims))) / n
+        for d in range(dims):
+            u[:, d] = u[rng.permutation(n), d]
+        return lo + u * (hi - lo)
+
+    raise ValueError(f"Ukjent metode '{method}'. Gyldig: grid, random, lhs")
+
+
+# ---------------------------------------------------------
+# Ytelsesmål (løpende, ingen lagret trajektorie)
+# ---------------------------------------------------------
+class StepMetrics:
+    """on_step-callback for run_batch: akkumulerer mål for N sløyfer."""
+
+    def __init__(self, n: int, sp0: float, sp1: float, band: float, period_s: float):
+        self.dt = period_s
+        self.sp1 = sp1
+        self.step = abs(sp1 - sp0) or 1.0
+        self.sign = 1.0 if sp1 >= sp0 else -1.0
+        self.band = band * self.step
+
+        self.iae = np.zeros(n)
+        self.ise = np.zeros(n)
+        self.itae = np.zeros(n)
+        self.effort = np.zeros(n)
+        self.peak = np.full(n, -np.inf)
+        self.last_out = np.zeros(n)
+        self.t_end = 0.0
+
+    def __call__(self, t, sp, pos, u):
+        dt = self.dt
+        e = sp - pos
+        ae = np.abs(e)
+        self.iae += ae * dt
+        self.ise += e * e * dt
+        self.itae += t * ae * dt
+        self.effort += np.abs(u) * dt
+        np.maximum(self.peak, (pos - self.sp1) * self.sign, out=self.peak)
+        self.last_out[ae > self.band] = t
+        self.t_end = t
+
+    def result(self) -> np.ndarray:
+        """(N, 6) i rekkefølgen METRICS. Ikke innsvingt → settling = inf."""
+        overshoot = np.maximum(0.0, self.peak) / self.step * 100.0
+        settling = np.where(self.last_out >= self.t_end, np.inf, self.last_out + self.dt)
+        return np.stack([self.iae, self.ise, self.itae, overshoot, settling, self.effort], axis=1)
+
+
+# ---------------------------------------------------------
+# Scenario / plant / kodeversjon (inngår i cache-nøkkelen)
+# ---------------------------------------------------------
+def scenario() -> Dict[str, Any]:
+    return {
+        "duration_s": settings.SWEEP_DURATION_S,
+        "step": list(settings.SWEEP_STEP),
+        "band": settings.SWEEP_SETTLE_BAND,
+        "period_s": settings.CONTROL_TS,
+        "seed": settings.SWEEP_SEED,
+        "umin": settings.PID_MIN,
+        "umax": settings.PID_MAX,
+    }
+
+
+def plant_params() -> Dict[str, Any]:
+    return {
+        "dt": settings.PLANT_DT,
+        "beam_length_m": settings.PLANT_BEAM_LENGTH_M,
+        "max_angle_deg": settings.PLANT_BEAM_MAX_ANGLE_DEG,
+        "offset_deg": settings.PLANT_BEAM_OFFSET_DEG,
+        "servo_tau_s": settings.PLANT_SERVO_TAU_S,
+        "servo_slew_deg_s": settings.PLANT_SERVO_SLEW_DEG_S,
+        "inertia_ratio": settings.PLANT_BALL_INERTIA,
+        "damping": settings.PLANT_DAMPING,
+        "restitution": settings.PLANT_END_RESTITUTION,
+        "adc_noise_lsb": settings.PLANT_ADC_NOISE_LSB,
+        "adc_lsb": settings.PLANT_ADC_LSB,
+        # Skalering utenfor plant-klassen
+        "softpot": [settings.SOFTPOT_RAW_MIN, settings.SOFTPOT_RAW_MAX],
+        "servo": [settings.SERVO_MIN_US, settings.SERVO_MAX_US],
+        "adc_resolution": settings.ADC_RESOLUTION,
+    }
+
+
+def code_version() -> str:
+    """Hash av kildekoden som påvirker resultatet."""
+    from V8_BALLTRACK.controller import batch_sim, pid, plant
+
+    h = hashlib.sha1()
+    for mod in (batch_sim, pid, plant, sys.modules[__name__]):
+        with open(mod.__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+def _context_hash() -> str:
+    ctx = json.dumps({"code": code_version(), "plant": plant_params(), "scenario": scenario()},
+                     sort_keys=True)
+    return hashlib.sha1(ctx.encode()).hexdigest()
+
+
+def candidate_key(context: str, form: str, params) -> str:
+    text = f"{context}|{form}|" + ",".join(repr(float(p)) for p in params)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+# ---------------------------------------------------------
+# Cache (sqlite)
+# ---------------------------------------------------------
+class ResultCache:
+    def __init__(self, path: str = settings.SWEEP_CACHE_PATH):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, "
+            + ", ".join(f"{m} REAL" for m in METRICS) + ")"
+        )
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Tuple[float, ...]]:
+        out = {}
+        for i in range(0, len(keys), 500):          # sqlite: maks antall parametre
+            part = keys[i:i + 500]
+            q = f"SELECT key, {', '.join(METRICS)} FROM results WHERE key IN ({','.join('?' * len(part))})"
+            for row in self._db.execute(q, part):
+                out[row[0]] = row[1:]
+        return out
+
+    def put_many(self, items: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        q = f"INSERT OR REPLACE INTO results VALUES (?, {', '.join('?' * len(METRICS))})"
+        with self._db:
+            self._db.executemany(q, [(k, *map(float, m)) for k, m in items])
+
+    def close(self) -> None:
+        self._db.close()
+
+
+# ---------------------------------------------------------
+# Evaluering (kjøres i arbeidsprosesser)
+# ---------------------------------------------------------
+def evaluate(form: str, params: np.ndarray) -> np.ndarray:
+    """Sprangrespons for alle kandidater i `params` (M, 3). Returnerer (M, 6)."""
+    from V8_BALLTRACK.controller.batch_sim import BatchBallBeam, BatchPID, run_batch
+
+    n = len(params)
+    names = FORM_PARAMS[form]
+    sc = scenario()
+    sp0, sp1 = sc["step"]
+
+    pid = BatchPID(n, form, umin=sc["umin"], umax=sc["umax"],
+                   **{name: params[:, i] for i, name in enumerate(names)})
+    pp = {k: v for k, v in plant_params().items() if k not in ("softpot", "servo", "adc_resolution")}
+    # Felles støysekvens for alle rader: metrikkene er da en funksjon av
+    # (gains, plant, scenario) alene, uavhengig av bit-inndeling/--workers
+    plant = BatchBallBeam(n, pos=sp0, seed=sc["seed"], common_noise=True, **pp)
+
+    metrics = StepMetrics(n, sp0, sp1, sc["band"], sc["period_s"])
+    run_batch(pid, plant, sc["duration_s"], sp1, period_s=sc["period_s"],
+              record=(), on_step=metrics)
+    return metrics.result()
+
+
+def parallel_equivalent(form: str, params: np.ndarray) -> np.ndarray:
+    """(M, 3) kp, ki, kd for PositionControllerV8.set_pid."""
+    from V8_BALLTRACK.controller.batch_sim import BatchPID
+
+    pid = BatchPID(len(params), form, **{name: params[:, i] for i, name in enumerate(FORM_PARAMS[form])})
+    return np.stack([pid.cP, pid.cI, pid.cD], axis=1)
+
+
+# ---------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------
+def sweep(
+    forms: Sequence[str] = ("parallel", "ideal", "series"),
+    method: str = "lhs",
+    n: int = 1000,
+    grid: int = 10,
+    ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+    cache_path: str = settings.SWEEP_CACHE_PATH,
+    seed: Optional[int] = 0,
+) -> List[Dict[str, Any]]:
+    """Returnerer én rad (dict) per kandidat, urangert."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = {**settings.SWEEP_RANGES, **(ranges or {})}
+    context = _context_hash()
+    cache = ResultCache(cache_path) if use_cache else None
+
+    # 1. Kandidater + cache-oppslag
+    jobs = []       # (form, params, keys, metrics-array, mangler-indekser)
+    for form in forms:
+        if form not in FORM_PARAMS:
+            raise ValueError(f"Ukjent PID-form '{form}'. Gyldig: {tuple(FORM_PARAMS)}")
+        params = sample(method, [ranges[p] for p in FORM_PARAMS[form]], n=n, grid=grid, seed=seed)
+        keys = [candidate_key(context, form, p) for p in params]
+        metrics = np.full((len(params), len(METRICS)), np.nan)
+
+        hits = cache.get_many(keys) if cache is not None else {}
+        missing = []
+        for i, k in enumerate(keys):
+            if k in hits:
+                metrics[i] = hits[k]
+            else:
+                missing.append(i)
+        jobs.append((form, params, keys, metrics, np.array(missing, dtype=int)))
+
+    n_total = sum(len(j[1]) for j in jobs)
+    n_new = sum(len(j[4]) for j in jobs)
+    print(f"[GainSweep] {n_total} kandidater, {n_total - n_new} fra cache, {n_new} beregnes")
+
+    # 2. Nye punkter: biter fordelt på alle kjerner
+    t0 = time.perf_counter()
+    if n_new:
+        workers = workers or os.cpu_count() or 1
+        chunk = max(1, min(settings.SWEEP_CHUNK, math.ceil(n_new / workers)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for job_i, (form, params, _, _, missing) in enumerate(jobs):
+                for s in range(0, len(missing), chunk):
+                    idx = missing[s:s + chunk]
+                    futures.append((job_i, idx, pool.submit(evaluate, form, params[idx])))
+
+            for job_i, idx, fut in futures:
+                form, params, keys, metrics, _ = jobs[job_i]
+                metrics[idx] = fut.result()
+                if cache is not None:
+                    cache.put_many([(keys[i], metrics[i]) for i in idx])
+        dt = time.perf_counter() - t0
+        print(f"[GainSweep] {n_new} simuleringer på {dt:.1f} s med {workers} prosesser")
+
+    if cache is not None:
+        cache.close()
+
+    # 3. Rader
+    rows = []
+    for form, params, _, metrics, _ in jobs:
+        gains = parallel_equivalent(form, params)
+        for p, g, m in zip(params, gains, metrics):
+            row = {"form": form, "p1": p[0], "p2": p[1], "p3": p[2],
+                   "kp": g[0], "ki": g[1], "kd": g[2]}
+            row.update(zip(METRICS, map(float, m)))
+            rows.append(row)
+    return rows
+
+
+def rank(rows: List[Dict[str, Any]], by: str = "itae") -> List[Dict[str, Any]]:
+    """Innsvingte kandidater først, deretter stigende `by`."""
+    if by not in METRICS:
+        raise ValueError(f"Ukjent mål '{by}'. Gyldig: {METRICS}")
+    ranked = sorted(rows, key=lambda r: (math.isinf(r["settling"]), r[by]))
+    for i, r in enumerate(ranked, 1):
+        r["rank"] = i
+    return ranked
+
+
+# ---------------------------------------------------------
+# CSV inn/ut
+# ---------------------------------------------------------
+def write_csv(rows: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        w.writeheader()
+        for r in rows:
+            w.writerow({k: (f"{r[k]:.6g}" if isinstance(r[k], float) else r[k]) for k in CSV_COLUMNS})
+
+
+def load_ranked(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    for r in rows:
+        for k in CSV_COLUMNS:
+            if k not in ("rank", "form"):
+                r[k] = float(r[k])
+        r["rank"] = int(r["rank"])
+    return rows
+
+
+def best_gains(path: str, rank_no: int = 1) -> Tuple[float, float, float]:
+    """(kp, ki, kd) for plass `rank_no` – klar for set_pid(kp, ki, kd)."""
+    for r in load_ranked(path):
+        if r["rank"] == rank_no:
+            return r["kp"], r["ki"], r["kd"]
+    raise ValueError(f"Fant ikke rank {rank_no} i {path}")
+
+
+# ---------------------------------------------------------
+# CLI
+# ---------------------------------------------------------
+def _arg(name, default=None):
+    prefix = name + "="
+    for arg in sys.argv[1:]:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return default
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help", "help"):
+        print("Bruk:")
+        print("  python -m V8_BALLTRACK.tools.gain_sweep [--method=grid|random|lhs] [--n=N] [--grid=N]")
+        print("      [--forms=parallel,ideal,series] [--rank=itae|iae|ise|overshoot|settling|effort]")
+        print("      [--workers=N] [--out=gain_sweep.csv] [--no-cache] [--Kp=min:max ...]")
+        raise SystemExit(0)
+
+    ranges = {}
+    for name in settings.SWEEP_RANGES:
+        value = _arg("--" + name)
+        if value:
+            a, b = value.split(":")
+            ranges[name] = (float(a), float(b))
+
+    workers = _arg("--workers")
+    rows = sweep(
+        forms=_arg("--forms", "parallel,ideal,series").split(","),
+        method=_arg("--method", "lhs"),
+        n=int(_arg("--n", 1000)),
+        grid=int(_arg("--grid", 10)),
+        ranges=ranges,
+        workers=int(workers) if workers else None,
+        use_cache="--no-cache" not in sys.argv,
+    )
+    by = _arg("--rank", "itae")
+    ranked = rank(rows, by)
+
+    out = _arg("--out", "gain_sweep.csv")
+    write_csv(ranked, out)
+
+    print(f"\n=== Topp 10 (rangert på {by}) → {out} ===")
+    print(f"  {'#':>3} {'form':8} {'kp':>7} {'ki':>7} {'kd':>7} {'itae':>8} {'os %':>6} {'ts s':>6} {'effort':>7}")
+    for r in ranked[:10]:
+        print(
+            f"  {r['rank']:3d} {r['form']:8} {r['kp']:7.3f} {r['ki']:7.3f} {r['kd']:7.3f} "
+            f"{r['itae']:8.3f} {r['overshoot']:6.1f} {r['settling']:6.2f} {r['effort']:7.3f}"
+        )
+    if ranked:
+        best = ranked[0]
+        print(f"\n  ctrl.set_pid({best['kp']:.4g}, {best['ki']:.4g}, {best['kd']:.4g})")
+
+
+if __name__ == "__main__":
+    main()
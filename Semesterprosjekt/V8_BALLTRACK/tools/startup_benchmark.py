@@ -0,0 +1,165 @@
+# V8_BALLTRACK/tools/startup_benchmark.py
+# -----------------------------------------------------------
+# Oppstartstid: tid til første kontrollsyklus (CLI og GUI)
+# -----------------------------------------------------------
+# Starter en ny Python-prosess per måling (kald import hver gang)
+# med `-X importtime`, og måler:
+#   - first_cycle: tid fra prosessstart til første controller.update()
+#   - gui_import:  (kun GUI) tid til GuiTags + app_screen + plottmodul
+#                  er importert (uten å åpne vindu – virker uten skjerm)
+#   - import-summer fra -X importtime, og om tkinter/matplotlib ble lastet
+#
+# Bruk (fra mappen som inneholder V8_BALLTRACK):
+#   python -m V8_BALLTRACK.tools.startup_benchmark
+#   python -m V8_BALLTRACK.tools.startup_benchmark --runs 10 --emu --plot=tk
+#
+# Barneprosessen kjører samme funksjoner som main.py (create_controller,
+# DeadlineScheduler / ControlRuntime), så målingen følger main sin struktur.
+# -----------------------------------------------------------
+
+import sys
+import time
+
+
+# ---------------------------------------------------------
+# Barneprosess (holdes lett: kun sys/time før main importeres)
+# ---------------------------------------------------------
+def _child(mode, t_spawn, plot_backend):
+    from V8_BALLTRACK import main as m
+    from V8_BALLTRACK.config import settings
+
+    ctrl = m.create_controller()
+
+    if mode == "cli":
+        sched = m.DeadlineScheduler(settings.CONTROL_TS)
+        ctrl.update(sched.wait_next())
+        print(f"@first_cycle {time.time() - t_spawn:.6f}")
+        return
+
+    # GUI: som run_gui() – tråden startes før GUI-importene
+    runtime = m.ControlRuntime(ctrl, period_s=settings.CONTROL_TS)
+    runtime.start()
+    while runtime.get_stats()["cycles"] < 1:
+        time.sleep(0.0005)
+    print(f"@first_cycle {time.time() - t_spawn:.6f}")
+
+    from V8_BALLTRACK.gui.gui_tags import GuiTags
+    from V8_BALLTRACK.gui.app_screen import load_plot_widget
+
+    GuiTags(ctrl, runtime)
+    load_plot_widget(plot_backend)
+    print(f"@gui_import {time.time() - t_spawn:.6f}")
+    runtime.stop()
+
+
+# ---------------------------------------------------------
+# Måling
+# ---------------------------------------------------------
+def _parse_importtime(stderr):
+    """Returnerer {modul: (kumulativ µs, nivå)} fra -X importtime (nivå 0 = topnivå)."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue            # overskriftslinjen
+        name = parts[2].rstrip()
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        out[name.strip()] = (cumulative, level)
+    return out
+
+
+def run_once(mode, emu=False, plot_backend=None):
+    import os
+    import subprocess
+
+    argv = ["--cli"] if mode == "cli" else []
+    if emu:
+        argv.append("--emu")
+
+    # -c: sys.argv = ["-c", mode, t0]. main.py leser flagg fra sys.argv.
+    code = (
+        "import sys\n"
+        "mode, t0 = sys.argv[1], float(sys.argv[2])\n"
+        f"sys.argv = ['main'] + {argv!r}\n"
+        "from V8_BALLTRACK.tools.startup_benchmark import _child\n"
+        f"_child(mode, t0, {plot_backend!r})\n"
+    )
+
+    pkg_parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = pkg_parent + os.pathsep + env.get("PYTHONPATH", "")
+
+    t0 = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code, mode, repr(t0)],
+        capture_output=True, text=True, cwd=pkg_parent, env=env, timeout=60,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode}: barneprosess feilet\n{proc.stderr[-2000:]}")
+
+    result = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("@"):
+            key, value = line[1:].split()
+            result[key] = float(value)
+
+    imports = _parse_importtime(proc.stderr)
+    result["imports"] = imports
+    result["import_total"] = sum(us for us, level in imports.values() if level == 0) / 1e6
+    result["tkinter"] = "tkinter" in imports
+    result["matplotlib"] = "matplotlib" in imports
+    return result
+
+
+def benchmark(runs=5, emu=False, plot_backend=None, top=8):
+    from statistics import median
+
+    for mode in ("cli", "gui"):
+        results = [run_once(mode, emu, plot_backend) for _ in range(runs)]
+
+        first = median(r["first_cycle"] for r in results) * 1000
+        total = median(r["import_total"] for r in results) * 1000
+        print(f"\n=== {mode.upper()} ({runs} kjøringer, median) ===")
+        print(f"  tid til første kontrollsyklus : {first:8.1f} ms")
+        if mode == "gui":
+            gui = median(r["gui_import"] for r in results) * 1000
+            print(f"  tid til GUI-moduler importert : {gui:8.1f} ms")
+        print(f"  importtid (topnivå, sum)      : {total:8.1f} ms")
+        print(f"  tkinter importert             : {'ja' if results[-1]['tkinter'] else 'nei'}")
+        print(f"  matplotlib importert          : {'ja' if results[-1]['matplotlib'] else 'nei'}")
+
+        # Tyngste pakker, uansett hvem som importerte dem (siste kjøring)
+        imports = results[-1]["imports"]
+        heavy = sorted(
+            ((us, name) for name, (us, _) in imports.items() if "." not in name),
+            reverse=True,
+        )[:top]
+        print("  tyngste importer:")
+        for us, name in heavy:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help", "help"):
+        print("Bruk:")
+        print("  python -m V8_BALLTRACK.tools.startup_benchmark [--runs N] [--emu] [--plot=mpl|tk]")
+        raise SystemExit(0)
+
+    runs = 5
+    if "--runs" in sys.argv:
+        runs = int(sys.argv[sys.argv.index("--runs") + 1])
+
+    plot_backend = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--plot="):
+            plot_backend = arg.split("=", 1)[1]
+
+    benchmark(runs=runs, emu="--emu" in sys.argv, plot_backend=plot_backend)
+
+
+if __name__ == "__main__":
+    main()